@@ -0,0 +1,144 @@
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+import typing as tp
+
+import click
+
+import service.service_pb2 as service_pb2
+from event_log import Record, RoomEvent, encode
+from mafia_host import HostEvent, PlayerRoles, Winner
+from server import Mafia, MafiaConfig
+
+
+PLAYERS_PER_ROOM = 5
+ROLES = {
+    1: PlayerRoles.Mafia,
+    2: PlayerRoles.Officer,
+    3: PlayerRoles.Civilian,
+    4: PlayerRoles.Civilian,
+    5: PlayerRoles.Civilian,
+}
+
+
+async def lobby(mafia: Mafia) -> None:
+    # The nickname shows up in every record, so keep it realistic.
+    reply = await mafia.CreateRoom(
+        service_pb2.CreateRoomRequest(nickname="player0"), None
+    )
+    users = [reply.user_id]
+    for i in range(1, PLAYERS_PER_ROOM):
+        joined = await mafia.JoinToRoom(service_pb2.JoinToRoomRequest(
+            nickname=f"player{i}",
+            room_id=reply.room_id
+        ), None)
+        users.append(joined.user_id)
+    for user_id in users:
+        await mafia.LeaveRoom(service_pb2.LeaveRoomRequest(
+            user_id=user_id,
+            room_id=reply.room_id
+        ), None)
+
+
+async def rpc_overhead(rooms: int, directory: tp.Optional[str]) -> float:
+    mafia = Mafia(MafiaConfig(event_log_dir=directory))
+    await mafia.recover()
+    start = time.perf_counter()
+    for _ in range(rooms):
+        await lobby(mafia)
+    elapsed = time.perf_counter() - start
+    await mafia.close()
+    return elapsed
+
+
+def game(room: int, finished: bool) -> tp.Iterator[Record]:
+    room_id = f"{room:032x}"
+    yield room_id, RoomEvent.Created, (len(ROLES), 1, 1)
+    for user_id in ROLES:
+        yield room_id, HostEvent.Join, (user_id, f"player{user_id}")
+    yield room_id, HostEvent.Start, (ROLES,)
+    yield room_id, RoomEvent.Phase, ("Night",)
+    yield room_id, HostEvent.Kill, (3,)
+    yield room_id, RoomEvent.Phase, ("Day",)
+    for voter, candidate in ((2, 1), (4, 1), (5, 1), (1, 2)):
+        yield room_id, HostEvent.Vote, (voter, candidate)
+    yield room_id, HostEvent.EndDay, ()
+    yield room_id, HostEvent.End, (Winner.Civilians,)
+    yield room_id, RoomEvent.Phase, ("Finished",)
+    if finished:
+        for user_id in ROLES:
+            yield room_id, HostEvent.Leave, (user_id,)
+        yield room_id, RoomEvent.Deleted, ()
+
+
+def write_log(directory: str, records: int, live_every: int) -> int:
+    written = 0
+    room = 0
+    with open(os.path.join(directory, "wal-00000001.log"), "wb") as f:
+        while written < records:
+            for record in game(room, room % live_every != 0):
+                f.write(encode(*record))
+                written += 1
+            room += 1
+    return written
+
+
+async def recovery(records: int, live_every: int) -> tp.Tuple[int, int, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        written = write_log(directory, records, live_every)
+        mafia = Mafia(MafiaConfig(event_log_dir=directory))
+        start = time.perf_counter()
+        await mafia.recover()
+        elapsed = time.perf_counter() - start
+        rooms = len(mafia._rooms)
+        await mafia.close()
+    return written, rooms, elapsed
+
+
+async def run(rooms: int, records: tp.List[int], live_every: int) -> None:
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            without = await rpc_overhead(rooms, None)
+            with tempfile.TemporaryDirectory() as directory:
+                with_log = await rpc_overhead(rooms, directory)
+    calls = rooms * PLAYERS_PER_ROOM * 2
+    print(f"{'event log':>10}{'us/call':>10}{'calls/s':>12}")
+    for name, elapsed in (("off", without), ("on", with_log)):
+        print(
+            f"{name:>10}"
+            f"{elapsed / calls * 1e6:>10.1f}"
+            f"{calls / elapsed:>12.0f}"
+        )
+    print()
+    print(
+        f"{'records':>10}{'live rooms':>12}"
+        f"{'recovery s':>12}{'records/s':>12}"
+    )
+    for count in records:
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                written, live, elapsed = await recovery(count, live_every)
+        print(
+            f"{written:>10}"
+            f"{live:>12}"
+            f"{elapsed:>12.2f}"
+            f"{written / elapsed:>12.0f}"
+        )
+
+
+@click.command()
+@click.option("--rooms", default=2000, type=int)
+@click.option("--records", default="10000,100000,1000000", type=str)
+@click.option("--live-every", default=100, type=int)
+def main(rooms: int, records: str, live_every: int) -> None:
+    asyncio.run(run(
+        rooms,
+        [int(count) for count in records.split(",")],
+        live_every
+    ))
+
+
+if __name__ == "__main__":
+    main()
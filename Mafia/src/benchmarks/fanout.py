@@ -0,0 +1,91 @@
+import asyncio
+import time
+import typing as tp
+
+import click
+
+from mafia_host import MafiaHost, Notification, RoomSettings
+from server import encoded_notification, notification_reply
+
+
+# Append a batch of events, then let every subscriber catch up before the
+# next one, so that no subscriber falls out of the notification log.
+BATCH = 32
+
+
+def per_stream(seq: int, notification: Notification, typed: bool) -> bytes:
+    # Every stream builds and encodes its own reply.
+    return notification_reply(seq, notification, typed).SerializeToString()
+
+
+async def subscriber(
+    host: MafiaHost,
+    encode: tp.Callable[[int, Notification, bool], bytes],
+    typed: bool
+) -> int:
+    sent = 0
+    async for seq, notification in host.notifications():
+        sent += len(encode(seq, notification, typed))
+    return sent
+
+
+async def fan_out(
+    subscribers: int,
+    events: int,
+    encode: tp.Callable[[int, Notification, bool], bytes],
+    typed: bool
+) -> float:
+    host = MafiaHost(
+        notifications_capacity=BATCH * 4,
+        settings=RoomSettings(events)
+    )
+    tasks = [
+        asyncio.ensure_future(subscriber(host, encode, typed))
+        for _ in range(subscribers)
+    ]
+    await asyncio.sleep(0)
+    start = time.process_time()
+    for event in range(events):
+        host.join(f"player{event}")
+        if event % BATCH == BATCH - 1:
+            await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    host.close()
+    await asyncio.gather(*tasks)
+    return time.process_time() - start
+
+
+async def run(
+    subscribers: tp.List[int],
+    events: int,
+    typed: bool
+) -> None:
+    print(
+        f"{'subscribers':>12}{'per-stream us/event':>22}"
+        f"{'shared us/event':>18}{'speedup':>10}"
+    )
+    for count in subscribers:
+        separate = await fan_out(count, events, per_stream, typed)
+        shared = await fan_out(count, events, encoded_notification, typed)
+        print(
+            f"{count:>12}"
+            f"{separate / events * 1e6:>22.1f}"
+            f"{shared / events * 1e6:>18.1f}"
+            f"{separate / shared:>10.2f}"
+        )
+
+
+@click.command()
+@click.option("--subscribers", default="1,5,50,500", type=str)
+@click.option("--events", default=2000, type=int)
+@click.option("--typed/--legacy", default=True)
+def main(subscribers: str, events: int, typed: bool) -> None:
+    asyncio.run(run(
+        [int(count) for count in subscribers.split(",")],
+        events,
+        typed
+    ))
+
+
+if __name__ == "__main__":
+    main()
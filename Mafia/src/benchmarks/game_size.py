@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+import typing as tp
+
+import click
+
+import service.service_pb2 as service_pb2
+from server import Mafia, MafiaConfig
+
+
+async def subscriber(mafia: Mafia, room_id: str, user_id: int) -> int:
+    received = 0
+    async for _ in mafia.SubscribeOnNotifications(
+        service_pb2.SubscribeOnNotificationsRequest(
+            user_id=user_id,
+            room_id=room_id,
+            typed=True
+        ),
+        None
+    ):
+        received += 1
+    return received
+
+
+async def game(
+    players: int,
+    mafia_share: float,
+    rng: random.Random
+) -> tp.Tuple[int, int, int]:
+    mafia = Mafia(MafiaConfig(
+        room_size=players, max_room_size=players, reap_grace_period=0
+    ))
+    created = await mafia.CreateRoom(service_pb2.CreateRoomRequest(
+        nickname="player0",
+        capacity=players,
+        mafia=max(1, int(players * mafia_share))
+    ), None)
+    room_id = created.room_id
+    users = [created.user_id]
+    for i in range(1, players):
+        joined = await mafia.JoinToRoom(service_pb2.JoinToRoomRequest(
+            nickname=f"player{i}",
+            room_id=room_id
+        ), None)
+        users.append(joined.user_id)
+    subscribers = [
+        asyncio.ensure_future(subscriber(mafia, room_id, user_id))
+        for user_id in users
+    ]
+    replies = await asyncio.gather(*(
+        mafia.ReadyToStart(service_pb2.ReadyToStartRequest(
+            user_id=user_id,
+            room_id=room_id
+        ), None)
+        for user_id in users
+    ))
+    alive_mafia = {
+        user_id for user_id, reply in zip(users, replies)
+        if reply.role == "Mafia"
+    }
+    alive_town = set(users) - alive_mafia
+    actions = players
+    rounds = 0
+    state = mafia._rooms[room_id]
+    while not state.host.is_finished:
+        rounds += 1
+        victim = rng.choice(sorted(alive_town))
+        await mafia.Kill(service_pb2.KillRequest(
+            room_id=room_id,
+            user_id=next(iter(alive_mafia)),
+            user_id_to_kill=victim
+        ), None)
+        alive_town.discard(victim)
+        if state.host.is_finished:
+            actions += 1
+            break
+        await asyncio.gather(*(
+            mafia.Night(service_pb2.NightRequest(
+                user_id=user_id,
+                room_id=room_id
+            ), None)
+            for user_id in users
+        ))
+        if state.host.is_finished:
+            actions += players + 1
+            break
+        # The town votes out a mafia, the mafia vote for the town.
+        suspect = rng.choice(sorted(alive_mafia))
+        scapegoat = rng.choice(sorted(alive_town))
+
+        def choice(user_id: int) -> int:
+            if user_id in alive_town:
+                return suspect
+            if user_id in alive_mafia:
+                return scapegoat
+            return user_id
+
+        await asyncio.gather(*(
+            mafia.Day(service_pb2.DayRequest(
+                room_id=room_id,
+                user_id=user_id,
+                user_id_to_kill=choice(user_id)
+            ), None)
+            for user_id in users
+        ))
+        alive_mafia.discard(suspect)
+        actions += 2 * players + 1
+    received = sum(await asyncio.gather(*subscribers))
+    return rounds, actions, received
+
+
+async def run(
+    sizes: tp.List[int],
+    mafia_share: float,
+    seed: int
+) -> None:
+    print(
+        f"{'players':>8}{'rounds':>8}{'game s':>9}"
+        f"{'us/action':>11}{'notifications':>15}{'us/delivery':>13}"
+    )
+    for players in sizes:
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                start = time.perf_counter()
+                rounds, actions, received = await game(
+                    players, mafia_share, random.Random(seed)
+                )
+                elapsed = time.perf_counter() - start
+        print(
+            f"{players:>8}{rounds:>8}{elapsed:>9.2f}"
+            f"{elapsed / actions * 1e6:>11.1f}"
+            f"{received:>15}"
+            f"{elapsed / received * 1e6:>13.2f}"
+        )
+
+
+@click.command()
+@click.option("--players", default="5,50,500", type=str)
+@click.option("--mafia-share", default=0.1, type=float)
+@click.option("--seed", default=0, type=int)
+def main(players: str, mafia_share: float, seed: int) -> None:
+    asyncio.run(run(
+        [int(count) for count in players.split(",")],
+        mafia_share,
+        seed
+    ))
+
+
+if __name__ == "__main__":
+    main()
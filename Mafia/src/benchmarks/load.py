@@ -0,0 +1,252 @@
+import asyncio
+import math
+import random
+import time
+import typing as tp
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import click
+import grpc.aio
+
+import service.service_pb2_grpc as service_pb2_grpc
+import service.service_pb2 as service_pb2
+import channel_args
+from channel_args import ChannelConfig
+from game_client import GameClient, GameState, Player
+
+
+PLAYERS_PER_GAME = 5
+
+
+@dataclass
+class Stats:
+    latencies: dict[str, list[float]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    games: int = 0
+    failed_games: int = 0
+    notifications: int = 0
+
+    async def call(self, name: str, call: tp.Awaitable) -> tp.Any:
+        start = time.perf_counter()
+        try:
+            result = await call
+        except grpc.aio.AioRpcError as e:
+            self.errors[f"{name} {e.code().name}"] += 1
+            self.latencies[name].append(time.perf_counter() - start)
+            raise
+        self.latencies[name].append(time.perf_counter() - start)
+        return result
+
+    def report(self, elapsed: float) -> None:
+        calls = sum(len(v) for v in self.latencies.values())
+        print(f"elapsed:      {elapsed:.3f} s")
+        print(f"games:        {self.games} ({self.games / elapsed:.1f}/s)")
+        print(f"failed games: {self.failed_games}")
+        print(f"rpcs:         {calls} ({calls / elapsed:.0f}/s)")
+        print(
+            f"notifications: {self.notifications} "
+            f"({self.notifications / elapsed:.0f}/s)"
+        )
+        print(
+            f"{'rpc':<26}{'count':>8}{'p50 ms':>10}"
+            f"{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for name in sorted(self.latencies):
+            latencies = sorted(self.latencies[name])
+            print(
+                f"{name:<26}{len(latencies):>8}"
+                f"{_percentile(latencies, 50) * 1000:>10.2f}"
+                f"{_percentile(latencies, 95) * 1000:>10.2f}"
+                f"{_percentile(latencies, 99) * 1000:>10.2f}"
+            )
+        for name, count in sorted(self.errors.items()):
+            print(f"error {name}: {count}")
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    rank = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[rank]
+
+
+class Bot(Player):
+    # Plays at random, as fast as the server lets it.
+    def __init__(self, stats: Stats, rng: random.Random) -> None:
+        self._stats = stats
+        self._rng = rng
+
+    async def kill(self, game: GameState) -> tp.Optional[int]:
+        return self._choose(game)
+
+    async def check(self, game: GameState) -> tp.Optional[int]:
+        return self._choose(game)
+
+    async def vote(self, game: GameState) -> tp.Optional[int]:
+        return self._choose(game)
+
+    def notified(self, game: GameState, notification: tp.Any) -> None:
+        self._stats.notifications += 1
+
+    def _choose(self, game: GameState) -> tp.Optional[int]:
+        others = game.others()
+        return self._rng.choice(others) if others else None
+
+
+async def play_game(
+    stubs: tp.Callable[[], service_pb2_grpc.MafiaStub],
+    stats: Stats,
+    rng: random.Random,
+    compression: tp.Optional[grpc.Compression] = None
+) -> None:
+    stub = stubs()
+    reply = await stats.call(
+        "CreateRoom",
+        stub.CreateRoom(service_pb2.CreateRoomRequest(nickname="bot0"))
+    )
+    room_id = reply.room_id
+    bots = [
+        bot(stub, stats, rng, "bot0", reply.user_id, room_id, compression)
+    ]
+    for i in range(1, PLAYERS_PER_GAME):
+        stub = stubs()
+        reply = await stats.call(
+            "JoinToRoom",
+            stub.JoinToRoom(service_pb2.JoinToRoomRequest(
+                nickname=f"bot{i}",
+                room_id=room_id
+            ))
+        )
+        bots.append(bot(
+            stub, stats, rng, f"bot{i}", reply.user_id, room_id, compression
+        ))
+    await asyncio.gather(*(client.play() for client in bots))
+
+
+def bot(
+    stub: service_pb2_grpc.MafiaStub,
+    stats: Stats,
+    rng: random.Random,
+    nickname: str,
+    user_id: int,
+    room_id: str,
+    compression: tp.Optional[grpc.Compression] = None
+) -> GameClient:
+    return GameClient(
+        stub,
+        Bot(stats, rng),
+        nickname,
+        user_id,
+        room_id,
+        stats.call,
+        compression
+    )
+
+
+async def run(
+    host: str,
+    port: int,
+    games: int,
+    concurrency: int,
+    channels: int,
+    seed: int,
+    channel_config: tp.Optional[ChannelConfig] = None
+) -> Stats:
+    rng = random.Random(seed)
+    if channel_config is None:
+        channel_config = ChannelConfig()
+    compression = channel_args.compression(channel_config.call_compression)
+    opened = [
+        channel_args.insecure_channel(
+            f"{host}:{port}",
+            channel_config,
+            # Without a local subchannel pool all channels to the same
+            # target share one connection.
+            [("grpc.use_local_subchannel_pool", 1)]
+        )
+        for _ in range(channels)
+    ]
+    stubs = [service_pb2_grpc.MafiaStub(channel) for channel in opened]
+    next_stub = 0
+
+    def stub() -> service_pb2_grpc.MafiaStub:
+        nonlocal next_stub
+        next_stub = (next_stub + 1) % len(stubs)
+        return stubs[next_stub]
+
+    stats = Stats()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def game() -> None:
+        async with semaphore:
+            try:
+                await play_game(stub, stats, rng, compression)
+            except grpc.aio.AioRpcError:
+                stats.failed_games += 1
+            else:
+                stats.games += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(game() for _ in range(games)))
+    stats.report(time.perf_counter() - start)
+    for channel in opened:
+        await channel.close()
+    return stats
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", type=str)
+@click.option("--port", default=50051, type=int)
+@click.option("--games", default=1000, type=int)
+@click.option("--concurrency", default=200, type=int)
+@click.option("--channels", default=8, type=int)
+@click.option("--seed", default=0, type=int)
+@click.option("--keepalive-time", default=None, type=float)
+@click.option("--flow-control-window", default=None, type=int)
+@click.option("--max-message-size", default=None, type=int)
+@click.option(
+    "--compression",
+    default=None,
+    type=click.Choice(list(channel_args.COMPRESSION))
+)
+@click.option(
+    "--call-compression",
+    default=None,
+    type=click.Choice(list(channel_args.COMPRESSION)),
+    help="Of the calls of the games, instead of the channel's."
+)
+def main(
+    host: str,
+    port: int,
+    games: int,
+    concurrency: int,
+    channels: int,
+    seed: int,
+    keepalive_time: tp.Optional[float],
+    flow_control_window: tp.Optional[int],
+    max_message_size: tp.Optional[int],
+    compression: tp.Optional[str],
+    call_compression: tp.Optional[str],
+) -> None:
+    asyncio.run(run(
+        host,
+        port,
+        games,
+        concurrency,
+        channels,
+        seed,
+        ChannelConfig(
+            keepalive_time=keepalive_time,
+            flow_control_window=flow_control_window,
+            max_message_size=max_message_size,
+            compression=compression,
+            call_compression=call_compression
+        )
+    ))
+
+
+if __name__ == "__main__":
+    main()
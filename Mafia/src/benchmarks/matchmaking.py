@@ -0,0 +1,88 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+import typing as tp
+
+import click
+
+import service.service_pb2 as service_pb2
+from server import ROOM_SIZE, Mafia, Phase
+
+
+def scan(mafia: Mafia) -> tp.Optional[str]:
+    # What matching costs without the index: look at every room.
+    best = None
+    best_free = ROOM_SIZE
+    for room_id, state in mafia._rooms.items():
+        free = ROOM_SIZE - state.host.users_number
+        if state.phase == Phase.Lobby and 0 < free < best_free:
+            best, best_free = room_id, free
+    return best
+
+
+async def waiting_rooms(rooms: int, seed: int) -> Mafia:
+    rng = random.Random(seed)
+    mafia = Mafia()
+    for _ in range(rooms):
+        reply = await mafia.CreateRoom(
+            service_pb2.CreateRoomRequest(nickname="player"), None
+        )
+        for _ in range(rng.randrange(ROOM_SIZE - 1)):
+            await mafia.JoinToRoom(service_pb2.JoinToRoomRequest(
+                nickname="player",
+                room_id=reply.room_id
+            ), None)
+    return mafia
+
+
+async def indexed(mafia: Mafia, players: int) -> float:
+    start = time.perf_counter()
+    for _ in range(players):
+        await mafia.FindGame(
+            service_pb2.FindGameRequest(nickname="player"), None
+        )
+    return time.perf_counter() - start
+
+
+async def scanned(mafia: Mafia, players: int) -> float:
+    start = time.perf_counter()
+    for _ in range(players):
+        room_id = scan(mafia)
+        if room_id is None:
+            await mafia.CreateRoom(
+                service_pb2.CreateRoomRequest(nickname="player"), None
+            )
+        else:
+            await mafia.JoinToRoom(service_pb2.JoinToRoomRequest(
+                nickname="player",
+                room_id=room_id
+            ), None)
+    return time.perf_counter() - start
+
+
+async def run(rooms: tp.List[int], players: int, seed: int) -> None:
+    print(f"{'waiting rooms':>14}{'indexed us':>12}{'scan us':>12}")
+    for count in rooms:
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                fast = await indexed(await waiting_rooms(count, seed), players)
+                slow = await scanned(await waiting_rooms(count, seed), players)
+        print(
+            f"{count:>14}"
+            f"{fast / players * 1e6:>12.1f}"
+            f"{slow / players * 1e6:>12.1f}"
+        )
+
+
+@click.command()
+@click.option("--rooms", default="1000,10000,50000", type=str)
+@click.option("--players", default=200, type=int)
+@click.option("--seed", default=0, type=int)
+def main(rooms: str, players: int, seed: int) -> None:
+    asyncio.run(run([int(count) for count in rooms.split(",")], players, seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import random
+import time
+import tracemalloc
+
+import click
+
+from mafia_host import PhaseBarrier, PhaseBarrierClosed
+
+
+async def player(
+    barriers: list[PhaseBarrier],
+    user_id: int,
+    phases: int,
+    cancel_rate: float,
+    rng: random.Random
+) -> int:
+    passed = 0
+    for phase in range(phases):
+        barrier = barriers[phase % len(barriers)]
+        while rng.random() < cancel_rate:
+            # Give up on the phase and come back, as a client that lost
+            # its connection would.
+            generation = barrier.generation
+            waiter = asyncio.ensure_future(barrier.wait(user_id))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                pass
+            if barrier.generation != generation:
+                # The barrier tripped before the cancellation was
+                # delivered, so the arrival still counts.
+                break
+        else:
+            try:
+                await barrier.wait(user_id)
+            except PhaseBarrierClosed:
+                return passed
+        passed += 1
+    return passed
+
+
+async def room(
+    size: int,
+    phases: int,
+    cancel_rate: float,
+    leave_rate: float,
+    seed: int
+) -> int:
+    rng = random.Random(seed)
+    barriers = [PhaseBarrier(size), PhaseBarrier(size)]
+    leaver = rng.randrange(size) if rng.random() < leave_rate else None
+    players = [
+        asyncio.ensure_future(player(
+            barriers,
+            user_id,
+            rng.randrange(phases) if user_id == leaver else phases,
+            cancel_rate,
+            rng
+        ))
+        for user_id in range(size)
+    ]
+    if leaver is not None:
+        # The player leaves in the middle of the game while the others
+        # are waiting for it: the party shrinks.
+        await players[leaver]
+        for barrier in barriers:
+            barrier.withdraw(leaver)
+            barrier.parties = size - 1
+    passed = sum(await asyncio.gather(*players))
+    for barrier in barriers:
+        barrier.close()
+    return passed
+
+
+async def run(
+    rooms: int,
+    size: int,
+    phases: int,
+    cancel_rate: float,
+    leave_rate: float,
+    timeout: float,
+    trace_memory: bool
+) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    tasks = [
+        asyncio.ensure_future(
+            room(size, phases, cancel_rate, leave_rate, seed)
+        )
+        for seed in range(rooms)
+    ]
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    for task in pending:
+        task.cancel()
+    passed = sum(task.result() for task in done)
+    print(f"rooms:          {rooms} x {size} players, {phases} phases")
+    print(f"elapsed:        {elapsed:.3f} s")
+    print(f"phase passes:   {passed} ({passed / elapsed:.0f}/s)")
+    print(f"room phases/s:  {passed / size / elapsed:.0f}")
+    print(f"stuck rooms:    {len(pending)}")
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak memory:    {peak / 2 ** 20:.1f} MiB")
+
+
+@click.command()
+@click.option("--rooms", default=5000, type=int)
+@click.option("--size", default=5, type=int)
+@click.option("--phases", default=20, type=int)
+@click.option("--cancel-rate", default=0.05, type=float)
+@click.option("--leave-rate", default=0.1, type=float)
+@click.option("--timeout", default=120.0, type=float)
+@click.option("--trace-memory", is_flag=True)
+def main(
+    rooms: int,
+    size: int,
+    phases: int,
+    cancel_rate: float,
+    leave_rate: float,
+    timeout: float,
+    trace_memory: bool,
+) -> None:
+    asyncio.run(run(
+        rooms, size, phases, cancel_rate, leave_rate, timeout, trace_memory
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+import random
+import time
+import tracemalloc
+import typing as tp
+
+import click
+
+from timer_wheel import TimerWheel
+
+
+Schedule = tp.Callable[..., tp.Any]
+
+
+def schedulers(resolution: float) -> tp.Dict[str, tp.Callable[[], tp.Tuple]]:
+    def loop() -> tp.Tuple[Schedule, tp.Callable]:
+        return asyncio.get_running_loop().call_later, lambda: None
+
+    def wheel() -> tp.Tuple[Schedule, tp.Callable]:
+        timers = TimerWheel(resolution)
+        return timers.call_later, timers.close
+
+    return {"call_later": loop, "wheel": wheel}
+
+
+async def rearm(
+    make: tp.Callable[[], tp.Tuple],
+    rooms: int,
+    phases: int,
+    timeout: float,
+    trace_memory: bool
+) -> tp.Tuple[float, float]:
+    # Every phase change cancels the deadline of a room and sets a new
+    # one, long before any of them is due.
+    schedule, close = make()
+    if trace_memory:
+        tracemalloc.start()
+    deadlines = [schedule(timeout, _expired) for _ in range(rooms)]
+    start = time.perf_counter()
+    for _ in range(phases):
+        for room in range(rooms):
+            deadlines[room].cancel()
+            deadlines[room] = schedule(timeout, _expired)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    for deadline in deadlines:
+        deadline.cancel()
+    await _maybe_await(close())
+    return elapsed, peak
+
+
+async def expire(
+    make: tp.Callable[[], tp.Tuple],
+    rooms: int,
+    spread: float,
+    seed: int
+) -> tp.Tuple[float, float]:
+    # The deadlines of all rooms come due within the spread: how late do
+    # they fire and how long does the loop stay blocked meanwhile.
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    schedule, close = make()
+    lateness: tp.List[float] = []
+    done = loop.create_future()
+
+    def expired(due: float) -> None:
+        lateness.append(loop.time() - due)
+        if len(lateness) == rooms:
+            done.set_result(None)
+
+    for _ in range(rooms):
+        delay = rng.random() * spread
+        schedule(delay, expired, loop.time() + delay)
+    stall = 0.0
+    while not done.done():
+        before = loop.time()
+        await asyncio.sleep(0)
+        stall = max(stall, loop.time() - before)
+    await _maybe_await(close())
+    lateness.sort()
+    return lateness[len(lateness) * 99 // 100], stall
+
+
+def _expired() -> None:
+    pass
+
+
+async def _maybe_await(result: tp.Any) -> None:
+    if asyncio.iscoroutine(result):
+        await result
+
+
+async def run(
+    rooms: tp.List[int],
+    phases: int,
+    spread: float,
+    resolution: float,
+    seed: int
+) -> None:
+    print(
+        f"{'rooms':>8}{'scheduler':>12}{'us/rearm':>10}{'peak MiB':>10}"
+        f"{'p99 late ms':>13}{'max stall ms':>14}"
+    )
+    for count in rooms:
+        for name, make in schedulers(resolution).items():
+            elapsed, _ = await rearm(make, count, phases, 3600.0, False)
+            _, peak = await rearm(make, count, 1, 3600.0, True)
+            late, stall = await expire(make, count, spread, seed)
+            print(
+                f"{count:>8}{name:>12}"
+                f"{elapsed / (count * phases) * 1e6:>10.2f}"
+                f"{peak / 2 ** 20:>10.1f}"
+                f"{late * 1e3:>13.1f}"
+                f"{stall * 1e3:>14.1f}"
+            )
+
+
+@click.command()
+@click.option("--rooms", default="1000,10000,100000", type=str)
+@click.option("--phases", default=20, type=int)
+@click.option("--spread", default=5.0, type=float)
+@click.option("--resolution", default=0.1, type=float)
+@click.option("--seed", default=0, type=int)
+def main(
+    rooms: str,
+    phases: int,
+    spread: float,
+    resolution: float,
+    seed: int
+) -> None:
+    asyncio.run(run(
+        [int(count) for count in rooms.split(",")],
+        phases,
+        spread,
+        resolution,
+        seed
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import importlib.util
+import os
+import subprocess
+import sys
+import typing as tp
+
+import click
+import grpc.aio
+
+from benchmarks.load import Stats, _percentile, run as run_load
+from channel_args import ChannelConfig
+
+
+# Name, server flags and the load generator's channel settings.
+PROFILES: tp.Dict[str, tp.Tuple[tp.List[str], ChannelConfig]] = {
+    "default": ([], ChannelConfig()),
+    "uvloop": (["--uvloop"], ChannelConfig()),
+    "window-64k": (
+        ["--flow-control-window", str(64 * 1024)],
+        ChannelConfig(flow_control_window=64 * 1024)
+    ),
+    "window-4m": (
+        ["--flow-control-window", str(4 * 1024 * 1024)],
+        ChannelConfig(flow_control_window=4 * 1024 * 1024)
+    ),
+    # Every player holds its subscription and a phase call open at once:
+    # below that, calls queue behind players waiting on them at a barrier
+    # and the games only move on at the phase deadlines.
+    "streams-512": (["--max-concurrent-streams", "512"], ChannelConfig()),
+    "rpcs-2000": (["--maximum-concurrent-rpcs", "2000"], ChannelConfig()),
+    "no-keepalive-pings": (["--keepalive-time", "3600"], ChannelConfig()),
+    "gzip": (["--compression", "gzip"], ChannelConfig(compression="gzip")),
+    # Only the notifications, the phase calls stay uncompressed.
+    "gzip-streams": (["--stream-compression", "gzip"], ChannelConfig()),
+}
+
+
+async def wait_for_server(target: str, timeout: float) -> None:
+    async with grpc.aio.insecure_channel(target) as channel:
+        await asyncio.wait_for(channel.channel_ready(), timeout)
+
+
+async def measure(
+    port: int,
+    flags: tp.List[str],
+    channel_config: ChannelConfig,
+    games: int,
+    concurrency: int,
+    channels: int,
+    seed: int
+) -> tp.Tuple[Stats, float]:
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port)] + flags,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        await wait_for_server(f"127.0.0.1:{port}", 30.0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                stats = await run_load(
+                    "127.0.0.1",
+                    port,
+                    games,
+                    concurrency,
+                    channels,
+                    seed,
+                    channel_config
+                )
+        return stats, loop.time() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(
+    profiles: tp.List[str],
+    port: int,
+    games: int,
+    concurrency: int,
+    channels: int,
+    seed: int
+) -> None:
+    print(
+        f"{'profile':<20}{'games/s':>9}{'rpcs/s':>9}{'p50 ms':>9}"
+        f"{'p99 ms':>9}{'failed':>8}{'errors':>8}"
+    )
+    for name in profiles:
+        flags, channel_config = PROFILES[name]
+        if "--uvloop" in flags and importlib.util.find_spec("uvloop") is None:
+            print(f"{name:<20}uvloop is not installed")
+            continue
+        stats, elapsed = await measure(
+            port, flags, channel_config, games, concurrency, channels, seed
+        )
+        latencies = sorted(
+            latency
+            for values in stats.latencies.values()
+            for latency in values
+        )
+        print(
+            f"{name:<20}"
+            f"{stats.games / elapsed:>9.1f}"
+            f"{len(latencies) / elapsed:>9.0f}"
+            f"{_percentile(latencies, 50) * 1000:>9.1f}"
+            f"{_percentile(latencies, 99) * 1000:>9.1f}"
+            f"{stats.failed_games:>8}"
+            f"{sum(stats.errors.values()):>8}"
+        )
+
+
+@click.command()
+@click.option("--profiles", default=",".join(PROFILES), type=str)
+@click.option("--port", default=50151, type=int)
+@click.option("--games", default=1000, type=int)
+@click.option("--concurrency", default=200, type=int)
+@click.option("--channels", default=8, type=int)
+@click.option("--seed", default=0, type=int)
+def main(
+    profiles: str,
+    port: int,
+    games: int,
+    concurrency: int,
+    channels: int,
+    seed: int
+) -> None:
+    names = profiles.split(",")
+    for name in names:
+        if name not in PROFILES:
+            raise click.BadParameter(f"Unknown profile {name}")
+    asyncio.run(run(names, port, games, concurrency, channels, seed))
+
+
+if __name__ == "__main__":
+    main()
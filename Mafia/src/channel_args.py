@@ -0,0 +1,82 @@
+import typing as tp
+from dataclasses import dataclass
+
+import grpc
+
+
+Options = tp.List[tp.Tuple[str, tp.Any]]
+
+COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+@dataclass
+class ChannelConfig:
+    keepalive_time: tp.Optional[float] = None
+    keepalive_timeout: float = 20.0
+    flow_control_window: tp.Optional[int] = None
+    max_message_size: tp.Optional[int] = None
+    # What the calls of the channel use unless they ask for another.
+    compression: tp.Optional[str] = None
+    # What the calls of a game ask for instead, per call.
+    call_compression: tp.Optional[str] = None
+
+
+def insecure_channel(
+    target: str,
+    config: ChannelConfig,
+    options: tp.Sequence[tp.Tuple[str, tp.Any]] = ()
+) -> grpc.aio.Channel:
+    return grpc.aio.insecure_channel(
+        target,
+        options=(
+            list(options) +
+            keepalive(config.keepalive_time, config.keepalive_timeout) +
+            flow_control(config.flow_control_window) +
+            message_size(config.max_message_size)
+        ),
+        compression=compression(config.compression)
+    )
+
+
+def keepalive(time: tp.Optional[float], timeout: float) -> Options:
+    if time is None:
+        return []
+    return [
+        ("grpc.keepalive_time_ms", ms(time)),
+        ("grpc.keepalive_timeout_ms", ms(timeout)),
+        # Players may wait on a phase without any data on the wire.
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+
+def flow_control(window: tp.Optional[int]) -> Options:
+    # By default the window follows the bandwidth-delay product probed
+    # on the connection; a fixed window turns the probing off.
+    if window is None:
+        return []
+    return [
+        ("grpc.http2.lookahead_bytes", window),
+        ("grpc.http2.bdp_probe", 0),
+    ]
+
+
+def message_size(limit: tp.Optional[int]) -> Options:
+    if limit is None:
+        return []
+    return [
+        ("grpc.max_send_message_length", limit),
+        ("grpc.max_receive_message_length", limit),
+    ]
+
+
+def compression(name: tp.Optional[str]) -> tp.Optional[grpc.Compression]:
+    return None if name is None else COMPRESSION[name]
+
+
+def ms(seconds: float) -> int:
+    return int(seconds * 1000)
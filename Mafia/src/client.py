@@ -6,10 +6,112 @@ import logging
 from dataclasses import dataclass, field
 
 from simple_term_menu import TerminalMenu
-from typing import Dict
+from typing import Optional, Union
 
 import service.service_pb2_grpc as service_pb2_grpc
 import service.service_pb2 as service_pb2
+import channel_args
+from channel_args import ChannelConfig
+from game_client import GameClient, GameState, LeaveGame, Player
+
+
+ROOMS_PER_PAGE = 10
+ROOM_SIZES = [5, 10, 20, 50, 100]
+WINNERS = {
+    service_pb2.CIVILIANS: "Civilians win",
+    service_pb2.MAFIA: "Mafia wins",
+}
+DEADLINES = {
+    "Lobby": "Time to get ready is up",
+    "Night": "Night is over: time is up",
+    "Day": "Time to vote is up",
+}
+
+
+class TerminalPlayer(Player):
+    async def ready(self, game: GameState) -> None:
+        terminal_menu = TerminalMenu([
+            "[r] Ready",
+            "[e] Exit"
+        ], title=f"Nickname: {game.nickname}. Room ID: {game.room_id}")
+        if terminal_menu.show() != 0:
+            raise LeaveGame()
+
+    async def kill(self, game: GameState) -> Optional[int]:
+        return self._choose(game, "Role: mafia")
+
+    async def check(self, game: GameState) -> Optional[int]:
+        return self._choose(game, "Role: officer")
+
+    async def vote(self, game: GameState) -> Optional[int]:
+        return self._choose(game, "Day")
+
+    async def rest(self, game: GameState) -> None:
+        terminal_menu = TerminalMenu(
+            ["[c] Continue", "[e] Exit"],
+            title=f"Nickname: {game.nickname}. "
+            f"Room ID: {game.room_id}. Role: {game.role}"
+        )
+        if terminal_menu.show() != 0:
+            raise LeaveGame()
+
+    def phase_started(self, game: GameState) -> None:
+        if game.phase == "Night":
+            print("Night", flush=True)
+            return
+        if game.day == 1:
+            print(f"Your role: {game.role}", flush=True)
+        print(f"Day number №{game.day}")
+        print("Alive people:")
+        for id, nickname in game.players.items():
+            print(f"- {nickname}\\{id}", flush=True)
+
+    def notified(
+        self,
+        game: GameState,
+        notification: service_pb2.SubscribeOnNotificationsReply
+    ) -> None:
+        payload = notification.WhichOneof("payload")
+        if payload == "join":
+            print(f"Player {notification.join.nickname} is joined", flush=True)
+        elif payload == "leave":
+            if notification.leave.user_id == game.user_id:
+                print("You are out of the room", flush=True)
+            else:
+                print(
+                    f"Player {notification.leave.nickname} is disconnected",
+                    flush=True
+                )
+        elif payload == "kill":
+            print(f"Player {notification.kill.nickname} is killed", flush=True)
+        elif payload == "start_the_game":
+            print("Game is starting", flush=True)
+        elif payload == "deadline":
+            print(DEADLINES[notification.deadline.phase], flush=True)
+        elif payload == "end":
+            print(WINNERS[notification.end.winner], flush=True)
+
+    def checked(self, game: GameState, user_id: int, is_mafia: bool) -> None:
+        nickname = game.players.get(user_id, "")
+        if is_mafia:
+            print(f"{nickname}|{user_id} is mafia", flush=True)
+        else:
+            print(f"{nickname}|{user_id} is not mafia", flush=True)
+
+    def failed(self, game: GameState, details: str) -> None:
+        print(details, flush=True)
+
+    def _choose(self, game: GameState, title: str) -> Optional[int]:
+        others = game.others()
+        terminal_menu = TerminalMenu(
+            [f"{game.players[id]}\\{id}" for id in others] + ["[e] Exit"],
+            title=f"Nickname: {game.nickname}. "
+            f"Room ID: {game.room_id}. {title}"
+        )
+        answer = terminal_menu.show()
+        if answer is None or answer == len(others):
+            raise LeaveGame()
+        return others[answer]
 
 
 @dataclass
@@ -18,227 +120,61 @@ class ClientInRoom:
     _channel: grpc.aio.Channel
     _user_id: int
     _room_id: str
-    _players: Dict[int, str] = field(default_factory=dict)
-    _exit_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
-    _killed = False
-    _end = False
-
-    def __post_init__(self) -> None:
-        self._stub = service_pb2_grpc.MafiaStub(self._channel)
 
     async def process(self) -> None:
-        await asyncio.gather(
-            self._subscribe_on_notification(),
-            self._process()
+        client = GameClient(
+            service_pb2_grpc.MafiaStub(self._channel),
+            TerminalPlayer(),
+            self._nickname,
+            self._user_id,
+            self._room_id
         )
+        try:
+            await client.play()
+            # The game is over: free the seat for the room to be deleted.
+            await client.leave()
+        except grpc.aio.AioRpcError as e:
+            print(e.details(), flush=True)
+        await self._channel.close()
 
-    async def _subscribe_on_notification(self) -> None:
-        request = service_pb2.SubscribeOnNotificationsRequest(
-            user_id=self._user_id,
-            room_id=self._room_id
-        )
-        stub = self._stub
-        async for notification in stub.SubscribeOnNotifications(request):
-            if notification.type == "Join":
-                nickname, user_id = notification.data.split(" ")
-                user_id = int(user_id)
-                print(f"Player {nickname} is joined", flush=True)
-                self._players[user_id] = nickname
-            elif notification.type == "Leave":
-                nickname, user_id = notification.data.split(" ")
-                user_id = int(user_id)
-                print(f"Player {nickname} is disconnected", flush=True)
-                self._players.pop(user_id, None)
-                if not self._end:
-                    self._killed = True
-            elif notification.type == "Kill":
-                nickname, user_id = notification.data.split(" ")
-                user_id = int(user_id)
-                print(f"Player {nickname} is killed", flush=True)
-                if user_id == self._user_id:
-                    self._role = "Ghost"
-                self._players.pop(user_id, None)
-                if not self._end:
-                    self._killed = True
-            elif notification.type == "StartTheGame":
-                print("Game is starting", flush=True)
-            elif notification.type == "End":
-                self._end = True
-                data = notification.data
-                print(data, flush=True)
-                await self._exit()
 
-    async def _process(self) -> None:
-        terminal_menu = TerminalMenu([
-            "[r] Ready",
-            "[e] Exit"
-        ], title=f"Nickname: {self._nickname}. Room ID: {self._room_id}")
-        answer = terminal_menu.show()
-        if answer == 0:
-            reply = await self._stub.ReadyToStart(
-                service_pb2.ReadyToStartRequest(
-                    user_id=self._user_id,
-                    room_id=self._room_id
-                )
-            )
-            self._role = reply.role
-        else:
-            await self._exit()
-        for _ in range(3):
-            await asyncio.sleep(2)
-        print(f"Your role: {self._role}", flush=True)
-        num_day = 1
-        print(f"Day number №{num_day}")
-        print("Alive people:")
-        for id, nickname in self._players.items():
-            print(f"- {nickname}\\{id}", flush=True)
-        num_day += 1
-        while True:
-            print("Night", flush=True)
-            self._killed = False
-            if self._role == "Mafia":
-                chs = [
-                    f"{nickname}\\{id}"
-                    for id, nickname in self._players.items()
-                    if id != self._user_id
-                ]
-                terminal_menu = TerminalMenu(
-                    chs + ["[e] Exit"],
-                    title=f"Nickname: {self._nickname}. "
-                    f"Room ID: {self._room_id}. Role: mafia"
-                )
-                answer = int(terminal_menu.show())
-                if answer == len(chs):
-                    await self._stub.Night(service_pb2.NightRequest(
-                        user_id=self._user_id,
-                        room_id=self._room_id
-                    ))
-                    await self._exit()
-                _, id = chs[answer].split("\\")
-                try:
-                    await self._stub.Kill(service_pb2.KillRequest(
-                        room_id=self._room_id,
-                        user_id=self._user_id,
-                        user_id_to_kill=int(id)
-                    ))
-                except Exception:
-                    pass
-            elif self._role == "Officer":
-                chs = [
-                    f"{nickname}\\{id}"
-                    for id, nickname in self._players.items()
-                    if id != self._user_id
-                ]
-                terminal_menu = TerminalMenu(
-                    chs + ["[e] Exit"],
-                    title=f"Nickname: {self._nickname}. "
-                    f"Room ID: {self._room_id}. Role: officer"
-                )
-                answer = int(terminal_menu.show())
-                if answer == len(chs):
-                    await self._stub.Night(service_pb2.NightRequest(
-                        user_id=self._user_id,
-                        room_id=self._room_id
-                    ))
-                    await self._exit()
-                nickname, id = chs[answer].split("\\")
-                try:
-                    reply = await self._stub.IsKiller(
-                        service_pb2.IsKillerRequest(
-                            room_id=self._room_id,
-                            user_id=self._user_id,
-                            user_id_to_check=int(id)
-                        )
-                    )
-                except Exception:
-                    pass
-                else:
-                    if reply.answer:
-                        print(f"{nickname}|{id} is mafia", flush=True)
-                    else:
-                        print(f"{nickname}|{id} is not mafia", flush=True)
-            else:
-                terminal_menu = TerminalMenu(
-                    ["[c] Continue", "[e] Exit"],
-                    title=f"Nickname: {self._nickname}. "
-                    f"Room ID: {self._room_id}. Role: {self._role}"
+@dataclass
+class ClientSpectator:
+    _channel: grpc.aio.Channel
+    _room_id: str
+
+    def __post_init__(self) -> None:
+        self._stub = service_pb2_grpc.MafiaStub(self._channel)
+
+    async def process(self) -> None:
+        request = service_pb2.SpectateRequest(room_id=self._room_id)
+        async for notification in self._stub.Spectate(request):
+            payload = notification.WhichOneof("payload")
+            if payload == "join":
+                print(
+                    f"Player {notification.join.nickname} is joined",
+                    flush=True
                 )
-                answer = int(terminal_menu.show())
-                if answer == 1:
-                    await self._stub.Night(service_pb2.NightRequest(
-                        user_id=self._user_id,
-                        room_id=self._room_id
-                    ))
-                    await self._exit()
-            await self._stub.Night(service_pb2.NightRequest(
-                user_id=self._user_id,
-                room_id=self._room_id
-            ))
-            while not self._killed:
-                await asyncio.sleep(1)
-            await asyncio.sleep(1)
-            print(f"Day number №{num_day}")
-            print("Alive people:")
-            for id, nickname in self._players.items():
-                print(f"- {nickname}\\{id}", flush=True)
-            num_day += 1
-            self._killed = False
-            if self._role == "Ghost":
-                terminal_menu = TerminalMenu(
-                    ["[c] Continue", "[e] Exit"],
-                    title=f"Nickname: {self._nickname}. "
-                    f"Room ID: {self._room_id}. Role: {self._role}"
+            elif payload == "leave":
+                print(
+                    f"Player {notification.leave.nickname} is disconnected",
+                    flush=True
                 )
-                answer = int(terminal_menu.show())
-                if answer == 1:
-                    await self._exit()
-                try:
-                    reply = await self._stub.Day(service_pb2.DayRequest(
-                        room_id=self._room_id,
-                        user_id=self._user_id,
-                        user_id_to_kill=self._user_id
-                    ))
-                except grpc.aio.AioRpcError as e:
-                    print(e.details, flush=True)
-            else:
-                chs = [
-                    f"{nickname}\\{id}"
-                    for id, nickname in self._players.items()
-                    if id != self._user_id
-                ]
-                terminal_menu = TerminalMenu(
-                    chs + ["[e] Exit"],
-                    title=f"Nickname: {self._nickname}. "
-                    f"Room ID: {self._room_id}. Day"
+            elif payload == "kill":
+                print(
+                    f"Player {notification.kill.nickname} is killed",
+                    flush=True
                 )
-                answer = int(terminal_menu.show())
-                if answer == len(chs):
-                    await self._exit()
-                _, id = chs[answer].split("\\")
-                try:
-                    reply = await self._stub.Day(service_pb2.DayRequest(
-                        room_id=self._room_id,
-                        user_id=self._user_id,
-                        user_id_to_kill=int(id)
-                    ))
-                except grpc.aio.AioRpcError as e:
-                    print(e.details, flush=True)
-
-            if reply.answer:
-                await asyncio.sleep(1)
-                while not self._killed:
-                    await asyncio.sleep(1)
-            else:
-                for _ in range(3):
-                    await asyncio.sleep(3)
-
-    async def _exit(self) -> None:
-        await self._stub.LeaveRoom(service_pb2.LeaveRoomRequest(
-            user_id=self._user_id,
-            room_id=self._room_id
-        ))
+            elif payload == "vote":
+                vote = notification.vote
+                print(f"Votes for {vote.nickname}: {vote.votes}", flush=True)
+            elif payload == "start_the_game":
+                print("Game is starting", flush=True)
+            elif payload == "deadline":
+                print(DEADLINES[notification.deadline.phase], flush=True)
+            elif payload == "end":
+                print(WINNERS[notification.end.winner], flush=True)
         await self._channel.close()
-        exit(0)
 
 
 @dataclass
@@ -249,11 +185,13 @@ class ConnectedClient:
     def __post_init__(self) -> None:
         self._stub = service_pb2_grpc.MafiaStub(self._channel)
 
-    async def room_process(self) -> ClientInRoom:
+    async def room_process(self) -> Union[ClientInRoom, ClientSpectator]:
         while True:
             terminal_menu = TerminalMenu([
                 "[c] Create a room",
+                "[f] Find a game",
                 "[j] Join to the room",
+                "[s] Spectate a room",
                 "[e] Exit"
             ], title=f"Nickname: {self._nickname}")
             answer = terminal_menu.show()
@@ -261,10 +199,12 @@ class ConnectedClient:
                 room = await self._create_room()
                 break
             elif answer == 1:
-                room_id = input("Write room key: ")
-                print("\033[A" +
-                      (len(room_id) + len("Write room key: ")) * " " +
-                      "\033[A")
+                room = await self._find_game()
+                break
+            elif answer == 2:
+                room_id = await self._choose_room()
+                if room_id is None:
+                    continue
                 try:
                     room = await self._join_to_the_room(room_id)
                 except grpc.aio.AioRpcError as e:
@@ -272,14 +212,68 @@ class ConnectedClient:
                     print(e.details)
                     continue
                 break
+            elif answer == 3:
+                room_id = input("Write room key: ")
+                room = ClientSpectator(self._channel, room_id)
+                break
             else:
                 await self._exit()
 
         return room
 
+    async def _choose_room(self) -> Optional[str]:
+        page_token = ""
+        while True:
+            reply = await self._stub.ListOpenRooms(
+                service_pb2.ListOpenRoomsRequest(
+                    page_size=ROOMS_PER_PAGE,
+                    page_token=page_token
+                )
+            )
+            rooms = [
+                f"{room.room_id} ({room.players}/{room.capacity})"
+                for room in reply.rooms
+            ]
+            more = ["[n] Next page"] if reply.next_page_token else []
+            terminal_menu = TerminalMenu(
+                rooms + more + ["[w] Write room key", "[b] Back"],
+                title=f"Nickname: {self._nickname}. Open rooms"
+            )
+            answer = terminal_menu.show()
+            if answer is None or answer == len(rooms) + len(more) + 1:
+                return None
+            if answer < len(rooms):
+                return reply.rooms[answer].room_id
+            if more and answer == len(rooms):
+                page_token = reply.next_page_token
+                continue
+            room_id = input("Write room key: ")
+            print("\033[A" +
+                  (len(room_id) + len("Write room key: ")) * " " +
+                  "\033[A")
+            return room_id
+
+    async def _find_game(self) -> ClientInRoom:
+        reply = await self._stub.FindGame(service_pb2.FindGameRequest(
+            nickname=self._nickname
+        ))
+        print(f"Join the room with id: {reply.room_id}", flush=True)
+        return ClientInRoom(
+            self._nickname,
+            self._channel,
+            reply.user_id,
+            reply.room_id
+        )
+
     async def _create_room(self) -> ClientInRoom:
+        terminal_menu = TerminalMenu(
+            [f"{size} players" for size in ROOM_SIZES],
+            title=f"Nickname: {self._nickname}. Room size"
+        )
+        answer = terminal_menu.show()
         reply = await self._stub.CreateRoom(service_pb2.CreateRoomRequest(
-            nickname=self._nickname
+            nickname=self._nickname,
+            capacity=ROOM_SIZES[answer or 0]
         ))
         print(f"Created the room with id: {reply.room_id}", flush=True)
         return ClientInRoom(
@@ -312,9 +306,12 @@ class Client:
     _host: str
     _port: int
     _nickname: str
+    _channel_config: ChannelConfig = field(default_factory=ChannelConfig)
 
     def connect(self) -> ConnectedClient:
-        channel = grpc.aio.insecure_channel(f"{self._host}:{self._port}")
+        channel = channel_args.insecure_channel(
+            f"{self._host}:{self._port}", self._channel_config
+        )
         return ConnectedClient(self._nickname, channel)
 
 
@@ -322,9 +319,10 @@ async def run(
     host: str,
     port: int,
     nickname: str,
+    channel_config: ChannelConfig
 ) -> None:
     try:
-        connect = Client(host, port, nickname).connect()
+        connect = Client(host, port, nickname, channel_config).connect()
         room = await connect.room_process()
         await room.process()
     except SystemExit:
@@ -335,12 +333,26 @@ async def run(
 @click.option("--host", default="0.0.0.0", type=str)
 @click.option("--port", default=50051, type=int)
 @click.option("--nickname", type=str, prompt=True)
+@click.option("--keepalive-time", default=None, type=float)
+@click.option("--max-message-size", default=None, type=int)
+@click.option(
+    "--compression",
+    default=None,
+    type=click.Choice(list(channel_args.COMPRESSION))
+)
 def main(
     host: str,
     port: int,
     nickname: str,
+    keepalive_time: Optional[float],
+    max_message_size: Optional[int],
+    compression: Optional[str],
 ) -> None:
-    asyncio.run(run(host, port, nickname))
+    asyncio.run(run(host, port, nickname, ChannelConfig(
+        keepalive_time=keepalive_time,
+        max_message_size=max_message_size,
+        compression=compression
+    )))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,321 @@
+import asyncio
+import os
+import struct
+import typing as tp
+import zlib
+from enum import Enum
+
+from mafia_host import HostEvent, Journal, PlayerRoles, Winner
+
+
+class EventLogError(RuntimeError):
+    pass
+
+
+class RoomEvent(Enum):
+    Created = "Created"
+    Deleted = "Deleted"
+    Phase = "Phase"
+
+
+Event = tp.Union[HostEvent, RoomEvent]
+Record = tp.Tuple[str, Event, tp.Tuple]
+
+
+_SNAPSHOT = "snapshot"
+_SNAPSHOT_MAGIC = b"MAFIASNP"
+_FRAME = struct.Struct("<II")
+_HEADER = struct.Struct("<B16s")
+_ID = struct.Struct("<Q")
+_IDS = struct.Struct("<QQ")
+_COUNT = struct.Struct("<H")
+_SETTINGS = struct.Struct("<III")
+_ROLE = struct.Struct("<QB")
+_CODE = struct.Struct("<B")
+_ROLES = list(PlayerRoles)
+_WINNERS = list(Winner)
+MAX_STR_LENGTH = (1 << 8 * _COUNT.size) - 1
+
+
+def _encode_str(value: str) -> bytes:
+    encoded = value.encode()
+    if len(encoded) > MAX_STR_LENGTH:
+        raise EventLogError(
+            f"Strings are limited to {MAX_STR_LENGTH} bytes in the log"
+        )
+    return _COUNT.pack(len(encoded)) + encoded
+
+
+def _decode_str(body: bytes, offset: int = 0) -> str:
+    (length,) = _COUNT.unpack_from(body, offset)
+    start = offset + _COUNT.size
+    return body[start:start + length].decode()
+
+
+def _encode_roles(roles: tp.Dict[int, PlayerRoles]) -> bytes:
+    return _COUNT.pack(len(roles)) + b"".join(
+        _ROLE.pack(id, _ROLES.index(role)) for id, role in roles.items()
+    )
+
+
+def _decode_roles(body: bytes) -> tp.Dict[int, PlayerRoles]:
+    (count,) = _COUNT.unpack_from(body)
+    roles = {}
+    for i in range(count):
+        id, role = _ROLE.unpack_from(body, _COUNT.size + i * _ROLE.size)
+        roles[id] = _ROLES[role]
+    return roles
+
+
+_Codec = tp.Tuple[
+    int,
+    tp.Callable[[tp.Tuple], bytes],
+    tp.Callable[[bytes], tp.Tuple]
+]
+
+
+def _empty() -> tp.Tuple[tp.Callable, tp.Callable]:
+    return lambda args: b"", lambda body: ()
+
+
+def _user() -> tp.Tuple[tp.Callable, tp.Callable]:
+    return lambda args: _ID.pack(*args), _ID.unpack
+
+
+_CODECS: tp.Dict[Event, _Codec] = {
+    RoomEvent.Created: (
+        1,
+        lambda args: _SETTINGS.pack(*args),
+        lambda body: _SETTINGS.unpack(body) if body else ()
+    ),
+    RoomEvent.Deleted: (2, *_empty()),
+    RoomEvent.Phase: (
+        3,
+        lambda args: _encode_str(args[0]),
+        lambda body: (_decode_str(body),)
+    ),
+    HostEvent.Join: (
+        4,
+        lambda args: _ID.pack(args[0]) + _encode_str(args[1]),
+        lambda body: (_ID.unpack_from(body)[0], _decode_str(body, _ID.size))
+    ),
+    HostEvent.Leave: (5, *_user()),
+    HostEvent.Start: (
+        6,
+        lambda args: _encode_roles(args[0]),
+        lambda body: (_decode_roles(body),)
+    ),
+    HostEvent.Kill: (7, *_user()),
+    HostEvent.Vote: (8, lambda args: _IDS.pack(*args), _IDS.unpack),
+    HostEvent.Retract: (9, *_user()),
+    HostEvent.EndDay: (10, *_empty()),
+    HostEvent.End: (
+        11,
+        lambda args: _CODE.pack(_WINNERS.index(args[0])),
+        lambda body: (_WINNERS[_CODE.unpack(body)[0]],)
+    ),
+    HostEvent.Rebase: (12, *_user()),
+    HostEvent.Deadline: (
+        13,
+        lambda args: _encode_str(args[0]),
+        lambda body: (_decode_str(body),)
+    ),
+}
+_EVENTS: tp.Dict[int, Event] = {
+    code: event for event, (code, _, _) in _CODECS.items()
+}
+
+
+def encode(room_id: str, event: Event, args: tp.Tuple) -> bytes:
+    code, encoder, _ = _CODECS[event]
+    payload = _HEADER.pack(code, bytes.fromhex(room_id)) + encoder(args)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode(data: bytes) -> tp.Iterator[Record]:
+    # Stops at the first torn or corrupted record: nothing after it was
+    # acknowledged as durable.
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        code, room_id = _HEADER.unpack_from(payload)
+        event = _EVENTS[code]
+        yield room_id.hex(), event, _CODECS[event][2](payload[_HEADER.size:])
+        offset = start + length
+
+
+class EventLog:
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float = 0.05,
+        snapshot_every: int = 100000
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._fsync_interval = fsync_interval
+        self._snapshot_every = snapshot_every
+        self._segment = 0
+        self._fd: tp.Optional[int] = None
+        self._buffer = bytearray()
+        # Records that a recovery would replay on top of the snapshot.
+        self._tail = 0
+        self._state: tp.Optional[tp.Callable[[], tp.Iterable[Record]]] = None
+        self._dirty: tp.Optional[asyncio.Event] = None
+        self._flusher: tp.Optional[asyncio.Task] = None
+        self._closed = False
+        self._failure: tp.Optional[EventLogError] = None
+
+    def recover(self) -> tp.Iterator[Record]:
+        first_segment = 0
+        path = os.path.join(self._directory, _SNAPSHOT)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            if data[:len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+                raise EventLogError(f"{path} is not a snapshot")
+            (first_segment,) = _ID.unpack_from(data, len(_SNAPSHOT_MAGIC))
+            yield from decode(data[len(_SNAPSHOT_MAGIC) + _ID.size:])
+        for segment in self._segments():
+            if segment < first_segment:
+                continue
+            with open(self._segment_path(segment), "rb") as f:
+                for record in decode(f.read()):
+                    self._tail += 1
+                    yield record
+            self._segment = segment
+
+    def open(self, state: tp.Callable[[], tp.Iterable[Record]]) -> None:
+        # A new segment every time: the last one may end with a torn
+        # record from the crash.
+        self._state = state
+        self._open_segment(self._segment + 1)
+        self._dirty = asyncio.Event()
+        self._flusher = asyncio.ensure_future(self._flush_loop())
+        if self._tail >= self._snapshot_every:
+            self._dirty.set()
+
+    def append(self, room_id: str, event: Event, args: tp.Tuple = ()) -> None:
+        if self._failure is not None:
+            raise self._failure
+        if self._fd is None or self._closed:
+            raise EventLogError("Event log is not open")
+        self._buffer += encode(room_id, event, args)
+        self._tail += 1
+        self._dirty.set()
+
+    def journal(self, room_id: str) -> Journal:
+        return lambda event, args: self.append(room_id, event, args)
+
+    async def close(self) -> None:
+        if self._flusher is None or self._closed:
+            return
+        # Let the flusher finish the write in flight and write the rest.
+        self._closed = True
+        self._dirty.set()
+        try:
+            await self._flusher
+        except EventLogError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+
+    async def wait(self) -> None:
+        # Returns once the log is closed; raises when it failed, after
+        # which nothing appended is persisted.
+        await asyncio.shield(self._flusher)
+
+    async def _flush_loop(self) -> None:
+        try:
+            await self._flush()
+        except Exception as e:
+            self._failure = EventLogError(f"Cannot write the event log: {e}")
+            self._buffer.clear()
+            print(self._failure, flush=True)
+            raise self._failure from e
+
+    async def _flush(self) -> None:
+        # Group commit: one write and fsync for everything appended
+        # during the interval.
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._dirty.wait()
+            if not self._closed:
+                await asyncio.sleep(self._fsync_interval)
+            self._dirty.clear()
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            if self._tail < self._snapshot_every or self._closed:
+                await loop.run_in_executor(None, _write, self._fd, data)
+                if self._closed:
+                    return
+                continue
+            # The snapshot covers everything appended so far, so the new
+            # records go to the next segment.
+            snapshot = b"".join(
+                encode(*record) for record in self._state()
+            )
+            fd = self._fd
+            self._open_segment(self._segment + 1)
+            self._tail = 0
+            await loop.run_in_executor(
+                None, self._write_snapshot, fd, data, snapshot, self._segment
+            )
+
+    def _write_snapshot(
+        self,
+        fd: int,
+        data: bytes,
+        snapshot: bytes,
+        segment: int
+    ) -> None:
+        _write(fd, data)
+        os.close(fd)
+        path = os.path.join(self._directory, _SNAPSHOT)
+        with open(path + ".tmp", "wb") as f:
+            f.write(_SNAPSHOT_MAGIC + _ID.pack(segment) + snapshot)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        _fsync_directory(self._directory)
+        for old in self._segments():
+            if old < segment:
+                os.remove(self._segment_path(old))
+
+    def _open_segment(self, segment: int) -> None:
+        self._segment = segment
+        self._fd = os.open(
+            self._segment_path(segment),
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+            0o644
+        )
+        _fsync_directory(self._directory)
+
+    def _segments(self) -> tp.List[int]:
+        return sorted(
+            int(name[len("wal-"):-len(".log")])
+            for name in os.listdir(self._directory)
+            if name.startswith("wal-") and name.endswith(".log")
+        )
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self._directory, f"wal-{segment:08d}.log")
+
+
+def _write(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+    os.fsync(fd)
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,354 @@
+import asyncio
+import typing as tp
+from dataclasses import dataclass, field
+
+import grpc.aio
+
+import service.service_pb2_grpc as service_pb2_grpc
+import service.service_pb2 as service_pb2
+
+
+Notification = service_pb2.SubscribeOnNotificationsReply
+Call = tp.Callable[[str, tp.Awaitable], tp.Awaitable]
+
+
+class LeaveGame(Exception):
+    pass
+
+
+@dataclass
+class GameState:
+    _nickname: str
+    _user_id: int
+    _room_id: str
+    # Players in the room before the game, alive ones during it.
+    _players: tp.Dict[int, str] = field(default_factory=dict)
+    _role: str = ""
+    _phase: str = "Lobby"
+    _day: int = 0
+    _winner: tp.Optional[int] = None
+    _in_room: bool = True
+
+    @property
+    def nickname(self) -> str:
+        return self._nickname
+
+    @property
+    def user_id(self) -> int:
+        return self._user_id
+
+    @property
+    def room_id(self) -> str:
+        return self._room_id
+
+    @property
+    def players(self) -> tp.Dict[int, str]:
+        return self._players
+
+    @property
+    def role(self) -> str:
+        return self._role
+
+    @property
+    def phase(self) -> str:
+        return self._phase
+
+    @property
+    def day(self) -> int:
+        return self._day
+
+    @property
+    def winner(self) -> tp.Optional[int]:
+        return self._winner
+
+    @property
+    def in_room(self) -> bool:
+        return self._in_room
+
+    @property
+    def is_alive(self) -> bool:
+        return self._role != "Ghost" and self._user_id in self._players
+
+    def others(self) -> tp.List[int]:
+        return [id for id in self._players if id != self._user_id]
+
+
+class Player:
+    # The decisions of a player and what it is told about the game. The
+    # defaults play along without doing anything; any decision may raise
+    # LeaveGame to leave the room.
+    async def ready(self, game: GameState) -> None:
+        pass
+
+    async def kill(self, game: GameState) -> tp.Optional[int]:
+        return None
+
+    async def check(self, game: GameState) -> tp.Optional[int]:
+        return None
+
+    async def vote(self, game: GameState) -> tp.Optional[int]:
+        return None
+
+    async def rest(self, game: GameState) -> None:
+        # The phase of a player with nothing to do in it.
+        pass
+
+    def phase_started(self, game: GameState) -> None:
+        pass
+
+    def notified(self, game: GameState, notification: Notification) -> None:
+        pass
+
+    def checked(self, game: GameState, user_id: int, is_mafia: bool) -> None:
+        pass
+
+    def failed(self, game: GameState, details: str) -> None:
+        pass
+
+
+class GameClient:
+    # Plays one game in a room: follows the notifications and asks the
+    # player for the decisions. Every wait is on a reply or on the
+    # notifications, never on a clock.
+    def __init__(
+        self,
+        stub: service_pb2_grpc.MafiaStub,
+        player: Player,
+        nickname: str,
+        user_id: int,
+        room_id: str,
+        call: tp.Optional[Call] = None,
+        compression: tp.Optional[grpc.Compression] = None
+    ) -> None:
+        self._stub = stub
+        self._player = player
+        self._game = GameState(nickname, user_id, room_id)
+        self._call = call if call is not None else _call
+        # None leaves the calls of the game with the channel's.
+        self._compression = compression
+        # The seq of the next notification to come: the phase replies
+        # tell up to which seq their outcome is.
+        self._next_seq = 0
+        self._progress = asyncio.Event()
+        self._end = asyncio.Event()
+
+    @property
+    def game(self) -> GameState:
+        return self._game
+
+    async def play(self) -> GameState:
+        subscription = asyncio.ensure_future(self._subscribe())
+        try:
+            await self._play()
+        except LeaveGame:
+            await self.leave()
+        finally:
+            subscription.cancel()
+        return self._game
+
+    async def leave(self) -> None:
+        if not self._game.in_room:
+            return
+        self._game._in_room = False
+        await self._call(
+            "LeaveRoom",
+            self._stub.LeaveRoom(
+                service_pb2.LeaveRoomRequest(
+                    user_id=self._game.user_id,
+                    room_id=self._game.room_id
+                ),
+                compression=self._compression
+            )
+        )
+
+    async def _subscribe(self) -> None:
+        game = self._game
+        request = service_pb2.SubscribeOnNotificationsRequest(
+            user_id=game.user_id,
+            room_id=game.room_id,
+            typed=True
+        )
+        try:
+            async for notification in self._stub.SubscribeOnNotifications(
+                request, compression=self._compression
+            ):
+                self._apply(notification)
+                self._player.notified(game, notification)
+                self._next_seq = notification.seq + 1
+                self._progress.set()
+                if self._end.is_set():
+                    return
+        finally:
+            # Nothing more is coming: whoever waits must not wait forever.
+            self._end.set()
+            self._progress.set()
+
+    def _apply(self, notification: Notification) -> None:
+        game = self._game
+        payload = notification.WhichOneof("payload")
+        if payload == "join":
+            game._players[notification.join.user_id] = \
+                notification.join.nickname
+        elif payload == "leave":
+            game._players.pop(notification.leave.user_id, None)
+            if notification.leave.user_id == game.user_id:
+                game._in_room = False
+                self._end.set()
+        elif payload == "kill":
+            game._players.pop(notification.kill.user_id, None)
+            if notification.kill.user_id == game.user_id:
+                game._role = "Ghost"
+        elif payload == "snapshot":
+            game._players.clear()
+        elif payload == "end":
+            game._winner = notification.end.winner
+            game._phase = "Finished"
+            self._end.set()
+
+    async def _play(self) -> None:
+        game = self._game
+        await self._player.ready(game)
+        reply = await self._until_end(
+            "ReadyToStart",
+            self._stub.ReadyToStart(
+                service_pb2.ReadyToStartRequest(
+                    user_id=game.user_id,
+                    room_id=game.room_id
+                ),
+                compression=self._compression
+            )
+        )
+        if reply is None:
+            return
+        game._role = reply.role
+        self._start_phase("Day")
+        while not self._end.is_set():
+            await self._night()
+            if self._end.is_set():
+                break
+            self._start_phase("Day")
+            await self._day()
+
+    async def _night(self) -> None:
+        game = self._game
+        self._start_phase("Night")
+        if game.is_alive and game.role == "Mafia":
+            target = await self._player.kill(game)
+            if target is not None:
+                await self._try(
+                    "Kill",
+                    self._stub.Kill(
+                        service_pb2.KillRequest(
+                            room_id=game.room_id,
+                            user_id=game.user_id,
+                            user_id_to_kill=target
+                        ),
+                        compression=self._compression
+                    )
+                )
+        elif game.is_alive and game.role == "Officer":
+            target = await self._player.check(game)
+            if target is not None:
+                reply = await self._try(
+                    "IsKiller",
+                    self._stub.IsKiller(
+                        service_pb2.IsKillerRequest(
+                            room_id=game.room_id,
+                            user_id=game.user_id,
+                            user_id_to_check=target
+                        ),
+                        compression=self._compression
+                    )
+                )
+                if reply is not None:
+                    self._player.checked(game, target, reply.answer)
+        else:
+            await self._player.rest(game)
+        reply = await self._until_end(
+            "Night",
+            self._stub.Night(
+                service_pb2.NightRequest(
+                    user_id=game.user_id,
+                    room_id=game.room_id
+                ),
+                compression=self._compression
+            )
+        )
+        if reply is not None:
+            await self._caught_up(reply.next_seq)
+
+    async def _day(self) -> None:
+        game = self._game
+        target = None
+        if game.is_alive:
+            target = await self._player.vote(game)
+        else:
+            await self._player.rest(game)
+        try:
+            reply = await self._vote(
+                game.user_id if target is None else target
+            )
+        except grpc.aio.AioRpcError as e:
+            # The candidate may have died or left in the meantime.
+            if e.code() != grpc.StatusCode.INVALID_ARGUMENT:
+                raise
+            self._player.failed(game, e.details())
+            reply = await self._vote(game.user_id)
+        if reply is not None:
+            await self._caught_up(reply.next_seq)
+
+    async def _vote(self, target: int) -> tp.Optional[service_pb2.DayReply]:
+        game = self._game
+        return await self._until_end(
+            "Day",
+            self._stub.Day(
+                service_pb2.DayRequest(
+                    room_id=game.room_id,
+                    user_id=game.user_id,
+                    user_id_to_kill=target
+                ),
+                compression=self._compression
+            )
+        )
+
+    def _start_phase(self, phase: str) -> None:
+        game = self._game
+        game._phase = phase
+        if phase == "Day":
+            game._day += 1
+        self._player.phase_started(game)
+
+    async def _caught_up(self, next_seq: int) -> None:
+        while self._next_seq < next_seq and not self._end.is_set():
+            self._progress.clear()
+            await self._progress.wait()
+
+    async def _try(self, name: str, call: tp.Awaitable) -> tp.Any:
+        try:
+            return await self._call(name, call)
+        except grpc.aio.AioRpcError as e:
+            self._player.failed(self._game, e.details())
+            return None
+
+    async def _until_end(self, name: str, call: tp.Awaitable) -> tp.Any:
+        # The game may end while the player waits for a phase that the
+        # others will never join: give up on it then. A phase that ran
+        # out of time before the player came is over for the player too.
+        rpc = asyncio.ensure_future(self._call(name, call))
+        end = asyncio.ensure_future(self._end.wait())
+        await asyncio.wait({rpc, end}, return_when=asyncio.FIRST_COMPLETED)
+        end.cancel()
+        if not rpc.done():
+            rpc.cancel()
+            return None
+        try:
+            return rpc.result()
+        except grpc.aio.AioRpcError as e:
+            if e.code() != grpc.StatusCode.FAILED_PRECONDITION:
+                raise
+            self._player.failed(self._game, e.details())
+            return None
+
+
+async def _call(name: str, call: tp.Awaitable) -> tp.Any:
+    return await call
@@ -1,14 +1,32 @@
 from .mafia_host import (
+    HostEvent,
+    Journal,
     MafiaHost,
     MafiaHostError,
     Notification,
     NotificationType
 )
+from .mafia_room import MafiaRoomError, RoomSettings, Winner
+from .player import PlayerRoles
+from .phase_barrier import (
+    PhaseBarrier,
+    PhaseBarrierClosed,
+    PhaseBarrierError
+)
 
 
 __all__ = [
+    "HostEvent",
+    "Journal",
     "MafiaHost",
     "MafiaHostError",
+    "MafiaRoomError",
     "Notification",
-    "NotificationType"
+    "NotificationType",
+    "PhaseBarrier",
+    "PhaseBarrierClosed",
+    "PhaseBarrierError",
+    "PlayerRoles",
+    "RoomSettings",
+    "Winner"
 ]
@@ -1,12 +1,13 @@
-import asyncio
 import typing as tp
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 
 from .player import PlayerRoles
-from .mafia_room import MafiaRoom
+from .mafia_room import MafiaRoom, RoomSettings, Winner
+from .notification_log import CursorEvictedError, NotificationLog
 from .room import Room
+from .vote_tally import VoteTally
 
 
 class MafiaHostError(RuntimeError):
@@ -19,64 +20,168 @@ class NotificationType(Enum):
     StartTheGame = "StartTheGame"
     Kill = "Kill"
     End = "End"
+    Snapshot = "Snapshot"
+    Vote = "Vote"
+    Deadline = "Deadline"
+
+
+class HostEvent(Enum):
+    Join = "Join"
+    Leave = "Leave"
+    Start = "Start"
+    Kill = "Kill"
+    Vote = "Vote"
+    Retract = "Retract"
+    EndDay = "EndDay"
+    End = "End"
+    Rebase = "Rebase"
+    Deadline = "Deadline"
+
+
+Journal = tp.Callable[[HostEvent, tp.Tuple], None]
 
 
 @dataclass
 class Notification:
     _type: NotificationType
-    _data: str
+    _user_id: int = 0
+    _nickname: str = ""
+    _votes: int = 0
+    _winner: tp.Optional[Winner] = None
+    _phase: str = ""
+    _encoded: dict[tp.Hashable, tp.Any] = field(
+        default_factory=dict, repr=False, compare=False
+    )
 
     @property
     def type(self) -> NotificationType:
         return self._type
 
+    @property
+    def user_id(self) -> int:
+        return self._user_id
+
+    @property
+    def nickname(self) -> str:
+        return self._nickname
+
+    @property
+    def votes(self) -> int:
+        return self._votes
+
+    @property
+    def winner(self) -> tp.Optional[Winner]:
+        return self._winner
+
+    @property
+    def phase(self) -> str:
+        return self._phase
+
+    def encoded(
+        self,
+        key: tp.Hashable,
+        encode: tp.Callable[["Notification"], tp.Any]
+    ) -> tp.Any:
+        # A notification is fanned out to every subscriber of the room:
+        # encode it once per wire format and share the result.
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            encoded = self._encoded[key] = encode(self)
+        return encoded
+
     @property
     def data(self) -> str:
-        return self._data
+        # Space-separated form understood by the clients that predate
+        # typed notifications.
+        if self._type == NotificationType.End:
+            return self._winner.value
+        if self._type == NotificationType.Vote:
+            return f"{self._nickname} {self._user_id} {self._votes}"
+        if self._type == NotificationType.Deadline:
+            return self._phase
+        if self._type in (
+            NotificationType.Join,
+            NotificationType.Leave,
+            NotificationType.Kill
+        ):
+            return f"{self._nickname} {self._user_id}"
+        return ""
 
 
 class MafiaHost:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        notifications_capacity: int = 256,
+        journal: tp.Optional[Journal] = None,
+        settings: tp.Optional[RoomSettings] = None
+    ) -> None:
+        self._settings = settings if settings is not None else RoomSettings()
         self._room: Room = Room()
         self._mafia_room: tp.Optional[MafiaRoom] = None
-        self._notifications: list[Notification] = []
+        self._result: tp.Optional[Winner] = None
+        self._votes = VoteTally()
+        self._notifications: NotificationLog[Notification] = \
+            NotificationLog(notifications_capacity)
+        # The snapshot sent to the subscribers evicted at a given seq.
+        self._shared_snapshot: tp.Optional[
+            tp.Tuple[int, tp.List[Notification]]
+        ] = None
+        self._journal = journal
 
-    def join(self, nickname: str) -> int:
+    def join(self, nickname: str, id: tp.Optional[int] = None) -> int:
         if self._mafia_room is not None:
             raise MafiaHostError(
                 "Cannot join to the room that started the game"
             )
-        user_id = self._room.join(nickname)
+        if self._room.users_number >= self._settings.capacity:
+            raise MafiaHostError("Room is full")
+        if id is None:
+            id = self._room.free_id()
+        # A join that cannot be journaled must not happen at all.
+        self._record(HostEvent.Join, id, nickname)
+        user_id = self._room.join(nickname, id)
         self._notifications.append(Notification(
             NotificationType.Join,
-            f"{nickname} {user_id}"
+            user_id,
+            nickname
         ))
         return user_id
 
-    def start_the_game(self) -> None:
+    def start_the_game(
+        self,
+        roles: tp.Optional[tp.Dict[int, PlayerRoles]] = None
+    ) -> None:
         if self._mafia_room is not None:
             raise MafiaHostError(
                 "Game is already started"
             )
-        self._mafia_room = MafiaRoom(self._room)
+        self._mafia_room = MafiaRoom(self._room, roles, self._settings)
+        self._result = None
+        self._votes.clear()
         self._notifications.append(Notification(
-            NotificationType.StartTheGame,
-            ""
+            NotificationType.StartTheGame
         ))
+        self._record(HostEvent.Start, self._mafia_room.roles())
 
     def leave(self, id: str) -> None:
         self._notifications.append(Notification(
             NotificationType.Leave,
-            f"{self._room.nickname_by_user_id(id)} {id}"
+            id,
+            self._room.nickname_by_user_id(id)
         ))
         self._room.leave(id)
         if self._mafia_room is not None:
+            self._publish_votes(self._votes.retract(id))
+            self._votes.discard_candidate(id)
             if (is_end := self._mafia_room.leave(id)) is not None:
-                self._notifications.append(Notification(
-                    NotificationType.End,
-                    is_end
-                ))
-                self._mafia_room = None
+                self._end_the_game(is_end)
+        self._record(HostEvent.Leave, id)
+
+    def has_user(self, id: int) -> bool:
+        return self._room.has_user(id)
+
+    def user_ids(self) -> tp.List[int]:
+        return [user.id for user in self._room.users()]
 
     def is_mafia(self, id: int) -> bool:
         self._game_is_started()
@@ -90,6 +195,10 @@ class MafiaHost:
         return self._mafia_room.player_role(id)
 
     def kill_player(self, id: int) -> None:
+        self._kill_player(id)
+        self._record(HostEvent.Kill, id)
+
+    def _kill_player(self, id: int) -> None:
         self._game_is_started()
         if self._mafia_room.is_killed(id):
             raise MafiaHostError(
@@ -97,30 +206,194 @@ class MafiaHost:
             )
         self._notifications.append(Notification(
             NotificationType.Kill,
-            f"{self._room.nickname_by_user_id(id)} {id}"
+            id,
+            self._room.nickname_by_user_id(id)
         ))
         if (is_end := self._mafia_room.kill_player(id)) is not None:
-            self._notifications.append(Notification(
-                NotificationType.End,
-                is_end
-            ))
-            self._mafia_room = None
+            self._end_the_game(is_end)
+
+    def vote(self, id: int, id_to_kill: int) -> None:
+        self._game_is_started()
+        if not self._mafia_room.is_alive(id):
+            raise MafiaHostError(f"Player {id} cannot vote")
+        if not self._mafia_room.is_alive(id_to_kill):
+            raise MafiaHostError(f"Player {id_to_kill} is not alive")
+        self._publish_votes(self._votes.vote(id, id_to_kill))
+        self._record(HostEvent.Vote, id, id_to_kill)
+
+    def retract_vote(self, id: int) -> None:
+        self._publish_votes(self._votes.retract(id))
+        self._record(HostEvent.Retract, id)
+
+    def end_the_day(self) -> bool:
+        self._game_is_started()
+        leader = self._votes.leader
+        self._votes.clear()
+        # The victim follows from the recorded votes.
+        self._record(HostEvent.EndDay)
+        if leader is None:
+            return False
+        self._kill_player(leader)
+        return True
+
+    def deadline(self, phase: str) -> None:
+        self._notifications.append(Notification(
+            NotificationType.Deadline,
+            _phase=phase
+        ))
+        self._record(HostEvent.Deadline, phase)
+
+    def replay(self, event: HostEvent, args: tp.Tuple) -> None:
+        if event == HostEvent.Join:
+            self.join(args[1], args[0])
+        elif event == HostEvent.Leave:
+            self.leave(*args)
+        elif event == HostEvent.Start:
+            self.start_the_game(*args)
+        elif event == HostEvent.Kill:
+            self.kill_player(*args)
+        elif event == HostEvent.Vote:
+            self.vote(*args)
+        elif event == HostEvent.Retract:
+            self.retract_vote(*args)
+        elif event == HostEvent.EndDay:
+            self.end_the_day()
+        elif event == HostEvent.End:
+            self._end_the_game(*args)
+        elif event == HostEvent.Deadline:
+            self.deadline(*args)
+        elif event == HostEvent.Rebase:
+            self._notifications.rebase(*args)
+            self._shared_snapshot = None
 
-    async def notifications(self) -> tp.AsyncIterable[Notification]:
-        i = 0
+    def compacted(self) -> tp.List[tp.Tuple[HostEvent, tp.Tuple]]:
+        # The shortest history that replays into the current state.
+        events = [
+            (HostEvent.Join, (user.id, user.nickname))
+            for user in self._room.users()
+        ]
+        if self._mafia_room is not None:
+            events.append((HostEvent.Start, (self._mafia_room.roles(),)))
+            events.extend(
+                (HostEvent.Kill, (player.id,))
+                for player in self._mafia_room.players()
+                if not player.is_alive()
+            )
+            events.extend(
+                (HostEvent.Vote, vote) for vote in self._votes.votes()
+            )
+        elif self._result is not None:
+            events.append((HostEvent.End, (self._result,)))
+        events.append((HostEvent.Rebase, (self._notifications.next_seq,)))
+        return events
+
+    async def notifications(
+        self,
+        from_seq: int = 0
+    ) -> tp.AsyncIterable[tp.Tuple[int, Notification]]:
         while True:
-            if self._notifications[i - 1].type == NotificationType.End:
+            try:
+                async for seq, notification in \
+                        self._notifications.subscribe(from_seq):
+                    yield seq, notification
+                    if notification.type == NotificationType.End:
+                        return
+                # The log is closed.
                 return
-            if i < len(self._notifications):
-                i += 1
-                yield self._notifications[i - 1]
-            else:
-                await asyncio.sleep(0)
+            except CursorEvictedError:
+                # The subscriber is too far behind: replace the evicted
+                # history with the current state and continue from the tail.
+                seq = self._notifications.next_seq - 1
+                for notification in self._snapshot_at(seq):
+                    yield seq, notification
+                    if notification.type == NotificationType.End:
+                        return
+                from_seq = seq + 1
+
+    def snapshot(self) -> tp.List[Notification]:
+        snapshot = [Notification(NotificationType.Snapshot)]
+        if self._mafia_room is not None:
+            users = (
+                player for player in self._mafia_room.players()
+                if player.is_alive()
+            )
+        else:
+            users = self._room.users()
+        for user in users:
+            snapshot.append(Notification(
+                NotificationType.Join,
+                user.id,
+                user.nickname
+            ))
+        if self._mafia_room is not None or self._result is not None:
+            snapshot.append(Notification(NotificationType.StartTheGame))
+        if self._result is not None:
+            snapshot.append(Notification(
+                NotificationType.End,
+                _winner=self._result
+            ))
+        return snapshot
+
+    def close(self) -> None:
+        self._notifications.close()
+
+    @property
+    def journal(self) -> tp.Optional[Journal]:
+        return self._journal
+
+    @journal.setter
+    def journal(self, journal: tp.Optional[Journal]) -> None:
+        self._journal = journal
+
+    @property
+    def settings(self) -> RoomSettings:
+        return self._settings
 
     @property
     def users_number(self) -> int:
         return self._room.users_number
 
+    @property
+    def next_seq(self) -> int:
+        return self._notifications.next_seq
+
+    @property
+    def notifications_number(self) -> int:
+        return len(self._notifications)
+
+    @property
+    def is_finished(self) -> bool:
+        return self._result is not None and self._mafia_room is None
+
+    def _snapshot_at(self, seq: int) -> tp.List[Notification]:
+        # Subscribers of a big room fall behind together: every state
+        # change appends a notification, so all of them evicted at the
+        # same seq share one snapshot and its encodings.
+        if self._shared_snapshot is None or self._shared_snapshot[0] != seq:
+            self._shared_snapshot = seq, self.snapshot()
+        return self._shared_snapshot[1]
+
+    def _publish_votes(self, counts: tp.List[tp.Tuple[int, int]]) -> None:
+        for id, count in counts:
+            self._notifications.append(Notification(
+                NotificationType.Vote,
+                id,
+                self._room.nickname_by_user_id(id),
+                count
+            ))
+
+    def _end_the_game(self, result: Winner) -> None:
+        self._notifications.append(Notification(
+            NotificationType.End,
+            _winner=result
+        ))
+        self._result = result
+        self._mafia_room = None
+
+    def _record(self, event: HostEvent, *args: tp.Any) -> None:
+        if self._journal is not None:
+            self._journal(event, args)
+
     def _game_is_started(self) -> None:
         if self._mafia_room is None:
             raise MafiaHostError(
@@ -1,4 +1,6 @@
 import typing as tp
+from dataclasses import dataclass
+from enum import Enum
 from random import shuffle
 
 
@@ -10,30 +12,71 @@ class MafiaRoomError(RuntimeError):
     pass
 
 
+class Winner(Enum):
+    Civilians = "Civilians win"
+    Mafia = "Mafia wins"
+
+
+@dataclass
+class RoomSettings:
+    _capacity: int = 5
+    # A third of the players by default.
+    _mafia: tp.Optional[int] = None
+    _officers: int = 1
+
+    def __post_init__(self) -> None:
+        if self._capacity < 3:
+            raise MafiaRoomError("Not enough players. Need at least 3")
+        if self._mafia is None:
+            self._mafia = self._capacity // 3
+        if self._mafia < 1:
+            raise MafiaRoomError("Need at least one mafia")
+        if self._officers < 0:
+            raise MafiaRoomError("Number of officers cannot be negative")
+        if 2 * self._mafia >= self._capacity:
+            raise MafiaRoomError("Mafia must be outnumbered at the start")
+        if self._mafia + self._officers > self._capacity:
+            raise MafiaRoomError("Not enough players for the roles")
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def mafia(self) -> int:
+        return self._mafia
+
+    @property
+    def officers(self) -> int:
+        return self._officers
+
+
 class MafiaRoom:
-    def __init__(self, room: Room) -> None:
+    def __init__(
+        self,
+        room: Room,
+        roles: tp.Optional[tp.Dict[int, PlayerRoles]] = None,
+        settings: tp.Optional[RoomSettings] = None
+    ) -> None:
         if room.users_number < 3:
             raise MafiaRoomError("Not enough players. Need at least 3")
-        self._mafia_nums = room.users_number // 3
-        self._civilian_nums = room.users_number - self._mafia_nums
-        free_roles: list[PlayerRoles] = (
-            [PlayerRoles.Officer] +
-            [PlayerRoles.Civilian
-             for _ in range(room.users_number - self._mafia_nums - 1)] +
-            [PlayerRoles.Mafia for _ in range(self._mafia_nums)]
-        )
-        assert len(free_roles) == room.users_number
-        shuffle(free_roles)
+        if roles is None:
+            roles = self._deal(room, settings)
         self._players: dict[int, Player] = dict()
         for user in room.users():
             assert user.id not in self._players
             self._players[user.id] = Player(
                 user.id,
                 user.nickname,
-                free_roles.pop()
+                roles[user.id]
             )
+        self._mafia_nums = sum(
+            player.role == PlayerRoles.Mafia
+            for player in self._players.values()
+        )
+        self._civilian_nums = len(self._players) - self._mafia_nums
 
-    def leave(self, id: int) -> tp.Optional[str]:
+    def leave(self, id: int) -> tp.Optional[Winner]:
         self._player_in_room(id)
         if self.is_mafia(id) and self._players[id].is_alive():
             self._mafia_nums -= 1
@@ -50,11 +93,15 @@ class MafiaRoom:
         self._player_in_room(id)
         return self._players[id].role == PlayerRoles.Officer
 
+    def is_alive(self, id: int) -> bool:
+        player = self._players.get(id)
+        return player is not None and player.is_alive()
+
     def is_killed(self, id: int) -> bool:
         self._player_in_room(id)
         return not self._players[id].is_alive()
 
-    def kill_player(self, id: int) -> tp.Optional[str]:
+    def kill_player(self, id: int) -> tp.Optional[Winner]:
         self._player_in_room(id)
         if self._players[id].is_alive():
             if self.is_mafia(id):
@@ -66,6 +113,9 @@ class MafiaRoom:
             raise MafiaRoomError(f"Player {id} already dead")
         return self._check_end()
 
+    def roles(self) -> tp.Dict[int, PlayerRoles]:
+        return {id: player.role for id, player in self._players.items()}
+
     def player_role(self, id: int) -> PlayerRoles:
         self._player_in_room(id)
         return self._players[id].role
@@ -76,11 +126,34 @@ class MafiaRoom:
 
     def _player_in_room(self, id: int) -> None:
         if id not in self._players:
-            raise MafiaRoom(f"{self._players[id].nickname} not in room")
+            raise MafiaRoomError(f"{id} not in the room")
+
+    @staticmethod
+    def _deal(
+        room: Room,
+        settings: tp.Optional[RoomSettings]
+    ) -> tp.Dict[int, PlayerRoles]:
+        ids = [user.id for user in room.users()]
+        if settings is None:
+            mafia_nums, officers = len(ids) // 3, 1
+        else:
+            mafia_nums, officers = settings.mafia, settings.officers
+        if 2 * mafia_nums >= len(ids) or mafia_nums + officers > len(ids):
+            raise MafiaRoomError(
+                f"Not enough players for {mafia_nums} mafia "
+                f"and {officers} officers"
+            )
+        shuffle(ids)
+        roles = dict.fromkeys(ids, PlayerRoles.Civilian)
+        for id in ids[:mafia_nums]:
+            roles[id] = PlayerRoles.Mafia
+        for id in ids[mafia_nums:mafia_nums + officers]:
+            roles[id] = PlayerRoles.Officer
+        return roles
 
-    def _check_end(self) -> tp.Optional[str]:
+    def _check_end(self) -> tp.Optional[Winner]:
         if self._mafia_nums == 0:
-            return "Civilians win"
+            return Winner.Civilians
         if self._civilian_nums <= self._mafia_nums:
-            return "Mafia wins"
+            return Winner.Mafia
         return None
@@ -0,0 +1,105 @@
+import asyncio
+import typing as tp
+
+
+T = tp.TypeVar("T")
+
+
+class NotificationLogError(RuntimeError):
+    pass
+
+
+class CursorEvictedError(NotificationLogError):
+    def __init__(self, cursor: int, first_seq: int) -> None:
+        super().__init__(
+            f"Notification {cursor} is evicted, oldest kept is {first_seq}"
+        )
+        self.cursor = cursor
+        self.first_seq = first_seq
+
+
+class NotificationLog(tp.Generic[T]):
+    def __init__(self, capacity: int = 256) -> None:
+        if capacity <= 0:
+            raise NotificationLogError("Capacity must be positive")
+        self._capacity = capacity
+        self._buffer: list[tp.Optional[T]] = [None] * capacity
+        self._next_seq = 0
+        self._base_seq = 0
+        self._closed = False
+        self._wakeup: tp.Optional[asyncio.Event] = None
+
+    def append(self, entry: T) -> int:
+        if self._closed:
+            raise NotificationLogError("Notification log is closed")
+        seq = self._next_seq
+        self._buffer[seq % self._capacity] = entry
+        self._next_seq += 1
+        self._wake_up()
+        return seq
+
+    def close(self) -> None:
+        # Subscribers still receive what was appended before; the buffer
+        # goes away with the last of them.
+        self._closed = True
+        self._wake_up()
+
+    def rebase(self, next_seq: int) -> None:
+        # Forget the entries and continue numbering from next_seq: the
+        # subscribers behind it are told that their cursor is evicted.
+        self._buffer = [None] * self._capacity
+        self._next_seq = next_seq
+        self._base_seq = next_seq
+        self._wake_up()
+
+    def get(self, seq: int) -> T:
+        if seq < self.first_seq:
+            raise CursorEvictedError(seq, self.first_seq)
+        if seq >= self._next_seq:
+            raise NotificationLogError(f"Notification {seq} does not exist")
+        return self._buffer[seq % self._capacity]
+
+    async def subscribe(
+        self,
+        from_seq: int = 0
+    ) -> tp.AsyncIterable[tp.Tuple[int, T]]:
+        cursor = from_seq
+        while True:
+            while cursor < self._next_seq:
+                entry = self.get(cursor)
+                cursor += 1
+                yield cursor - 1, entry
+            if self._closed:
+                return
+            await self._wait()
+
+    async def _wait(self) -> None:
+        # One event per batch of appends, shared by every caught-up
+        # subscriber: a single set() wakes all of them.
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        await self._wakeup.wait()
+
+    def _wake_up(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._wakeup = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def first_seq(self) -> int:
+        return max(self._base_seq, self._next_seq - self._capacity)
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    def __len__(self) -> int:
+        return self._next_seq - self.first_seq
@@ -0,0 +1,107 @@
+import asyncio
+import typing as tp
+
+
+class PhaseBarrierError(RuntimeError):
+    pass
+
+
+class PhaseBarrierClosed(PhaseBarrierError):
+    pass
+
+
+class PhaseBarrier:
+    def __init__(
+        self,
+        parties: int,
+        action: tp.Optional[tp.Callable[[bool], tp.Any]] = None
+    ) -> None:
+        self._parties = parties
+        self._action = action
+        self._generation = 0
+        self._arrived: set[int] = set()
+        self._released: tp.Optional[asyncio.Future] = None
+        self._closed = False
+
+    async def wait(self, participant: int) -> tp.Any:
+        if self._closed:
+            raise PhaseBarrierClosed("Barrier is closed")
+        generation = self._generation
+        released = self._current_release()
+        self._arrived.add(participant)
+        self._try_trip()
+        try:
+            # The future is shared by every waiter of the generation, so
+            # a cancelled waiter must not cancel it for the others.
+            return await asyncio.shield(released)
+        except asyncio.CancelledError:
+            if self._generation == generation:
+                self._arrived.discard(participant)
+            raise
+
+    def withdraw(self, participant: int) -> None:
+        self._arrived.discard(participant)
+
+    def expire(self) -> None:
+        # The phase is over for the participants that did not make it.
+        if not self._closed:
+            self._trip(True)
+
+    def close(self) -> None:
+        self._closed = True
+        if self._released is not None and not self._released.done():
+            self._released.set_exception(
+                PhaseBarrierClosed("Barrier is closed")
+            )
+            # Nobody may be left to retrieve it.
+            self._released.exception()
+        self._released = None
+        self._arrived.clear()
+
+    @property
+    def parties(self) -> int:
+        return self._parties
+
+    @parties.setter
+    def parties(self, parties: int) -> None:
+        self._parties = parties
+        if self._arrived:
+            self._try_trip()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def waiting(self) -> int:
+        return len(self._arrived)
+
+    @property
+    def arrived(self) -> tp.AbstractSet[int]:
+        return self._arrived
+
+    def _current_release(self) -> asyncio.Future:
+        if self._released is None:
+            self._released = asyncio.get_running_loop().create_future()
+        return self._released
+
+    def _try_trip(self) -> None:
+        if len(self._arrived) >= self._parties:
+            self._trip(False)
+
+    def _trip(self, expired: bool) -> None:
+        released = self._current_release()
+        self._generation += 1
+        arrived, self._arrived = self._arrived, set()
+        self._released = None
+        try:
+            result = (
+                self._action(expired) if self._action is not None else None
+            )
+        except Exception as e:
+            if not arrived:
+                # Nobody waits for the result: the caller gets the error.
+                raise
+            released.set_exception(e)
+        else:
+            released.set_result(result)
@@ -16,10 +16,17 @@ class Room:
     _users: Dict[int, ProvisioningUser] = field(default_factory=dict)
     _ready_number = 0
 
-    def join(self, nickname: str) -> int:
+    def free_id(self) -> int:
         id = getrandbits(64)
         while id in self._users:
             id = getrandbits(64)
+        return id
+
+    def join(self, nickname: str, id: tp.Optional[int] = None) -> int:
+        if id is None:
+            id = self.free_id()
+        elif id in self._users:
+            raise RoomError(f"{id} is already in the room")
         self._users[id] = ProvisioningUser(id, nickname)
         return id
 
@@ -31,6 +38,9 @@ class Room:
         for user in self._users.values():
             yield user
 
+    def has_user(self, id: int) -> bool:
+        return id in self._users
+
     def nickname_by_user_id(self, id: int) -> str:
         self._user_in_room(id)
         return self._users[id].nickname
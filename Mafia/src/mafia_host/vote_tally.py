@@ -0,0 +1,84 @@
+import typing as tp
+
+
+class VoteTally:
+    def __init__(self) -> None:
+        self._votes: dict[int, int] = {}
+        self._voters: dict[int, set[int]] = {}
+        self._by_count: dict[int, set[int]] = {}
+        self._max_count = 0
+
+    def vote(self, voter: int, candidate: int) -> tp.List[tp.Tuple[int, int]]:
+        previous = self._votes.get(voter)
+        if previous == candidate:
+            return []
+        changed = []
+        if previous is not None:
+            changed.append(self._remove(voter, previous))
+        self._votes[voter] = candidate
+        self._voters.setdefault(candidate, set()).add(voter)
+        count = len(self._voters[candidate])
+        self._move(candidate, count - 1, count)
+        changed.append((candidate, count))
+        return changed
+
+    def retract(self, voter: int) -> tp.List[tp.Tuple[int, int]]:
+        previous = self._votes.get(voter)
+        if previous is None:
+            return []
+        return [self._remove(voter, previous)]
+
+    def discard_candidate(self, candidate: int) -> None:
+        for voter in list(self._voters.get(candidate, ())):
+            self._remove(voter, candidate)
+
+    def clear(self) -> None:
+        self._votes = {}
+        self._voters = {}
+        self._by_count = {}
+        self._max_count = 0
+
+    def votes(self) -> tp.List[tp.Tuple[int, int]]:
+        return list(self._votes.items())
+
+    def count(self, candidate: int) -> int:
+        return len(self._voters.get(candidate, ()))
+
+    @property
+    def leader(self) -> tp.Optional[int]:
+        if self._max_count == 0:
+            return None
+        leaders = self._by_count[self._max_count]
+        if len(leaders) != 1:
+            return None
+        return next(iter(leaders))
+
+    @property
+    def is_tie(self) -> bool:
+        return (
+            self._max_count != 0 and
+            len(self._by_count[self._max_count]) > 1
+        )
+
+    def _remove(self, voter: int, candidate: int) -> tp.Tuple[int, int]:
+        del self._votes[voter]
+        voters = self._voters[candidate]
+        voters.discard(voter)
+        count = len(voters)
+        if count == 0:
+            del self._voters[candidate]
+        self._move(candidate, count + 1, count)
+        return candidate, count
+
+    def _move(self, candidate: int, old: int, new: int) -> None:
+        if old != 0:
+            bucket = self._by_count[old]
+            bucket.discard(candidate)
+            if not bucket:
+                del self._by_count[old]
+                if self._max_count == old and new < old:
+                    self._max_count = new
+        if new != 0:
+            self._by_count.setdefault(new, set()).add(candidate)
+            if new > self._max_count:
+                self._max_count = new
@@ -0,0 +1,121 @@
+import heapq
+import typing as tp
+from bisect import bisect_right
+from dataclasses import dataclass
+
+
+# Dead entries kept in the queue and the order before they are swept.
+_SLACK = 64
+
+
+@dataclass
+class OpenRoom:
+    _room_id: str
+    _players: int
+    _capacity: int
+    _seq: int
+
+    @property
+    def room_id(self) -> str:
+        return self._room_id
+
+    @property
+    def players(self) -> int:
+        return self._players
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def free(self) -> int:
+        return self._capacity - self._players
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+
+class OpenRoomIndex:
+    def __init__(self) -> None:
+        self._rooms: dict[str, OpenRoom] = {}
+        # Rooms in the order they were opened, for stable pages.
+        self._order: list[int] = []
+        self._by_seq: dict[int, str] = {}
+        # Matchmaking queue: the room closest to being full goes first,
+        # and the one that has waited longer among equals. Entries are
+        # never removed in place, a stale one is skipped when it
+        # surfaces.
+        self._queue: list[tp.Tuple[int, int, str]] = []
+        self._next_seq = 0
+
+    def update(
+        self,
+        room_id: str,
+        players: int,
+        capacity: int,
+        is_open: bool = True
+    ) -> None:
+        if not is_open or players == 0 or players >= capacity:
+            self.discard(room_id)
+            return
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = OpenRoom(room_id, players, capacity, self._next_seq)
+            self._next_seq += 1
+            self._rooms[room_id] = room
+            self._order.append(room.seq)
+            self._by_seq[room.seq] = room_id
+        elif room.players == players and room.capacity == capacity:
+            return
+        else:
+            room._players = players
+            room._capacity = capacity
+        heapq.heappush(self._queue, (room.free, room.seq, room_id))
+        self._sweep()
+
+    def discard(self, room_id: str) -> None:
+        room = self._rooms.pop(room_id, None)
+        if room is None:
+            return
+        del self._by_seq[room.seq]
+        self._sweep()
+
+    def best(self) -> tp.Optional[OpenRoom]:
+        while self._queue:
+            free, seq, room_id = self._queue[0]
+            room = self._rooms.get(room_id)
+            if room is not None and room.seq == seq and room.free == free:
+                return room
+            heapq.heappop(self._queue)
+        return None
+
+    def page(
+        self,
+        after: int,
+        limit: int
+    ) -> tp.Tuple[tp.List[OpenRoom], tp.Optional[int]]:
+        rooms = []
+        for i in range(bisect_right(self._order, after), len(self._order)):
+            room_id = self._by_seq.get(self._order[i])
+            if room_id is None:
+                continue
+            if len(rooms) == limit:
+                return rooms, rooms[-1].seq
+            rooms.append(self._rooms[room_id])
+        return rooms, None
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def _sweep(self) -> None:
+        if len(self._order) > 2 * len(self._rooms) + _SLACK:
+            self._order = [
+                seq for seq in self._order if seq in self._by_seq
+            ]
+        if len(self._queue) > 2 * len(self._rooms) + _SLACK:
+            self._queue = [
+                (room.free, room.seq, room.room_id)
+                for room in self._rooms.values()
+            ]
+            heapq.heapify(self._queue)
@@ -0,0 +1,264 @@
+import asyncio
+import bisect
+import time
+import typing as tp
+from collections import defaultdict
+
+import grpc
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+Sample = tp.Tuple[str, tp.Dict[str, str], float]
+
+
+class Histogram:
+    def __init__(self, buckets: tp.Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    def samples(
+        self,
+        name: str,
+        labels: tp.Dict[str, str]
+    ) -> tp.Iterator[Sample]:
+        cumulative = 0
+        for bound, count in zip(self._buckets, self._counts):
+            cumulative += count
+            yield f"{name}_bucket", {**labels, "le": repr(bound)}, cumulative
+        yield f"{name}_bucket", {**labels, "le": "+Inf"}, self._count
+        yield f"{name}_sum", labels, self._sum
+        yield f"{name}_count", labels, self._count
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._help: dict[str, tp.Tuple[str, str]] = {}
+        self._counters: dict[str, dict[tp.Tuple, float]] = \
+            defaultdict(lambda: defaultdict(float))
+        self._histograms: dict[str, dict[tp.Tuple, Histogram]] = \
+            defaultdict(dict)
+        self._collectors: list[tp.Callable[[], tp.Iterable[Sample]]] = []
+
+    def describe(self, name: str, type_: str, help_: str) -> None:
+        self._help[name] = (type_, help_)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        self._counters[name][tuple(sorted(labels.items()))] += value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        histogram = self._histograms[name].get(key)
+        if histogram is None:
+            histogram = self._histograms[name][key] = Histogram()
+        histogram.observe(value)
+
+    def register_collector(
+        self,
+        collector: tp.Callable[[], tp.Iterable[Sample]]
+    ) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families: dict[str, list[Sample]] = defaultdict(list)
+        for name, series in self._counters.items():
+            for key, value in series.items():
+                families[name].append((name, dict(key), value))
+        for name, series in self._histograms.items():
+            for key, histogram in series.items():
+                families[name].extend(histogram.samples(name, dict(key)))
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                families[name].append((name, labels, value))
+        lines = []
+        for family, samples in families.items():
+            if family in self._help:
+                type_, help_ = self._help[family]
+                lines.append(f"# HELP {family} {help_}")
+                lines.append(f"# TYPE {family} {type_}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tp.Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{k}="{_escape(str(v))}"' for k, v in labels.items()
+    ) + "}"
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, metrics: Metrics) -> None:
+        self._metrics = metrics
+        self._in_flight: dict[str, int] = defaultdict(int)
+        metrics.describe(
+            "grpc_server_handled_total", "counter",
+            "RPCs completed on the server by method and status code."
+        )
+        metrics.describe(
+            "grpc_server_handling_seconds", "histogram",
+            "RPC handling time by method."
+        )
+        metrics.describe(
+            "grpc_server_in_flight", "gauge",
+            "RPCs being handled by method."
+        )
+        metrics.register_collector(self._collect)
+
+    async def intercept_service(
+        self,
+        continuation: tp.Callable,
+        handler_call_details: grpc.HandlerCallDetails
+    ) -> tp.Optional[grpc.RpcMethodHandler]:
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        if handler.unary_unary is not None:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.unary_unary),
+                handler.request_deserializer,
+                handler.response_serializer
+            )
+        if handler.stream_unary is not None:
+            return grpc.stream_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.stream_unary),
+                handler.request_deserializer,
+                handler.response_serializer
+            )
+        if handler.unary_stream is not None:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(method, handler.unary_stream),
+                handler.request_deserializer,
+                handler.response_serializer
+            )
+        return grpc.stream_stream_rpc_method_handler(
+            self._wrap_stream(method, handler.stream_stream),
+            handler.request_deserializer,
+            handler.response_serializer
+        )
+
+    def _wrap_unary(self, method: str, behavior: tp.Callable) -> tp.Callable:
+        async def wrapped(request, context: grpc.ServicerContext):
+            start = self._start(method)
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                response = await behavior(request, context)
+                code = context.code() or grpc.StatusCode.OK
+                return response
+            except asyncio.CancelledError:
+                code = context.code() or grpc.StatusCode.CANCELLED
+                raise
+            except grpc.aio.AbortError:
+                code = context.code() or grpc.StatusCode.UNKNOWN
+                raise
+            finally:
+                self._finish(method, start, code)
+
+        return wrapped
+
+    def _wrap_stream(self, method: str, behavior: tp.Callable) -> tp.Callable:
+        async def wrapped(request, context: grpc.ServicerContext):
+            start = self._start(method)
+            code = grpc.StatusCode.UNKNOWN
+            try:
+                async for response in behavior(request, context):
+                    yield response
+                code = context.code() or grpc.StatusCode.OK
+            except (asyncio.CancelledError, GeneratorExit):
+                # A stream aborted from another task, e.g. a slow consumer
+                # disconnected by its pump, ends here with its own code.
+                code = context.code() or grpc.StatusCode.CANCELLED
+                raise
+            except grpc.aio.AbortError:
+                code = context.code() or grpc.StatusCode.UNKNOWN
+                raise
+            finally:
+                self._finish(method, start, code)
+
+        return wrapped
+
+    def _start(self, method: str) -> float:
+        self._in_flight[method] += 1
+        return time.perf_counter()
+
+    def _finish(
+        self,
+        method: str,
+        start: float,
+        code: grpc.StatusCode
+    ) -> None:
+        self._in_flight[method] -= 1
+        self._metrics.inc(
+            "grpc_server_handled_total", method=method, code=code.name
+        )
+        self._metrics.observe(
+            "grpc_server_handling_seconds",
+            time.perf_counter() - start,
+            method=method
+        )
+
+    def _collect(self) -> tp.Iterator[Sample]:
+        for method, value in self._in_flight.items():
+            yield "grpc_server_in_flight", {"method": method}, value
+
+
+async def serve_metrics(
+    metrics: Metrics,
+    host: str,
+    port: int
+) -> asyncio.AbstractServer:
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split(" ")
+            if len(parts) >= 2 and parts[0] == "GET" and \
+                    parts[1].split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = metrics.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
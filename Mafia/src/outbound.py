@@ -0,0 +1,121 @@
+import asyncio
+import typing as tp
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+
+
+T = tp.TypeVar("T")
+
+
+class OverflowPolicy(Enum):
+    Block = "block"
+    DropOldest = "drop-oldest"
+    Disconnect = "disconnect"
+
+
+class OutboundQueueError(RuntimeError):
+    pass
+
+
+class SlowConsumerError(OutboundQueueError):
+    pass
+
+
+@dataclass
+class Gap(tp.Generic[T]):
+    _first: T
+    _dropped: int
+
+    @property
+    def first(self) -> T:
+        return self._first
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+
+class OutboundQueue(tp.Generic[T]):
+    def __init__(
+        self,
+        capacity: int,
+        policy: OverflowPolicy = OverflowPolicy.Block
+    ) -> None:
+        if capacity <= 0:
+            raise OutboundQueueError("Capacity must be positive")
+        self._capacity = capacity
+        self._policy = policy
+        self._items: tp.Deque[T] = deque()
+        # Replies to the stream's own requests: never dropped and sent
+        # ahead of the queued items.
+        self._control: tp.Deque[tp.Any] = deque()
+        self._first_dropped: tp.Optional[T] = None
+        self._dropped = 0
+        self._closed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+
+    async def put(self, item: T) -> int:
+        dropped = 0
+        if len(self._items) >= self._capacity:
+            if self._policy == OverflowPolicy.Disconnect:
+                raise SlowConsumerError(
+                    f"Stream is {self._capacity} messages behind"
+                )
+            if self._policy == OverflowPolicy.DropOldest:
+                oldest = self._items.popleft()
+                # Drops always come from the head of the queue, so all
+                # of them since the last gap marker are contiguous.
+                if self._dropped == 0:
+                    self._first_dropped = oldest
+                self._dropped += 1
+                dropped = 1
+            else:
+                while len(self._items) >= self._capacity and \
+                        not self._closed:
+                    self._writable.clear()
+                    await self._writable.wait()
+        self._items.append(item)
+        self._readable.set()
+        return dropped
+
+    def put_control(self, item: tp.Any) -> None:
+        self._control.append(item)
+        self._readable.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._readable.set()
+        self._writable.set()
+
+    async def get(self) -> tp.Union[T, Gap[T], tp.Any]:
+        while True:
+            if self._control:
+                return self._control.popleft()
+            if self._dropped:
+                gap = Gap(self._first_dropped, self._dropped)
+                self._first_dropped = None
+                self._dropped = 0
+                return gap
+            if self._items:
+                item = self._items.popleft()
+                self._writable.set()
+                return item
+            if self._closed:
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+
+    def __aiter__(self) -> "OutboundQueue[T]":
+        return self
+
+    async def __anext__(self) -> tp.Union[T, Gap[T], tp.Any]:
+        return await self.get()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,5 +1,10 @@
 import asyncio
+import multiprocessing
+import os
+import tempfile
 import typing as tp
+from dataclasses import dataclass
+from enum import Enum
 from uuid import uuid4
 
 import click
@@ -7,43 +12,583 @@ import grpc
 
 import service.service_pb2_grpc as service_pb2_grpc
 import service.service_pb2 as service_pb2
-from mafia_host import MafiaHost
+import channel_args
+from event_log import EventLog, Record, RoomEvent
+from mafia_host import (
+    Journal,
+    MafiaHost,
+    MafiaHostError,
+    MafiaRoomError,
+    Notification,
+    NotificationType,
+    PhaseBarrier,
+    PhaseBarrierError,
+    RoomSettings,
+    Winner
+)
+from matchmaking import OpenRoomIndex
+from metrics import Metrics, MetricsInterceptor, Sample, serve_metrics
+from outbound import Gap, OutboundQueue, OverflowPolicy, SlowConsumerError
+from sharding import ShardRouter, shard_of
+from timer_wheel import Timer, TimerWheel
+
+
+ROOM_SIZE = 5
+# Votes and kills of a day in a full room fit into the notification log.
+NOTIFICATIONS_PER_PLAYER = 4
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# In bytes of UTF-8, well within what the event log can record.
+MAX_NICKNAME_LENGTH = 256
+
+
+@dataclass
+class MafiaConfig:
+    notifications_capacity: int = 256
+    room_size: int = ROOM_SIZE
+    max_room_size: int = 1000
+    reap_grace_period: float = 60.0
+    # A full room has ready_timeout to get ready, the players that are
+    # not are kicked. Night and day go on without the players that did
+    # not act in time, and the ones that missed max_missed_deadlines in a
+    # row are kicked as well (never with 0). None turns a deadline off.
+    ready_timeout: tp.Optional[float] = 120.0
+    night_timeout: tp.Optional[float] = 60.0
+    day_timeout: tp.Optional[float] = 120.0
+    max_missed_deadlines: int = 2
+    timer_resolution: float = 0.1
+    max_spectators: int = 10000
+    stream_queue_size: int = 64
+    overflow_policy: OverflowPolicy = OverflowPolicy.Block
+    # Rooms survive restarts when an event log directory is given.
+    event_log_dir: tp.Optional[str] = None
+    fsync_interval: float = 0.05
+    snapshot_every: int = 100000
+    # Of the notification streams, per call, instead of the server's:
+    # they carry the bulk of what is sent.
+    stream_compression: tp.Optional[str] = None
+
+
+@dataclass
+class ServerConfig:
+    metrics_host: str = "127.0.0.1"
+    metrics_port: tp.Optional[int] = None
+    # Calls that arrived but have not been picked up by the server yet,
+    # e.g. a crowd of spectators attaching at once: past the limit gRPC
+    # cancels them.
+    max_pending_requests: int = 10000
+    # Pings find the connections of clients that are gone without
+    # closing them; idle connections are closed after idle_timeout.
+    keepalive_time: tp.Optional[float] = 60.0
+    keepalive_timeout: float = 20.0
+    idle_timeout: tp.Optional[float] = None
+    # Calls served at once, past it new calls fail with
+    # RESOURCE_EXHAUSTED; a player waiting on a phase holds one.
+    maximum_concurrent_rpcs: tp.Optional[int] = None
+    max_concurrent_streams: tp.Optional[int] = None
+    flow_control_window: tp.Optional[int] = None
+    max_message_size: tp.Optional[int] = None
+    compression: tp.Optional[str] = None
+    uvloop: bool = False
+
+
+class ActionError(RuntimeError):
+    def __init__(self, code: grpc.StatusCode, details: str) -> None:
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+
+class Phase(Enum):
+    Lobby = "Lobby"
+    Night = "Night"
+    Day = "Day"
+    Finished = "Finished"
+
+
+_MAFIA_SERVICE = service_pb2.DESCRIPTOR.services_by_name["Mafia"]
+_Reply = service_pb2.SubscribeOnNotificationsReply
+_WINNERS = {
+    Winner.Civilians: service_pb2.CIVILIANS,
+    Winner.Mafia: service_pb2.MAFIA,
+}
+_PAYLOADS: dict[NotificationType, tp.Callable[[Notification], dict]] = {
+    NotificationType.Join: lambda n: {
+        "join": _Reply.Join(user_id=n.user_id, nickname=n.nickname)
+    },
+    NotificationType.Leave: lambda n: {
+        "leave": _Reply.Leave(user_id=n.user_id, nickname=n.nickname)
+    },
+    NotificationType.StartTheGame: lambda n: {
+        "start_the_game": _Reply.StartTheGame()
+    },
+    NotificationType.Kill: lambda n: {
+        "kill": _Reply.Kill(user_id=n.user_id, nickname=n.nickname)
+    },
+    NotificationType.End: lambda n: {
+        "end": _Reply.End(winner=_WINNERS[n.winner])
+    },
+    NotificationType.Snapshot: lambda n: {
+        "snapshot": _Reply.Snapshot()
+    },
+    NotificationType.Vote: lambda n: {
+        "vote": _Reply.Vote(
+            user_id=n.user_id, nickname=n.nickname, votes=n.votes
+        )
+    },
+    NotificationType.Deadline: lambda n: {
+        "deadline": _Reply.Deadline(phase=n.phase)
+    },
+}
+
+
+def notification_reply(
+    seq: int,
+    notification: Notification,
+    typed: bool
+) -> service_pb2.SubscribeOnNotificationsReply:
+    if not typed:
+        return _Reply(
+            type=notification.type.value,
+            data=notification.data,
+            seq=seq
+        )
+    return _Reply(
+        type=notification.type.value,
+        seq=seq,
+        **_PAYLOADS[notification.type](notification)
+    )
+
+
+def gap_reply(
+    gap: Gap,
+    typed: bool
+) -> service_pb2.SubscribeOnNotificationsReply:
+    seq, _ = gap.first
+    if not typed:
+        return _Reply(type="Gap", data=str(gap.dropped), seq=seq)
+    return _Reply(type="Gap", seq=seq, gap=_Reply.Gap(dropped=gap.dropped))
+
+
+def encoded_notification(
+    seq: int,
+    notification: Notification,
+    typed: bool
+) -> bytes:
+    return notification.encoded(
+        (seq, typed),
+        lambda n: notification_reply(seq, n, typed).SerializeToString()
+    )
+
+
+def encoded_session_notification(
+    seq: int,
+    notification: Notification
+) -> bytes:
+    # GameSessionReply with the notification field set: the field tag and
+    # the length followed by the already encoded notification.
+    def encode(n: Notification) -> bytes:
+        reply = encoded_notification(seq, n, True)
+        return _NOTIFICATION_TAG + _varint(len(reply)) + reply
+
+    return notification.encoded((seq, "session"), encode)
+
+
+_NOTIFICATION_TAG = bytes([
+    service_pb2.GameSessionReply.NOTIFICATION_FIELD_NUMBER << 3 | 2
+])
+
+
+def _varint(value: int) -> bytes:
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append(value & 0x7f | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _serialize(message: tp.Union[bytes, tp.Any]) -> bytes:
+    # Notifications are sent pre-encoded, any other reply is a message.
+    if isinstance(message, bytes):
+        return message
+    return message.SerializeToString()
+
+
+def add_servicer(
+    servicer: service_pb2_grpc.MafiaServicer,
+    server: grpc.aio.Server
+) -> None:
+    handlers = {}
+    for method in _MAFIA_SERVICE.methods:
+        if method.client_streaming and method.server_streaming:
+            make_handler = grpc.stream_stream_rpc_method_handler
+        elif method.server_streaming:
+            make_handler = grpc.unary_stream_rpc_method_handler
+        else:
+            make_handler = grpc.unary_unary_rpc_method_handler
+        handlers[method.name] = make_handler(
+            getattr(servicer, method.name),
+            request_deserializer=getattr(
+                service_pb2, method.input_type.name
+            ).FromString,
+            response_serializer=_serialize
+        )
+    server.add_generic_rpc_handlers((
+        grpc.method_handlers_generic_handler(
+            _MAFIA_SERVICE.full_name, handlers
+        ),
+    ))
+
+
+def room_settings(config: MafiaConfig) -> RoomSettings:
+    # The rooms FindGame opens: checked once, on startup.
+    if config.room_size > config.max_room_size:
+        raise MafiaRoomError(
+            f"Room size is limited to {config.max_room_size}"
+        )
+    return RoomSettings(config.room_size)
+
+
+def _created(settings: RoomSettings) -> tp.Tuple[int, int, int]:
+    return settings.capacity, settings.mafia, settings.officers
+
+
+def _session_error(
+    code: grpc.StatusCode,
+    details: str
+) -> service_pb2.GameSessionReply.Error:
+    return service_pb2.GameSessionReply.Error(code=code.name, details=details)
+
+
+class RoomState:
+    __slots__ = (
+        "host",
+        "phase",
+        "ready_barrier",
+        "night_barrier",
+        "day_barrier",
+        "reap_handle",
+        "spectators",
+        "journal",
+        "timers",
+        "timeouts",
+        "deadline",
+        "on_deadline",
+        "missed",
+    )
+
+    def __init__(
+        self,
+        host: MafiaHost,
+        ready_timeout: tp.Optional[float] = None,
+        night_timeout: tp.Optional[float] = None,
+        day_timeout: tp.Optional[float] = None,
+        journal: tp.Optional[Journal] = None,
+        timers: tp.Optional[TimerWheel] = None,
+        on_deadline: tp.Optional[
+            tp.Callable[["RoomState", Phase], None]
+        ] = None
+    ) -> None:
+        self.host = host
+        self.phase = Phase.Lobby
+        self.ready_barrier = PhaseBarrier(
+            host.settings.capacity, self._start_the_game
+        )
+        self.night_barrier = PhaseBarrier(
+            host.users_number, self._start_the_day
+        )
+        self.day_barrier = PhaseBarrier(host.users_number, self._end_the_day)
+        self.reap_handle: tp.Optional[asyncio.TimerHandle] = None
+        self.spectators = 0
+        self.journal = journal
+        self.timers = timers
+        self.timeouts = {
+            Phase.Lobby: ready_timeout,
+            Phase.Night: night_timeout,
+            Phase.Day: day_timeout,
+        }
+        self.deadline: tp.Optional[Timer] = None
+        self.on_deadline = on_deadline
+        # Deadlines missed in a row, by player.
+        self.missed: dict[int, int] = {}
+
+    def joined(self) -> None:
+        self.night_barrier.parties = self.host.users_number
+        self.day_barrier.parties = self.host.users_number
+        if self.phase == Phase.Lobby:
+            # The time to get ready runs while the room is full.
+            if self.host.users_number < self.host.settings.capacity:
+                self.disarm()
+            elif self.deadline is None:
+                self.arm()
+
+    def arm(self) -> None:
+        self.disarm()
+        phase = self.current_phase
+        timeout = self.timeouts.get(phase)
+        if timeout is None or self.timers is None:
+            return
+        if phase == Phase.Lobby and \
+                self.host.users_number < self.host.settings.capacity:
+            return
+        self.deadline = self.timers.call_later(timeout, self._expired, phase)
+
+    def disarm(self) -> None:
+        if self.deadline is not None:
+            self.deadline.cancel()
+            self.deadline = None
+
+    def left(self, user_id: int) -> None:
+        self.missed.pop(user_id, None)
+        self.ready_barrier.withdraw(user_id)
+        self.night_barrier.withdraw(user_id)
+        self.day_barrier.withdraw(user_id)
+        self.joined()
+
+    def close(self) -> None:
+        self.disarm()
+        self.ready_barrier.close()
+        self.night_barrier.close()
+        self.day_barrier.close()
+        self.host.close()
+
+    @property
+    def current_phase(self) -> Phase:
+        if self.host.is_finished:
+            return Phase.Finished
+        return self.phase
+
+    def count_missed(self, barrier: PhaseBarrier) -> tp.List[int]:
+        # The players that did not make it to the barrier in time, with
+        # the deadlines they missed in a row.
+        late = []
+        for user_id in self.host.user_ids():
+            if user_id in barrier.arrived:
+                self.missed.pop(user_id, None)
+            else:
+                self.missed[user_id] = self.missed.get(user_id, 0) + 1
+                late.append(user_id)
+        return late
+
+    @property
+    def barrier_waiters(self) -> int:
+        return (
+            self.ready_barrier.waiting +
+            self.night_barrier.waiting +
+            self.day_barrier.waiting
+        )
+
+    def _start_the_game(self, expired: bool) -> None:
+        self.host.start_the_game()
+        self._set_phase(Phase.Night)
+
+    def _start_the_day(self, expired: bool) -> int:
+        if not expired:
+            self.missed.clear()
+        self._set_phase(Phase.Day)
+        return self.host.next_seq
+
+    def _end_the_day(self, expired: bool) -> tp.Tuple[bool, int]:
+        if not expired:
+            self.missed.clear()
+        if self.host.is_finished:
+            # A leave or a kick ended the game while the day was waited.
+            self.disarm()
+            return False, self.host.next_seq
+        self._set_phase(Phase.Night)
+        answer = self.host.end_the_day()
+        if self.host.is_finished:
+            self.disarm()
+        return answer, self.host.next_seq
+
+    def _set_phase(self, phase: Phase) -> None:
+        self.phase = phase
+        if self.journal is not None:
+            self.journal(RoomEvent.Phase, (phase.value,))
+        self.arm()
+
+    def _expired(self, phase: Phase) -> None:
+        self.deadline = None
+        if self.on_deadline is not None:
+            self.on_deadline(self, phase)
 
 
 class Mafia(service_pb2_grpc.MafiaServicer):
-    def __init__(self) -> None:
-        self._rooms: dict[str, MafiaHost] = {}
-        self._ready_to_start: dict[str, int] = {}
-        self._ready_to_game_cv: dict[str, asyncio.Condition] = {}
-        self._pass_night_cv: dict[str, asyncio.Condition] = {}
-        self._night_num: dict[str, int] = {}
-        self._day_cv: dict[str, asyncio.Condition] = {}
-        self._day_votes: dict[str, dict[int, int]] = {}
-        self._day_num: dict[str, int] = {}
-        self._day_flag: dict[str, bool] = {}
+    def __init__(
+        self,
+        config: tp.Optional[MafiaConfig] = None,
+        worker: int = 0,
+        workers: int = 1
+    ) -> None:
+        self._config = config if config is not None else MafiaConfig()
+        self._room_settings = room_settings(self._config)
+        self._stream_compression = channel_args.compression(
+            self._config.stream_compression
+        )
+        self._worker = worker
+        self._workers = workers
+        self._rooms: dict[str, RoomState] = {}
+        self._notifications_dropped = 0
+        self._streams_disconnected = 0
+        self._event_log: tp.Optional[EventLog] = None
+        self._open_rooms = OpenRoomIndex()
+        # One wheel runs the phase deadlines of all rooms.
+        self._timers = TimerWheel(self._config.timer_resolution)
+        self._deadlines_expired = {phase: 0 for phase in Phase}
 
-    async def CreateRoom(
+    async def recover(self) -> None:
+        if self._config.event_log_dir is None:
+            return
+        directory = self._config.event_log_dir
+        if self._workers > 1:
+            directory = os.path.join(directory, f"worker-{self._worker}")
+        self._event_log = EventLog(
+            directory,
+            self._config.fsync_interval,
+            self._config.snapshot_every
+        )
+        for record in self._event_log.recover():
+            self._apply(record)
+        for room_id, state in self._rooms.items():
+            journal = self._event_log.journal(room_id)
+            state.host.journal = journal
+            state.journal = journal
+            state.joined()
+            # The phases restart their time: players need to reconnect.
+            state.arm()
+            self._update_open_room(room_id, state)
+            self._schedule_reap(room_id, state)
+        self._event_log.open(self._compacted)
+        print(f"Recovered {len(self._rooms)} rooms", flush=True)
+
+    async def close(self) -> None:
+        await self._timers.close()
+        if self._event_log is not None:
+            await self._event_log.close()
+
+    async def wait_failure(self) -> None:
+        # Returns only when the event log fails, with its error.
+        if self._event_log is not None:
+            await self._event_log.wait()
+        await asyncio.get_running_loop().create_future()
+
+    def _apply(self, record: Record) -> None:
+        room_id, event, args = record
+        if event == RoomEvent.Created:
+            # Logs written before rooms had settings have no arguments.
+            self._rooms[room_id] = self._room(
+                room_id, RoomSettings(*args), recovered=True
+            )
+            return
+        state = self._rooms.get(room_id)
+        if state is None:
+            return
+        if event == RoomEvent.Deleted:
+            del self._rooms[room_id]
+            state.close()
+        elif event == RoomEvent.Phase:
+            state.phase = Phase(args[0])
+        else:
+            try:
+                state.host.replay(event, args)
+            except RuntimeError as e:
+                print(f"Cannot replay {event} in {room_id}: {e}", flush=True)
+
+    def _compacted(self) -> tp.Iterator[Record]:
+        for room_id, state in self._rooms.items():
+            yield room_id, RoomEvent.Created, _created(state.host.settings)
+            for event, args in state.host.compacted():
+                yield room_id, event, args
+            yield room_id, RoomEvent.Phase, (state.phase.value,)
+
+    def _room(
         self,
-        request: service_pb2.CreateRoomRequest,
-        context: grpc.ServicerContext
-    ) -> service_pb2.CreateRoomReply:
+        room_id: str,
+        settings: RoomSettings,
+        recovered: bool = False
+    ) -> RoomState:
+        # Recovered rooms get their journal after the replay.
+        journal = None
+        if self._event_log is not None and not recovered:
+            journal = self._event_log.journal(room_id)
+            journal(RoomEvent.Created, _created(settings))
+        notifications_capacity = max(
+            self._config.notifications_capacity,
+            NOTIFICATIONS_PER_PLAYER * settings.capacity
+        )
+        return RoomState(
+            MafiaHost(notifications_capacity, journal, settings),
+            self._config.ready_timeout,
+            self._config.night_timeout,
+            self._config.day_timeout,
+            journal,
+            self._timers,
+            lambda state, phase: self._expire(room_id, state, phase)
+        )
+
+    def _create_room(
+        self,
+        nickname: str,
+        settings: RoomSettings
+    ) -> tp.Tuple[str, int]:
         room_id = uuid4().hex
-        while room_id in self._rooms:
+        while (
+            room_id in self._rooms or
+            shard_of(room_id, self._workers) != self._worker
+        ):
             room_id = uuid4().hex
-        self._rooms[room_id] = MafiaHost()
-        self._ready_to_start[room_id] = 0
-        self._ready_to_game_cv[room_id] = asyncio.Condition()
-        self._night_num[room_id] = 0
-        self._pass_night_cv[room_id] = asyncio.Condition()
-        self._day_cv[room_id] = asyncio.Condition()
-        self._day_votes[room_id] = {}
-        self._day_num[room_id] = 0
-        self._day_flag[room_id] = False
-        user_id = self._rooms[room_id].join(request.nickname)
+        state = self._room(room_id, settings)
+        self._rooms[room_id] = state
+        user_id = state.host.join(nickname)
+        state.joined()
+        self._update_open_room(room_id, state)
+        print(
+            f"Created new room: [{room_id}] by [{nickname}|{user_id}]",
+            flush=True
+        )
+        return room_id, user_id
+
+    def _join(self, room_id: str, state: RoomState, nickname: str) -> int:
+        user_id = state.host.join(nickname)
+        state.joined()
+        self._cancel_reap(state)
+        self._update_open_room(room_id, state)
         print(
-            f"Created new room: [{room_id}] by [{request.nickname}|{user_id}]",
+            f"[{nickname}|{user_id}] connected to the room: {room_id}",
             flush=True
         )
+        return user_id
+
+    def _update_open_room(self, room_id: str, state: RoomState) -> None:
+        self._open_rooms.update(
+            room_id,
+            state.host.users_number,
+            state.host.settings.capacity,
+            state.phase == Phase.Lobby
+        )
+
+    async def CreateRoom(
+        self,
+        request: service_pb2.CreateRoomRequest,
+        context: grpc.ServicerContext
+    ) -> service_pb2.CreateRoomReply:
+        await self._check_nickname(request.nickname, context)
+        capacity = request.capacity or self._config.room_size
+        if capacity > self._config.max_room_size:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Room size is limited to {self._config.max_room_size}"
+            )
+        try:
+            settings = RoomSettings(
+                capacity,
+                request.mafia if request.HasField("mafia") else None,
+                request.officers if request.HasField("officers") else 1
+            )
+        except MafiaRoomError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        room_id, user_id = self._create_room(request.nickname, settings)
         return service_pb2.CreateRoomReply(
             user_id=user_id,
             room_id=room_id
@@ -54,59 +599,114 @@ class Mafia(service_pb2_grpc.MafiaServicer):
         request: service_pb2.JoinToRoomRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.JoinToRoomReply:
-        await self._check_the_room_id(request.room_id, context)
-        if self._rooms[request.room_id].users_number == 5:
+        await self._check_nickname(request.nickname, context)
+        state = await self._room_state(request.room_id, context)
+        if state.host.users_number >= state.host.settings.capacity:
             await context.abort(grpc.StatusCode.UNAVAILABLE, "Room is full")
-        user_id = self._rooms[request.room_id]\
-            .join(request.nickname)
-        print(
-            f"[{request.nickname}|{user_id}] connected "
-            f"to the room: {request.room_id}",
-            flush=True
-        )
         return service_pb2.JoinToRoomReply(
-            user_id=user_id
+            user_id=self._join(request.room_id, state, request.nickname)
+        )
+
+    async def FindGame(
+        self,
+        request: service_pb2.FindGameRequest,
+        context: grpc.ServicerContext
+    ) -> service_pb2.FindGameReply:
+        await self._check_nickname(request.nickname, context)
+        room = self._open_rooms.best()
+        if room is None:
+            room_id, user_id = self._create_room(
+                request.nickname, self._room_settings
+            )
+        else:
+            room_id = room.room_id
+            user_id = self._join(
+                room_id, self._rooms[room_id], request.nickname
+            )
+        return service_pb2.FindGameReply(user_id=user_id, room_id=room_id)
+
+    async def ListOpenRooms(
+        self,
+        request: service_pb2.ListOpenRoomsRequest,
+        context: grpc.ServicerContext
+    ) -> service_pb2.ListOpenRoomsReply:
+        after = -1
+        if request.page_token:
+            try:
+                after = int(request.page_token)
+            except ValueError:
+                await context.abort(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    "Invalid page token"
+                )
+        page_size = request.page_size or DEFAULT_PAGE_SIZE
+        rooms, last = self._open_rooms.page(
+            after, min(page_size, MAX_PAGE_SIZE)
+        )
+        return service_pb2.ListOpenRoomsReply(
+            rooms=[
+                service_pb2.ListOpenRoomsReply.Room(
+                    room_id=room.room_id,
+                    players=room.players,
+                    capacity=room.capacity
+                )
+                for room in rooms
+            ],
+            next_page_token="" if last is None else str(last)
         )
 
     async def SubscribeOnNotifications(
         self,
         request: service_pb2.SubscribeOnNotificationsRequest,
         context: grpc.ServicerContext
-    ) -> tp.AsyncIterable[service_pb2.SubscribeOnNotificationsReply]:
-        await self._check_the_room_id(request.room_id, context)
-        async for notification in self._rooms[request.room_id].notifications():
-            yield service_pb2.SubscribeOnNotificationsReply(
-                type=notification.type.value,
-                data=notification.data
+    ) -> tp.AsyncIterable[bytes]:
+        state = await self._room_state(request.room_id, context)
+        from_seq = request.from_seq if request.HasField("from_seq") else 0
+        async for reply in self._notification_stream(
+            state, from_seq, request.typed, context
+        ):
+            yield reply
+
+    async def Spectate(
+        self,
+        request: service_pb2.SpectateRequest,
+        context: grpc.ServicerContext
+    ) -> tp.AsyncIterable[bytes]:
+        state = await self._room_state(request.room_id, context)
+        if state.spectators >= self._config.max_spectators:
+            await context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                "Too many spectators"
             )
+        # A spectator is only a cursor in the room's notification log: it
+        # is not a user of the room, and one that falls behind the log is
+        # sent a snapshot instead of holding back the players.
+        from_seq = request.from_seq if request.HasField("from_seq") else 0
+        state.spectators += 1
+        try:
+            async for reply in self._notification_stream(
+                state, from_seq, True, context
+            ):
+                yield reply
+        finally:
+            state.spectators -= 1
 
     async def LeaveRoom(
         self,
         request: service_pb2.LeaveRoomRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.LeaveRoomReply:
-        await self._check_the_room_id(request.room_id, context)
-        self._rooms[request.room_id].leave(request.user_id)
-        return service_pb2.LeaveRoomReply()
+        state = await self._room_state(request.room_id, context)
+        return self._leave(request.room_id, state, request.user_id)
 
     async def ReadyToStart(
         self,
         request: service_pb2.ReadyToStartRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.ReadyToStartReply:
-        room_id = request.room_id
-        await self._check_the_room_id(room_id, context)
-        self._ready_to_start[room_id] += 1
-        if self._ready_to_start[room_id] == 5:
-            self._rooms[room_id].start_the_game()
-            async with self._ready_to_game_cv[room_id]:
-                self._ready_to_game_cv[room_id].notify_all()
-        else:
-            async with self._ready_to_game_cv[room_id]:
-                await self._ready_to_game_cv[room_id].wait()
-        return service_pb2.ReadyToStartReply(
-            role=self._rooms[room_id]
-            .player_role(request.user_id).value
+        state = await self._room_state(request.room_id, context)
+        return await self._perform(
+            self._ready(state, request.user_id), context
         )
 
     async def Kill(
@@ -114,31 +714,26 @@ class Mafia(service_pb2_grpc.MafiaServicer):
         request: service_pb2.KillRequest,
         context: grpc.ServicerContext
     ):
-        await self._check_the_room_id(request.room_id, context)
-        room = self._rooms[request.room_id]
-        if not room.is_mafia(request.user_id):
-            await context.abort(
-                grpc.StatusCode.INVALID_ARGUMENT,
-                "You are not a mafia"
-            )
-        room.kill_player(request.user_id_to_kill)
-        return service_pb2.KillReply()
+        state = await self._room_state(request.room_id, context)
+        return await self._perform(
+            self._kill(
+                request.room_id,
+                state,
+                request.user_id,
+                request.user_id_to_kill
+            ),
+            context
+        )
 
     async def IsKiller(
         self,
         request: service_pb2.IsKillerRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.IsKillerReply:
-        await self._check_the_room_id(request.room_id, context)
-        room = self._rooms[request.room_id]
-        if not room.is_officer(request.user_id):
-            await context.abort(
-                grpc.StatusCode.INVALID_ARGUMENT,
-                "You are not a officer"
-            )
-        answer = room.is_mafia(request.user_id_to_check)
-        return service_pb2.IsKillerReply(
-            answer=answer
+        state = await self._room_state(request.room_id, context)
+        return await self._perform(
+            self._is_killer(state, request.user_id, request.user_id_to_check),
+            context
         )
 
     async def Night(
@@ -146,84 +741,821 @@ class Mafia(service_pb2_grpc.MafiaServicer):
         request: service_pb2.NightRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.NightReply:
-        room_id = request.room_id
-        await self._check_the_room_id(room_id, context)
-        self._night_num[room_id] += 1
-        if self._night_num[room_id] == self._rooms[room_id].users_number:
-            self._night_num[room_id] = 0
-            async with self._pass_night_cv[room_id]:
-                self._pass_night_cv[room_id].notify_all()
-        else:
-            async with self._pass_night_cv[room_id]:
-                await self._pass_night_cv[room_id].wait()
-        return service_pb2.NightReply()
+        state = await self._room_state(request.room_id, context)
+        return await self._perform(
+            self._night(state, request.user_id), context
+        )
 
     async def Day(
         self,
         request: service_pb2.DayRequest,
         context: grpc.ServicerContext
     ) -> service_pb2.DayReply:
-        room_id = request.room_id
-        await self._check_the_room_id(room_id, context)
-        self._day_num[room_id] += 1
-        if request.user_id != request.user_id_to_kill:
-            self._rooms[room_id].player_role(request.user_id_to_kill)
-            if request.user_id_to_kill not in self._day_votes[room_id]:
-                self._day_votes[room_id][request.user_id_to_kill] = 0
-            self._day_votes[room_id][request.user_id_to_kill] += 1
-        if self._day_num[room_id] == self._rooms[room_id].users_number:
-            self._day_num[room_id] = 0
-            self._day_flag[room_id] = True
-            v = max(self._day_votes[room_id].values())
-            k = None
-            for k_, v_ in self._day_votes[room_id].items():
-                if v_ == v:
-                    if k is not None:
-                        self._day_flag[room_id] = False
-                        break
-                    k = k_
-            if self._day_flag[room_id]:
-                self._rooms[room_id].kill_player(k)
-            async with self._day_cv[room_id]:
-                self._day_cv[room_id].notify_all()
-        else:
-            async with self._day_cv[room_id]:
-                await self._day_cv[room_id].wait()
-        return service_pb2.DayReply(
-            answer=self._day_flag[room_id]
+        state = await self._room_state(request.room_id, context)
+        return await self._perform(
+            self._day(
+                request.room_id,
+                state,
+                request.user_id,
+                request.user_id_to_kill
+            ),
+            context
         )
 
-    async def _check_the_room_id(
+    async def GameSession(
+        self,
+        request_iterator: tp.AsyncIterator[service_pb2.GameSessionRequest],
+        context: grpc.ServicerContext
+    ) -> tp.AsyncIterable[tp.Union[bytes, service_pb2.GameSessionReply]]:
+        requests = request_iterator.__aiter__()
+        try:
+            request = await requests.__anext__()
+        except StopAsyncIteration:
+            return
+        if request.WhichOneof("action") != "bind":
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "Session must start with bind"
+            )
+        bind = request.bind
+        state = await self._room_state(bind.room_id, context)
+        self._compress_stream(context)
+        if not state.host.has_user(bind.user_id):
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "Unknow user id"
+            )
+        # Notifications and action replies are interleaved on the one
+        # stream; the replies go ahead of the queued notifications.
+        queue = self._outbound_queue()
+        from_seq = bind.from_seq if bind.HasField("from_seq") else 0
+        tasks = [
+            asyncio.ensure_future(
+                self._pump_notifications(state, from_seq, queue, context)
+            ),
+            asyncio.ensure_future(self._session_actions(
+                requests, bind.room_id, state, bind.user_id, queue
+            )),
+        ]
+        try:
+            async for item in queue:
+                if isinstance(item, tuple):
+                    yield encoded_session_notification(*item)
+                elif isinstance(item, Gap):
+                    yield service_pb2.GameSessionReply(
+                        notification=gap_reply(item, True)
+                    )
+                else:
+                    yield item
+            # Fail the stream if the actions ended with an error.
+            await tasks[1]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _compress_stream(self, context: grpc.ServicerContext) -> None:
+        if self._stream_compression is not None:
+            context.set_compression(self._stream_compression)
+
+    def _outbound_queue(self) -> OutboundQueue:
+        return OutboundQueue(
+            self._config.stream_queue_size,
+            self._config.overflow_policy
+        )
+
+    async def _notification_stream(
+        self,
+        state: RoomState,
+        from_seq: int,
+        typed: bool,
+        context: grpc.ServicerContext
+    ) -> tp.AsyncIterable[bytes]:
+        self._compress_stream(context)
+        queue = self._outbound_queue()
+        pump = asyncio.ensure_future(
+            self._pump_notifications(state, from_seq, queue, context)
+        )
+        pump.add_done_callback(lambda _: queue.close())
+        try:
+            async for item in queue:
+                if isinstance(item, Gap):
+                    yield gap_reply(item, typed).SerializeToString()
+                else:
+                    yield encoded_notification(*item, typed)
+        finally:
+            pump.cancel()
+
+    async def _pump_notifications(
+        self,
+        state: RoomState,
+        from_seq: int,
+        queue: OutboundQueue,
+        context: grpc.ServicerContext
+    ) -> None:
+        # The stream's writer may be stuck behind a client that does not
+        # read: the queue between them decides what happens then.
+        try:
+            async for item in state.host.notifications(from_seq):
+                self._notifications_dropped += await queue.put(item)
+        except SlowConsumerError as e:
+            self._streams_disconnected += 1
+            queue.close()
+            try:
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+            except grpc.aio.AbortError:
+                pass
+
+    async def _session_actions(
+        self,
+        requests: tp.AsyncIterator[service_pb2.GameSessionRequest],
+        room_id: str,
+        state: RoomState,
+        user_id: int,
+        queue: OutboundQueue
+    ) -> None:
+        # Actions of one player are handled one after another, just as
+        # the player would wait for each unary reply.
+        try:
+            async for request in requests:
+                action = request.WhichOneof("action")
+                try:
+                    if self._rooms.get(room_id) is not state:
+                        raise ActionError(
+                            grpc.StatusCode.INVALID_ARGUMENT,
+                            "Unknow id room"
+                        )
+                    if action == "ready":
+                        reply = {"ready": await self._ready(state, user_id)}
+                    elif action == "kill":
+                        reply = {"kill": await self._kill(
+                            room_id, state, user_id,
+                            request.kill.user_id_to_kill
+                        )}
+                    elif action == "is_killer":
+                        reply = {"is_killer": await self._is_killer(
+                            state, user_id, request.is_killer.user_id_to_check
+                        )}
+                    elif action == "night":
+                        reply = {"night": await self._night(state, user_id)}
+                    elif action == "day":
+                        reply = {"day": await self._day(
+                            room_id, state, user_id,
+                            request.day.user_id_to_kill
+                        )}
+                    elif action == "leave":
+                        queue.put_control(service_pb2.GameSessionReply(
+                            leave=self._leave(room_id, state, user_id)
+                        ))
+                        return
+                    else:
+                        raise ActionError(
+                            grpc.StatusCode.INVALID_ARGUMENT,
+                            f"Unexpected action: {action}"
+                        )
+                except ActionError as e:
+                    reply = {"error": _session_error(e.code, e.details)}
+                except (MafiaHostError, MafiaRoomError) as e:
+                    reply = {"error": _session_error(
+                        grpc.StatusCode.INVALID_ARGUMENT, str(e)
+                    )}
+                queue.put_control(service_pb2.GameSessionReply(**reply))
+        finally:
+            queue.close()
+
+    def _leave(
+        self,
+        room_id: str,
+        state: RoomState,
+        user_id: int
+    ) -> service_pb2.LeaveRoomReply:
+        state.host.leave(user_id)
+        state.left(user_id)
+        self._update_open_room(room_id, state)
+        self._schedule_reap(room_id, state)
+        return service_pb2.LeaveRoomReply()
+
+    async def _ready(
+        self,
+        state: RoomState,
+        user_id: int
+    ) -> service_pb2.ReadyToStartReply:
+        # A player kicked from the lobby must not count as ready.
+        if not state.host.has_user(user_id):
+            raise ActionError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "Unknow user id"
+            )
+        await self._pass_barrier(state.ready_barrier, user_id)
+        return service_pb2.ReadyToStartReply(
+            role=state.host.player_role(user_id).value
+        )
+
+    async def _kill(
+        self,
+        room_id: str,
+        state: RoomState,
+        user_id: int,
+        user_id_to_kill: int
+    ) -> service_pb2.KillReply:
+        self._check_phase(state, Phase.Night)
+        room = state.host
+        if not room.is_mafia(user_id):
+            raise ActionError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "You are not a mafia"
+            )
+        self._check_target(state, user_id_to_kill)
+        room.kill_player(user_id_to_kill)
+        self._schedule_reap(room_id, state)
+        return service_pb2.KillReply()
+
+    async def _is_killer(
+        self,
+        state: RoomState,
+        user_id: int,
+        user_id_to_check: int
+    ) -> service_pb2.IsKillerReply:
+        room = state.host
+        if not room.is_officer(user_id):
+            raise ActionError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                "You are not a officer"
+            )
+        self._check_target(state, user_id_to_check)
+        return service_pb2.IsKillerReply(
+            answer=room.is_mafia(user_id_to_check)
+        )
+
+    async def _night(
+        self,
+        state: RoomState,
+        user_id: int
+    ) -> service_pb2.NightReply:
+        self._check_phase(state, Phase.Night)
+        next_seq = await self._pass_barrier(state.night_barrier, user_id)
+        return service_pb2.NightReply(next_seq=next_seq)
+
+    async def _day(
         self,
         room_id: str,
+        state: RoomState,
+        user_id: int,
+        user_id_to_kill: int
+    ) -> service_pb2.DayReply:
+        self._check_phase(state, Phase.Day)
+        try:
+            if user_id != user_id_to_kill:
+                state.host.vote(user_id, user_id_to_kill)
+            else:
+                state.host.retract_vote(user_id)
+        except MafiaHostError as e:
+            raise ActionError(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        answer, next_seq = await self._pass_barrier(
+            state.day_barrier, user_id
+        )
+        if answer:
+            self._schedule_reap(room_id, state)
+        return service_pb2.DayReply(
+            answer=answer,
+            next_seq=next_seq
+        )
+
+    async def _check_nickname(
+        self,
+        nickname: str,
         context: grpc.ServicerContext
     ) -> None:
-        if room_id not in self._rooms:
+        if len(nickname.encode()) > MAX_NICKNAME_LENGTH:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Nickname is limited to {MAX_NICKNAME_LENGTH} bytes"
+            )
+
+    async def _room_state(
+        self,
+        room_id: str,
+        context: grpc.ServicerContext
+    ) -> RoomState:
+        state = self._rooms.get(room_id)
+        if state is None:
             await context.abort(
                 grpc.StatusCode.INVALID_ARGUMENT,
                 "Unknow id room"
             )
+        return state
+
+    async def _perform(
+        self,
+        action: tp.Awaitable,
+        context: grpc.ServicerContext
+    ) -> tp.Any:
+        try:
+            return await action
+        except ActionError as e:
+            await context.abort(e.code, e.details)
+        except (MafiaHostError, MafiaRoomError) as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+    def _check_phase(self, state: RoomState, phase: Phase) -> None:
+        # A player late for a phase that ran out of time must not act in
+        # the next one, nor count as arrived at its barrier.
+        if state.current_phase != phase:
+            raise ActionError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                f"It is not {phase.value}: the room is in "
+                f"{state.current_phase.value}"
+            )
+
+    def _check_target(self, state: RoomState, user_id: int) -> None:
+        if not state.host.has_user(user_id):
+            raise ActionError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Player {user_id} is not in the room"
+            )
+
+    async def _pass_barrier(
+        self,
+        barrier: PhaseBarrier,
+        user_id: int
+    ) -> tp.Any:
+        try:
+            return await barrier.wait(user_id)
+        except PhaseBarrierError as e:
+            raise ActionError(grpc.StatusCode.ABORTED, str(e))
+
+    def _expire(self, room_id: str, state: RoomState, phase: Phase) -> None:
+        if self._rooms.get(room_id) is not state or \
+                state.current_phase != phase:
+            return
+        self._deadlines_expired[phase] += 1
+        state.host.deadline(phase.value)
+        print(f"{phase.value} deadline expired in {room_id}", flush=True)
+        if phase == Phase.Lobby:
+            # Free the seats of the players that are not ready.
+            ready = state.ready_barrier.arrived
+            for user_id in state.host.user_ids():
+                if user_id not in ready:
+                    self._leave(room_id, state, user_id)
+            return
+        if phase == Phase.Night:
+            # Whoever did not act skips the night.
+            late = state.count_missed(state.night_barrier)
+            state.night_barrier.expire()
+        else:
+            # Whoever did not vote abstains.
+            late = state.count_missed(state.day_barrier)
+            state.day_barrier.expire()
+        # Players that stopped playing are kicked: a room whose players
+        # are all gone ends instead of going through the phases forever.
+        limit = self._config.max_missed_deadlines
+        for user_id in late:
+            if limit and state.missed.get(user_id, 0) >= limit and \
+                    state.host.has_user(user_id):
+                print(
+                    f"[{user_id}] missed {limit} deadlines in {room_id}",
+                    flush=True
+                )
+                self._leave(room_id, state, user_id)
+        self._schedule_reap(room_id, state)
+
+    def _schedule_reap(self, room_id: str, state: RoomState) -> None:
+        if state.reap_handle is not None:
+            return
+        if state.host.is_finished or state.host.users_number == 0:
+            state.reap_handle = asyncio.get_running_loop().call_later(
+                self._config.reap_grace_period, self._reap, room_id
+            )
+
+    def _cancel_reap(self, state: RoomState) -> None:
+        if state.reap_handle is not None:
+            state.reap_handle.cancel()
+            state.reap_handle = None
+
+    def _reap(self, room_id: str) -> None:
+        state = self._rooms.get(room_id)
+        if state is None:
+            return
+        state.reap_handle = None
+        if not (state.host.is_finished or state.host.users_number == 0):
+            return
+        del self._rooms[room_id]
+        self._open_rooms.discard(room_id)
+        state.close()
+        if state.journal is not None:
+            state.journal(RoomEvent.Deleted, ())
+        print(f"{room_id} room is deleted", flush=True)
+
+    def collect_metrics(self) -> tp.Iterator[Sample]:
+        phases = {phase: 0 for phase in Phase}
+        waiters = 0
+        notifications = 0
+        spectators = 0
+        for state in self._rooms.values():
+            phases[state.current_phase] += 1
+            spectators += state.spectators
+            waiters += state.barrier_waiters
+            notifications += state.host.notifications_number
+        yield "mafia_rooms", {}, len(self._rooms)
+        yield "mafia_open_rooms", {}, len(self._open_rooms)
+        for phase, rooms in phases.items():
+            yield "mafia_rooms_by_phase", {"phase": phase.value}, rooms
+        yield "mafia_barrier_waiters", {}, waiters
+        yield "mafia_pending_deadlines", {}, len(self._timers)
+        for phase in (Phase.Lobby, Phase.Night, Phase.Day):
+            yield "mafia_deadlines_expired_total", {"phase": phase.value}, \
+                self._deadlines_expired[phase]
+        yield "mafia_spectators", {}, spectators
+        yield "mafia_notification_log_entries", {}, notifications
+        yield "mafia_notifications_dropped_total", {}, \
+            self._notifications_dropped
+        yield "mafia_streams_disconnected_total", {}, \
+            self._streams_disconnected
+
 
+def _metrics(mafia: Mafia) -> tp.Tuple[Metrics, MetricsInterceptor]:
+    metrics = Metrics()
+    interceptor = MetricsInterceptor(metrics)
+    metrics.describe(
+        "mafia_rooms", "gauge", "Rooms held by the server."
+    )
+    metrics.describe(
+        "mafia_open_rooms", "gauge",
+        "Rooms in the lobby with free seats."
+    )
+    metrics.describe(
+        "mafia_rooms_by_phase", "gauge", "Rooms by game phase."
+    )
+    metrics.describe(
+        "mafia_barrier_waiters", "gauge",
+        "Players waiting for the other players to finish a phase."
+    )
+    metrics.describe(
+        "mafia_pending_deadlines", "gauge",
+        "Phase deadlines waiting on the timer wheel."
+    )
+    metrics.describe(
+        "mafia_deadlines_expired_total", "counter",
+        "Phases that ran out of time, by phase."
+    )
+    metrics.describe(
+        "mafia_spectators", "gauge", "Spectators watching the rooms."
+    )
+    metrics.describe(
+        "mafia_notification_log_entries", "gauge",
+        "Notifications kept in the logs of all rooms."
+    )
+    metrics.describe(
+        "mafia_notifications_dropped_total", "counter",
+        "Notifications dropped from the queues of slow streams."
+    )
+    metrics.describe(
+        "mafia_streams_disconnected_total", "counter",
+        "Streams disconnected for not keeping up with notifications."
+    )
+    metrics.register_collector(mafia.collect_metrics)
+    return metrics, interceptor
+
+
+def _server_options(
+    server_config: ServerConfig
+) -> tp.List[tp.Tuple[str, tp.Any]]:
+    options: tp.List[tp.Tuple[str, tp.Any]] = [
+        ("grpc.so_reuseport", 1),
+        (
+            "grpc.server.max_pending_requests",
+            server_config.max_pending_requests
+        ),
+        (
+            "grpc.server.max_pending_requests_hard_limit",
+            server_config.max_pending_requests
+        ),
+    ]
+    options += channel_args.keepalive(
+        server_config.keepalive_time, server_config.keepalive_timeout
+    )
+    if server_config.idle_timeout is not None:
+        options.append((
+            "grpc.max_connection_idle_ms",
+            channel_args.ms(server_config.idle_timeout)
+        ))
+    if server_config.max_concurrent_streams is not None:
+        options.append((
+            "grpc.max_concurrent_streams",
+            server_config.max_concurrent_streams
+        ))
+    options += channel_args.flow_control(server_config.flow_control_window)
+    options += channel_args.message_size(server_config.max_message_size)
+    return options
 
-async def run(host: str, port: int):
-    server = grpc.aio.server()
-    service_pb2_grpc.add_MafiaServicer_to_server(
-        Mafia(), server
+
+async def serve(
+    host: str,
+    port: int,
+    mafia: Mafia,
+    server_config: ServerConfig,
+    servicer: tp.Optional[service_pb2_grpc.MafiaServicer] = None,
+    private_address: tp.Optional[str] = None,
+    worker: int = 0
+):
+    interceptors = []
+    if server_config.metrics_port is not None:
+        metrics, interceptor = _metrics(mafia)
+        interceptors.append(interceptor)
+        metrics_port = server_config.metrics_port + worker
+        await serve_metrics(metrics, server_config.metrics_host, metrics_port)
+        print(
+            f"Metrics are served on "
+            f"{server_config.metrics_host}:{metrics_port}",
+            flush=True
+        )
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        options=_server_options(server_config),
+        maximum_concurrent_rpcs=server_config.maximum_concurrent_rpcs,
+        compression=channel_args.compression(server_config.compression)
     )
+    add_servicer(servicer if servicer is not None else mafia, server)
     server.add_insecure_port(f"{host}:{port}")
+    if private_address is not None:
+        server.add_insecure_port(private_address)
     await server.start()
+    return server
+
+
+async def serve_until_failure(
+    server: grpc.aio.Server,
+    mafia: Mafia
+) -> None:
+    # A server whose event log failed must not acknowledge actions it
+    # cannot persist any more: it stops.
+    termination = asyncio.ensure_future(server.wait_for_termination())
+    failure = asyncio.ensure_future(mafia.wait_failure())
+    await asyncio.wait(
+        {termination, failure},
+        return_when=asyncio.FIRST_COMPLETED
+    )
+    if not failure.done():
+        failure.cancel()
+        return
+    await server.stop(None)
+    await termination
+    failure.result()
+
+
+async def run(
+    host: str,
+    port: int,
+    config: MafiaConfig,
+    server_config: ServerConfig
+):
+    mafia = Mafia(config)
+    await mafia.recover()
+    server = await serve(host, port, mafia, server_config)
     print(f"Server is started on {host}:{port}", flush=True)
-    await server.wait_for_termination()
+    try:
+        await serve_until_failure(server, mafia)
+    finally:
+        await mafia.close()
+
+
+async def run_worker(
+    host: str,
+    port: int,
+    config: MafiaConfig,
+    server_config: ServerConfig,
+    worker: int,
+    peers: list[str]
+):
+    # Every worker listens on the shared public port (the kernel spreads
+    # connections between them) and on its own private address, which
+    # the other workers use to forward calls for the rooms it owns.
+    mafia = Mafia(config, worker, len(peers))
+    await mafia.recover()
+    router = ShardRouter(
+        mafia,
+        worker,
+        peers,
+        channel_args.message_size(server_config.max_message_size),
+        channel_args.compression(config.stream_compression)
+    )
+    server = await serve(
+        host, port, mafia, server_config, router, peers[worker], worker
+    )
+    print(f"Worker {worker} is started on {host}:{port}", flush=True)
+    try:
+        await serve_until_failure(server, mafia)
+    finally:
+        await router.close()
+        await mafia.close()
+
+
+def _worker_main(
+    host: str,
+    port: int,
+    config: MafiaConfig,
+    server_config: ServerConfig,
+    worker: int,
+    peers: list[str]
+) -> None:
+    try:
+        run_loop(
+            run_worker(host, port, config, server_config, worker, peers),
+            server_config.uvloop
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(
+    host: str,
+    port: int,
+    config: MafiaConfig,
+    server_config: ServerConfig,
+    workers: int
+) -> None:
+    with tempfile.TemporaryDirectory(prefix="mafia-") as sockets:
+        peers = [f"unix:{sockets}/worker-{i}.sock" for i in range(workers)]
+        ctx = multiprocessing.get_context("spawn")
+        processes = [
+            ctx.Process(
+                target=_worker_main,
+                args=(host, port, config, server_config, worker, peers),
+                daemon=True
+            )
+            for worker in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+
+def run_loop(main: tp.Awaitable, use_uvloop: bool = False) -> tp.Any:
+    if use_uvloop:
+        # An optional dependency: only needed when asked for.
+        import uvloop
+        uvloop.install()
+    return asyncio.run(main)
+
+
+def _deadline(
+    ctx: click.Context,
+    param: click.Parameter,
+    value: str
+) -> tp.Optional[float]:
+    if value.lower() in ("0", "none", "off"):
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        raise click.BadParameter(f"{value} is not a number of seconds")
+    if timeout <= 0:
+        return None
+    return timeout
 
 
 @click.command()
 @click.option("--host", default="0.0.0.0", type=str)
 @click.option("--port", default=50051, type=int)
+@click.option("--notifications-capacity", default=256, type=int)
+@click.option("--room-size", default=ROOM_SIZE, type=int)
+@click.option("--max-room-size", default=1000, type=int)
+@click.option("--reap-grace-period", default=60.0, type=float)
+@click.option(
+    "--ready-timeout",
+    default="120",
+    callback=_deadline,
+    help="Seconds, 0 or none for no deadline."
+)
+@click.option(
+    "--night-timeout",
+    default="60",
+    callback=_deadline,
+    help="Seconds, 0 or none for no deadline."
+)
+@click.option(
+    "--day-timeout",
+    default="120",
+    callback=_deadline,
+    help="Seconds, 0 or none for no deadline."
+)
+@click.option(
+    "--max-missed-deadlines",
+    default=2,
+    type=int,
+    help="Kick the players that miss as many deadlines in a row, 0 never."
+)
+@click.option("--timer-resolution", default=0.1, type=float)
+@click.option("--max-spectators", default=10000, type=int)
+@click.option("--stream-queue-size", default=64, type=int)
+@click.option(
+    "--overflow-policy",
+    default=OverflowPolicy.Block.value,
+    type=click.Choice([policy.value for policy in OverflowPolicy])
+)
+@click.option("--event-log-dir", default=None, type=str)
+@click.option("--fsync-interval", default=0.05, type=float)
+@click.option("--snapshot-every", default=100000, type=int)
+@click.option("--workers", default=1, type=int)
+@click.option("--metrics-host", default="127.0.0.1", type=str)
+@click.option("--metrics-port", default=None, type=int)
+@click.option("--max-pending-requests", default=10000, type=int)
+@click.option("--keepalive-time", default=60.0, type=float)
+@click.option("--keepalive-timeout", default=20.0, type=float)
+@click.option("--idle-timeout", default=None, type=float)
+@click.option("--maximum-concurrent-rpcs", default=None, type=int)
+@click.option("--max-concurrent-streams", default=None, type=int)
+@click.option("--flow-control-window", default=None, type=int)
+@click.option("--max-message-size", default=None, type=int)
+@click.option(
+    "--compression",
+    default=None,
+    type=click.Choice(list(channel_args.COMPRESSION))
+)
+@click.option(
+    "--stream-compression",
+    default=None,
+    type=click.Choice(list(channel_args.COMPRESSION)),
+    help="Of the notification streams, instead of --compression."
+)
+@click.option("--uvloop", "use_uvloop", is_flag=True)
 def main(
     host: str,
     port: int,
+    notifications_capacity: int,
+    room_size: int,
+    max_room_size: int,
+    reap_grace_period: float,
+    ready_timeout: tp.Optional[float],
+    night_timeout: tp.Optional[float],
+    day_timeout: tp.Optional[float],
+    max_missed_deadlines: int,
+    timer_resolution: float,
+    max_spectators: int,
+    stream_queue_size: int,
+    overflow_policy: str,
+    event_log_dir: tp.Optional[str],
+    fsync_interval: float,
+    snapshot_every: int,
+    workers: int,
+    metrics_host: str,
+    metrics_port: tp.Optional[int],
+    max_pending_requests: int,
+    keepalive_time: float,
+    keepalive_timeout: float,
+    idle_timeout: tp.Optional[float],
+    maximum_concurrent_rpcs: tp.Optional[int],
+    max_concurrent_streams: tp.Optional[int],
+    flow_control_window: tp.Optional[int],
+    max_message_size: tp.Optional[int],
+    compression: tp.Optional[str],
+    stream_compression: tp.Optional[str],
+    use_uvloop: bool,
 ) -> None:
-    asyncio.run(run(host, port))
+    config = MafiaConfig(
+        notifications_capacity,
+        room_size,
+        max_room_size,
+        reap_grace_period,
+        ready_timeout,
+        night_timeout,
+        day_timeout,
+        max_missed_deadlines,
+        timer_resolution,
+        max_spectators,
+        stream_queue_size,
+        OverflowPolicy(overflow_policy),
+        event_log_dir,
+        fsync_interval,
+        snapshot_every,
+        stream_compression
+    )
+    try:
+        room_settings(config)
+    except MafiaRoomError as e:
+        raise click.BadParameter(str(e), param_hint="'--room-size'")
+    server_config = ServerConfig(
+        metrics_host,
+        metrics_port,
+        max_pending_requests,
+        keepalive_time,
+        keepalive_timeout,
+        idle_timeout,
+        maximum_concurrent_rpcs,
+        max_concurrent_streams,
+        flow_control_window,
+        max_message_size,
+        compression,
+        use_uvloop
+    )
+    if workers > 1:
+        run_workers(host, port, config, server_config, workers)
+    else:
+        run_loop(run(host, port, config, server_config), use_uvloop)
 
 
 if __name__ == "__main__":
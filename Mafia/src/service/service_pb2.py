@@ -2,6 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: service.proto
 """Generated protocol buffer code."""
+from google.protobuf.internal import enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import message as _message
@@ -14,18 +15,38 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rservice.proto\x12\x05mafia\"%\n\x11\x43reateRoomRequest\x12\x10\n\x08nickname\x18\x01 \x01(\t\"3\n\x0f\x43reateRoomReply\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"6\n\x11JoinToRoomRequest\x12\x10\n\x08nickname\x18\x01 \x01(\t\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\"\n\x0fJoinToRoomReply\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\"7\n\x13ReadyToStartRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"!\n\x11ReadyToStartReply\x12\x0c\n\x04role\x18\x01 \x01(\t\"C\n\x1fSubscribeOnNotificationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\";\n\x1dSubscribeOnNotificationsReply\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\"4\n\x10LeaveRoomRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\x10\n\x0eLeaveRoomReply\"H\n\x0bKillRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x17\n\x0fuser_id_to_kill\x18\x03 \x01(\x04\"\x0b\n\tKillReply\"M\n\x0fIsKillerRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x18\n\x10user_id_to_check\x18\x03 \x01(\x04\"\x1f\n\rIsKillerReply\x12\x0e\n\x06\x61nswer\x18\x01 \x01(\x08\"0\n\x0cNightRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\x0c\n\nNightReply\"G\n\nDayRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x17\n\x0fuser_id_to_kill\x18\x03 \x01(\x04\"\x1a\n\x08\x44\x61yReply\x12\x0e\n\x06\x61nswer\x18\x01 \x01(\x08\x32\xcc\x04\n\x05Mafia\x12@\n\nCreateRoom\x12\x18.mafia.CreateRoomRequest\x1a\x16.mafia.CreateRoomReply\"\x00\x12@\n\nJoinToRoom\x12\x18.mafia.JoinToRoomRequest\x1a\x16.mafia.JoinToRoomReply\"\x00\x12l\n\x18SubscribeOnNotifications\x12&.mafia.SubscribeOnNotificationsRequest\x1a$.mafia.SubscribeOnNotificationsReply\"\x00\x30\x01\x12=\n\tLeaveRoom\x12\x17.mafia.LeaveRoomRequest\x1a\x15.mafia.LeaveRoomReply\"\x00\x12\x46\n\x0cReadyToStart\x12\x1a.mafia.ReadyToStartRequest\x1a\x18.mafia.ReadyToStartReply\"\x00\x12.\n\x04Kill\x12\x12.mafia.KillRequest\x1a\x10.mafia.KillReply\"\x00\x12:\n\x08IsKiller\x12\x16.mafia.IsKillerRequest\x1a\x14.mafia.IsKillerReply\"\x00\x12\x31\n\x05Night\x12\x13.mafia.NightRequest\x1a\x11.mafia.NightReply\"\x00\x12+\n\x03\x44\x61y\x12\x11.mafia.DayRequest\x1a\x0f.mafia.DayReply\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rservice.proto\x12\x05mafia\"y\n\x11\x43reateRoomRequest\x12\x10\n\x08nickname\x18\x01 \x01(\t\x12\x10\n\x08\x63\x61pacity\x18\x02 \x01(\r\x12\x12\n\x05mafia\x18\x03 \x01(\rH\x00\x88\x01\x01\x12\x15\n\x08officers\x18\x04 \x01(\rH\x01\x88\x01\x01\x42\x08\n\x06_mafiaB\x0b\n\t_officers\"3\n\x0f\x43reateRoomReply\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"6\n\x11JoinToRoomRequest\x12\x10\n\x08nickname\x18\x01 \x01(\t\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\"\n\x0fJoinToRoomReply\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\"#\n\x0f\x46indGameRequest\x12\x10\n\x08nickname\x18\x01 \x01(\t\"1\n\rFindGameReply\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"=\n\x14ListOpenRoomsRequest\x12\x11\n\tpage_size\x18\x01 \x01(\r\x12\x12\n\npage_token\x18\x02 \x01(\t\"\x98\x01\n\x12ListOpenRoomsReply\x12-\n\x05rooms\x18\x01 \x03(\x0b\x32\x1e.mafia.ListOpenRoomsReply.Room\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\x1a:\n\x04Room\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07players\x18\x02 \x01(\r\x12\x10\n\x08\x63\x61pacity\x18\x03 \x01(\r\"7\n\x13ReadyToStartRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"!\n\x11ReadyToStartReply\x12\x0c\n\x04role\x18\x01 \x01(\t\"v\n\x1fSubscribeOnNotificationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\x12\x15\n\x08\x66rom_seq\x18\x03 \x01(\x04H\x00\x88\x01\x01\x12\r\n\x05typed\x18\x04 \x01(\x08\x42\x0b\n\t_from_seq\"F\n\x0fSpectateRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x15\n\x08\x66rom_seq\x18\x02 \x01(\x04H\x00\x88\x01\x01\x42\x0b\n\t_from_seq\"\xb7\x07\n\x1dSubscribeOnNotificationsReply\x12\x0c\n\x04type\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\t\x12\x0b\n\x03seq\x18\x03 \x01(\x04\x12\x39\n\x04join\x18\x04 \x01(\x0b\x32).mafia.SubscribeOnNotificationsReply.JoinH\x00\x12;\n\x05leave\x18\x05 \x01(\x0b\x32*.mafia.SubscribeOnNotificationsReply.LeaveH\x00\x12K\n\x0estart_the_game\x18\x06 \x01(\x0b\x32\x31.mafia.SubscribeOnNotificationsReply.StartTheGameH\x00\x12\x39\n\x04kill\x18\x07 \x01(\x0b\x32).mafia.SubscribeOnNotificationsReply.KillH\x00\x12\x37\n\x03\x65nd\x18\x08 \x01(\x0b\x32(.mafia.SubscribeOnNotificationsReply.EndH\x00\x12\x41\n\x08snapshot\x18\t \x01(\x0b\x32-.mafia.SubscribeOnNotificationsReply.SnapshotH\x00\x12\x39\n\x04vote\x18\n \x01(\x0b\x32).mafia.SubscribeOnNotificationsReply.VoteH\x00\x12\x37\n\x03gap\x18\x0b \x01(\x0b\x32(.mafia.SubscribeOnNotificationsReply.GapH\x00\x12\x41\n\x08\x64\x65\x61\x64line\x18\x0c \x01(\x0b\x32-.mafia.SubscribeOnNotificationsReply.DeadlineH\x00\x1a)\n\x04Join\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x10\n\x08nickname\x18\x02 \x01(\t\x1a*\n\x05Leave\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x10\n\x08nickname\x18\x02 \x01(\t\x1a\x0e\n\x0cStartTheGame\x1a)\n\x04Kill\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x10\n\x08nickname\x18\x02 \x01(\t\x1a$\n\x03\x45nd\x12\x1d\n\x06winner\x18\x01 \x01(\x0e\x32\r.mafia.Winner\x1a\n\n\x08Snapshot\x1a\x38\n\x04Vote\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x10\n\x08nickname\x18\x02 \x01(\t\x12\r\n\x05votes\x18\x03 \x01(\r\x1a\x16\n\x03Gap\x12\x0f\n\x07\x64ropped\x18\x01 \x01(\x04\x1a\x19\n\x08\x44\x65\x61\x64line\x12\r\n\x05phase\x18\x01 \x01(\tB\t\n\x07payload\"4\n\x10LeaveRoomRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\x10\n\x0eLeaveRoomReply\"H\n\x0bKillRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x17\n\x0fuser_id_to_kill\x18\x03 \x01(\x04\"\x0b\n\tKillReply\"M\n\x0fIsKillerRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x18\n\x10user_id_to_check\x18\x03 \x01(\x04\"\x1f\n\rIsKillerReply\x12\x0e\n\x06\x61nswer\x18\x01 \x01(\x08\"0\n\x0cNightRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\"\x1e\n\nNightReply\x12\x10\n\x08next_seq\x18\x01 \x01(\x04\"G\n\nDayRequest\x12\x0f\n\x07room_id\x18\x01 \x01(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\x04\x12\x17\n\x0fuser_id_to_kill\x18\x03 \x01(\x04\",\n\x08\x44\x61yReply\x12\x0e\n\x06\x61nswer\x18\x01 \x01(\x08\x12\x10\n\x08next_seq\x18\x02 \x01(\x04\"\xcb\x04\n\x12GameSessionRequest\x12.\n\x04\x62ind\x18\x01 \x01(\x0b\x32\x1e.mafia.GameSessionRequest.BindH\x00\x12\x30\n\x05ready\x18\x02 \x01(\x0b\x32\x1f.mafia.GameSessionRequest.ReadyH\x00\x12.\n\x04kill\x18\x03 \x01(\x0b\x32\x1e.mafia.GameSessionRequest.KillH\x00\x12\x37\n\tis_killer\x18\x04 \x01(\x0b\x32\".mafia.GameSessionRequest.IsKillerH\x00\x12\x30\n\x05night\x18\x05 \x01(\x0b\x32\x1f.mafia.GameSessionRequest.NightH\x00\x12,\n\x03\x64\x61y\x18\x06 \x01(\x0b\x32\x1d.mafia.GameSessionRequest.DayH\x00\x12\x30\n\x05leave\x18\x07 \x01(\x0b\x32\x1f.mafia.GameSessionRequest.LeaveH\x00\x1aL\n\x04\x42ind\x12\x0f\n\x07user_id\x18\x01 \x01(\x04\x12\x0f\n\x07room_id\x18\x02 \x01(\t\x12\x15\n\x08\x66rom_seq\x18\x03 \x01(\x04H\x00\x88\x01\x01\x42\x0b\n\t_from_seq\x1a\x07\n\x05Ready\x1a\x1f\n\x04Kill\x12\x17\n\x0fuser_id_to_kill\x18\x01 \x01(\x04\x1a$\n\x08IsKiller\x12\x18\n\x10user_id_to_check\x18\x01 \x01(\x04\x1a\x07\n\x05Night\x1a\x1e\n\x03\x44\x61y\x12\x17\n\x0fuser_id_to_kill\x18\x01 \x01(\x04\x1a\x07\n\x05LeaveB\x08\n\x06\x61\x63tion\"\x95\x03\n\x10GameSessionReply\x12<\n\x0cnotification\x18\x01 \x01(\x0b\x32$.mafia.SubscribeOnNotificationsReplyH\x00\x12)\n\x05ready\x18\x02 \x01(\x0b\x32\x18.mafia.ReadyToStartReplyH\x00\x12 \n\x04kill\x18\x03 \x01(\x0b\x32\x10.mafia.KillReplyH\x00\x12)\n\tis_killer\x18\x04 \x01(\x0b\x32\x14.mafia.IsKillerReplyH\x00\x12\"\n\x05night\x18\x05 \x01(\x0b\x32\x11.mafia.NightReplyH\x00\x12\x1e\n\x03\x64\x61y\x18\x06 \x01(\x0b\x32\x0f.mafia.DayReplyH\x00\x12&\n\x05leave\x18\x07 \x01(\x0b\x32\x15.mafia.LeaveRoomReplyH\x00\x12.\n\x05\x65rror\x18\x08 \x01(\x0b\x32\x1d.mafia.GameSessionReply.ErrorH\x00\x1a&\n\x05\x45rror\x12\x0c\n\x04\x63ode\x18\x01 \x01(\t\x12\x0f\n\x07\x64\x65tails\x18\x02 \x01(\tB\x07\n\x05\x65vent*6\n\x06Winner\x12\x12\n\x0eUNKNOWN_WINNER\x10\x00\x12\r\n\tCIVILIANS\x10\x01\x12\t\n\x05MAFIA\x10\x02\x32\xea\x06\n\x05Mafia\x12@\n\nCreateRoom\x12\x18.mafia.CreateRoomRequest\x1a\x16.mafia.CreateRoomReply\"\x00\x12@\n\nJoinToRoom\x12\x18.mafia.JoinToRoomRequest\x1a\x16.mafia.JoinToRoomReply\"\x00\x12l\n\x18SubscribeOnNotifications\x12&.mafia.SubscribeOnNotificationsRequest\x1a$.mafia.SubscribeOnNotificationsReply\"\x00\x30\x01\x12=\n\tLeaveRoom\x12\x17.mafia.LeaveRoomRequest\x1a\x15.mafia.LeaveRoomReply\"\x00\x12\x46\n\x0cReadyToStart\x12\x1a.mafia.ReadyToStartRequest\x1a\x18.mafia.ReadyToStartReply\"\x00\x12.\n\x04Kill\x12\x12.mafia.KillRequest\x1a\x10.mafia.KillReply\"\x00\x12:\n\x08IsKiller\x12\x16.mafia.IsKillerRequest\x1a\x14.mafia.IsKillerReply\"\x00\x12\x31\n\x05Night\x12\x13.mafia.NightRequest\x1a\x11.mafia.NightReply\"\x00\x12+\n\x03\x44\x61y\x12\x11.mafia.DayRequest\x1a\x0f.mafia.DayReply\"\x00\x12G\n\x0bGameSession\x12\x19.mafia.GameSessionRequest\x1a\x17.mafia.GameSessionReply\"\x00(\x01\x30\x01\x12L\n\x08Spectate\x12\x16.mafia.SpectateRequest\x1a$.mafia.SubscribeOnNotificationsReply\"\x00\x30\x01\x12:\n\x08\x46indGame\x12\x16.mafia.FindGameRequest\x1a\x14.mafia.FindGameReply\"\x00\x12I\n\rListOpenRooms\x12\x1b.mafia.ListOpenRoomsRequest\x1a\x19.mafia.ListOpenRoomsReply\"\x00\x62\x06proto3')
 
+_WINNER = DESCRIPTOR.enum_types_by_name['Winner']
+Winner = enum_type_wrapper.EnumTypeWrapper(_WINNER)
+UNKNOWN_WINNER = 0
+CIVILIANS = 1
+MAFIA = 2
 
 
 _CREATEROOMREQUEST = DESCRIPTOR.message_types_by_name['CreateRoomRequest']
 _CREATEROOMREPLY = DESCRIPTOR.message_types_by_name['CreateRoomReply']
 _JOINTOROOMREQUEST = DESCRIPTOR.message_types_by_name['JoinToRoomRequest']
 _JOINTOROOMREPLY = DESCRIPTOR.message_types_by_name['JoinToRoomReply']
+_FINDGAMEREQUEST = DESCRIPTOR.message_types_by_name['FindGameRequest']
+_FINDGAMEREPLY = DESCRIPTOR.message_types_by_name['FindGameReply']
+_LISTOPENROOMSREQUEST = DESCRIPTOR.message_types_by_name['ListOpenRoomsRequest']
+_LISTOPENROOMSREPLY = DESCRIPTOR.message_types_by_name['ListOpenRoomsReply']
+_LISTOPENROOMSREPLY_ROOM = _LISTOPENROOMSREPLY.nested_types_by_name['Room']
 _READYTOSTARTREQUEST = DESCRIPTOR.message_types_by_name['ReadyToStartRequest']
 _READYTOSTARTREPLY = DESCRIPTOR.message_types_by_name['ReadyToStartReply']
 _SUBSCRIBEONNOTIFICATIONSREQUEST = DESCRIPTOR.message_types_by_name['SubscribeOnNotificationsRequest']
+_SPECTATEREQUEST = DESCRIPTOR.message_types_by_name['SpectateRequest']
 _SUBSCRIBEONNOTIFICATIONSREPLY = DESCRIPTOR.message_types_by_name['SubscribeOnNotificationsReply']
+_SUBSCRIBEONNOTIFICATIONSREPLY_JOIN = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Join']
+_SUBSCRIBEONNOTIFICATIONSREPLY_LEAVE = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Leave']
+_SUBSCRIBEONNOTIFICATIONSREPLY_STARTTHEGAME = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['StartTheGame']
+_SUBSCRIBEONNOTIFICATIONSREPLY_KILL = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Kill']
+_SUBSCRIBEONNOTIFICATIONSREPLY_END = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['End']
+_SUBSCRIBEONNOTIFICATIONSREPLY_SNAPSHOT = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Snapshot']
+_SUBSCRIBEONNOTIFICATIONSREPLY_VOTE = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Vote']
+_SUBSCRIBEONNOTIFICATIONSREPLY_GAP = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Gap']
+_SUBSCRIBEONNOTIFICATIONSREPLY_DEADLINE = _SUBSCRIBEONNOTIFICATIONSREPLY.nested_types_by_name['Deadline']
 _LEAVEROOMREQUEST = DESCRIPTOR.message_types_by_name['LeaveRoomRequest']
 _LEAVEROOMREPLY = DESCRIPTOR.message_types_by_name['LeaveRoomReply']
 _KILLREQUEST = DESCRIPTOR.message_types_by_name['KillRequest']
@@ -36,6 +57,16 @@ _NIGHTREQUEST = DESCRIPTOR.message_types_by_name['NightRequest']
 _NIGHTREPLY = DESCRIPTOR.message_types_by_name['NightReply']
 _DAYREQUEST = DESCRIPTOR.message_types_by_name['DayRequest']
 _DAYREPLY = DESCRIPTOR.message_types_by_name['DayReply']
+_GAMESESSIONREQUEST = DESCRIPTOR.message_types_by_name['GameSessionRequest']
+_GAMESESSIONREQUEST_BIND = _GAMESESSIONREQUEST.nested_types_by_name['Bind']
+_GAMESESSIONREQUEST_READY = _GAMESESSIONREQUEST.nested_types_by_name['Ready']
+_GAMESESSIONREQUEST_KILL = _GAMESESSIONREQUEST.nested_types_by_name['Kill']
+_GAMESESSIONREQUEST_ISKILLER = _GAMESESSIONREQUEST.nested_types_by_name['IsKiller']
+_GAMESESSIONREQUEST_NIGHT = _GAMESESSIONREQUEST.nested_types_by_name['Night']
+_GAMESESSIONREQUEST_DAY = _GAMESESSIONREQUEST.nested_types_by_name['Day']
+_GAMESESSIONREQUEST_LEAVE = _GAMESESSIONREQUEST.nested_types_by_name['Leave']
+_GAMESESSIONREPLY = DESCRIPTOR.message_types_by_name['GameSessionReply']
+_GAMESESSIONREPLY_ERROR = _GAMESESSIONREPLY.nested_types_by_name['Error']
 CreateRoomRequest = _reflection.GeneratedProtocolMessageType('CreateRoomRequest', (_message.Message,), {
   'DESCRIPTOR' : _CREATEROOMREQUEST,
   '__module__' : 'service_pb2'
@@ -64,6 +95,42 @@ JoinToRoomReply = _reflection.GeneratedProtocolMessageType('JoinToRoomReply', (_
   })
 _sym_db.RegisterMessage(JoinToRoomReply)
 
+FindGameRequest = _reflection.GeneratedProtocolMessageType('FindGameRequest', (_message.Message,), {
+  'DESCRIPTOR' : _FINDGAMEREQUEST,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.FindGameRequest)
+  })
+_sym_db.RegisterMessage(FindGameRequest)
+
+FindGameReply = _reflection.GeneratedProtocolMessageType('FindGameReply', (_message.Message,), {
+  'DESCRIPTOR' : _FINDGAMEREPLY,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.FindGameReply)
+  })
+_sym_db.RegisterMessage(FindGameReply)
+
+ListOpenRoomsRequest = _reflection.GeneratedProtocolMessageType('ListOpenRoomsRequest', (_message.Message,), {
+  'DESCRIPTOR' : _LISTOPENROOMSREQUEST,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.ListOpenRoomsRequest)
+  })
+_sym_db.RegisterMessage(ListOpenRoomsRequest)
+
+ListOpenRoomsReply = _reflection.GeneratedProtocolMessageType('ListOpenRoomsReply', (_message.Message,), {
+
+  'Room' : _reflection.GeneratedProtocolMessageType('Room', (_message.Message,), {
+    'DESCRIPTOR' : _LISTOPENROOMSREPLY_ROOM,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.ListOpenRoomsReply.Room)
+    })
+  ,
+  'DESCRIPTOR' : _LISTOPENROOMSREPLY,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.ListOpenRoomsReply)
+  })
+_sym_db.RegisterMessage(ListOpenRoomsReply)
+_sym_db.RegisterMessage(ListOpenRoomsReply.Room)
+
 ReadyToStartRequest = _reflection.GeneratedProtocolMessageType('ReadyToStartRequest', (_message.Message,), {
   'DESCRIPTOR' : _READYTOSTARTREQUEST,
   '__module__' : 'service_pb2'
@@ -85,12 +152,91 @@ SubscribeOnNotificationsRequest = _reflection.GeneratedProtocolMessageType('Subs
   })
 _sym_db.RegisterMessage(SubscribeOnNotificationsRequest)
 
+SpectateRequest = _reflection.GeneratedProtocolMessageType('SpectateRequest', (_message.Message,), {
+  'DESCRIPTOR' : _SPECTATEREQUEST,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.SpectateRequest)
+  })
+_sym_db.RegisterMessage(SpectateRequest)
+
 SubscribeOnNotificationsReply = _reflection.GeneratedProtocolMessageType('SubscribeOnNotificationsReply', (_message.Message,), {
+
+  'Join' : _reflection.GeneratedProtocolMessageType('Join', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_JOIN,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Join)
+    })
+  ,
+
+  'Leave' : _reflection.GeneratedProtocolMessageType('Leave', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_LEAVE,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Leave)
+    })
+  ,
+
+  'StartTheGame' : _reflection.GeneratedProtocolMessageType('StartTheGame', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_STARTTHEGAME,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.StartTheGame)
+    })
+  ,
+
+  'Kill' : _reflection.GeneratedProtocolMessageType('Kill', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_KILL,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Kill)
+    })
+  ,
+
+  'End' : _reflection.GeneratedProtocolMessageType('End', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_END,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.End)
+    })
+  ,
+
+  'Snapshot' : _reflection.GeneratedProtocolMessageType('Snapshot', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_SNAPSHOT,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Snapshot)
+    })
+  ,
+
+  'Vote' : _reflection.GeneratedProtocolMessageType('Vote', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_VOTE,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Vote)
+    })
+  ,
+
+  'Gap' : _reflection.GeneratedProtocolMessageType('Gap', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_GAP,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Gap)
+    })
+  ,
+
+  'Deadline' : _reflection.GeneratedProtocolMessageType('Deadline', (_message.Message,), {
+    'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY_DEADLINE,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply.Deadline)
+    })
+  ,
   'DESCRIPTOR' : _SUBSCRIBEONNOTIFICATIONSREPLY,
   '__module__' : 'service_pb2'
   # @@protoc_insertion_point(class_scope:mafia.SubscribeOnNotificationsReply)
   })
 _sym_db.RegisterMessage(SubscribeOnNotificationsReply)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Join)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Leave)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.StartTheGame)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Kill)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.End)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Snapshot)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Vote)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Gap)
+_sym_db.RegisterMessage(SubscribeOnNotificationsReply.Deadline)
 
 LeaveRoomRequest = _reflection.GeneratedProtocolMessageType('LeaveRoomRequest', (_message.Message,), {
   'DESCRIPTOR' : _LEAVEROOMREQUEST,
@@ -162,46 +308,176 @@ DayReply = _reflection.GeneratedProtocolMessageType('DayReply', (_message.Messag
   })
 _sym_db.RegisterMessage(DayReply)
 
+GameSessionRequest = _reflection.GeneratedProtocolMessageType('GameSessionRequest', (_message.Message,), {
+
+  'Bind' : _reflection.GeneratedProtocolMessageType('Bind', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_BIND,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Bind)
+    })
+  ,
+
+  'Ready' : _reflection.GeneratedProtocolMessageType('Ready', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_READY,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Ready)
+    })
+  ,
+
+  'Kill' : _reflection.GeneratedProtocolMessageType('Kill', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_KILL,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Kill)
+    })
+  ,
+
+  'IsKiller' : _reflection.GeneratedProtocolMessageType('IsKiller', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_ISKILLER,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.IsKiller)
+    })
+  ,
+
+  'Night' : _reflection.GeneratedProtocolMessageType('Night', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_NIGHT,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Night)
+    })
+  ,
+
+  'Day' : _reflection.GeneratedProtocolMessageType('Day', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_DAY,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Day)
+    })
+  ,
+
+  'Leave' : _reflection.GeneratedProtocolMessageType('Leave', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREQUEST_LEAVE,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest.Leave)
+    })
+  ,
+  'DESCRIPTOR' : _GAMESESSIONREQUEST,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.GameSessionRequest)
+  })
+_sym_db.RegisterMessage(GameSessionRequest)
+_sym_db.RegisterMessage(GameSessionRequest.Bind)
+_sym_db.RegisterMessage(GameSessionRequest.Ready)
+_sym_db.RegisterMessage(GameSessionRequest.Kill)
+_sym_db.RegisterMessage(GameSessionRequest.IsKiller)
+_sym_db.RegisterMessage(GameSessionRequest.Night)
+_sym_db.RegisterMessage(GameSessionRequest.Day)
+_sym_db.RegisterMessage(GameSessionRequest.Leave)
+
+GameSessionReply = _reflection.GeneratedProtocolMessageType('GameSessionReply', (_message.Message,), {
+
+  'Error' : _reflection.GeneratedProtocolMessageType('Error', (_message.Message,), {
+    'DESCRIPTOR' : _GAMESESSIONREPLY_ERROR,
+    '__module__' : 'service_pb2'
+    # @@protoc_insertion_point(class_scope:mafia.GameSessionReply.Error)
+    })
+  ,
+  'DESCRIPTOR' : _GAMESESSIONREPLY,
+  '__module__' : 'service_pb2'
+  # @@protoc_insertion_point(class_scope:mafia.GameSessionReply)
+  })
+_sym_db.RegisterMessage(GameSessionReply)
+_sym_db.RegisterMessage(GameSessionReply.Error)
+
 _MAFIA = DESCRIPTOR.services_by_name['Mafia']
 if _descriptor._USE_C_DESCRIPTORS == False:
 
   DESCRIPTOR._options = None
+  _WINNER._serialized_start=3306
+  _WINNER._serialized_end=3360
   _CREATEROOMREQUEST._serialized_start=24
-  _CREATEROOMREQUEST._serialized_end=61
-  _CREATEROOMREPLY._serialized_start=63
-  _CREATEROOMREPLY._serialized_end=114
-  _JOINTOROOMREQUEST._serialized_start=116
-  _JOINTOROOMREQUEST._serialized_end=170
-  _JOINTOROOMREPLY._serialized_start=172
-  _JOINTOROOMREPLY._serialized_end=206
-  _READYTOSTARTREQUEST._serialized_start=208
-  _READYTOSTARTREQUEST._serialized_end=263
-  _READYTOSTARTREPLY._serialized_start=265
-  _READYTOSTARTREPLY._serialized_end=298
-  _SUBSCRIBEONNOTIFICATIONSREQUEST._serialized_start=300
-  _SUBSCRIBEONNOTIFICATIONSREQUEST._serialized_end=367
-  _SUBSCRIBEONNOTIFICATIONSREPLY._serialized_start=369
-  _SUBSCRIBEONNOTIFICATIONSREPLY._serialized_end=428
-  _LEAVEROOMREQUEST._serialized_start=430
-  _LEAVEROOMREQUEST._serialized_end=482
-  _LEAVEROOMREPLY._serialized_start=484
-  _LEAVEROOMREPLY._serialized_end=500
-  _KILLREQUEST._serialized_start=502
-  _KILLREQUEST._serialized_end=574
-  _KILLREPLY._serialized_start=576
-  _KILLREPLY._serialized_end=587
-  _ISKILLERREQUEST._serialized_start=589
-  _ISKILLERREQUEST._serialized_end=666
-  _ISKILLERREPLY._serialized_start=668
-  _ISKILLERREPLY._serialized_end=699
-  _NIGHTREQUEST._serialized_start=701
-  _NIGHTREQUEST._serialized_end=749
-  _NIGHTREPLY._serialized_start=751
-  _NIGHTREPLY._serialized_end=763
-  _DAYREQUEST._serialized_start=765
-  _DAYREQUEST._serialized_end=836
-  _DAYREPLY._serialized_start=838
-  _DAYREPLY._serialized_end=864
-  _MAFIA._serialized_start=867
-  _MAFIA._serialized_end=1455
+  _CREATEROOMREQUEST._serialized_end=145
+  _CREATEROOMREPLY._serialized_start=147
+  _CREATEROOMREPLY._serialized_end=198
+  _JOINTOROOMREQUEST._serialized_start=200
+  _JOINTOROOMREQUEST._serialized_end=254
+  _JOINTOROOMREPLY._serialized_start=256
+  _JOINTOROOMREPLY._serialized_end=290
+  _FINDGAMEREQUEST._serialized_start=292
+  _FINDGAMEREQUEST._serialized_end=327
+  _FINDGAMEREPLY._serialized_start=329
+  _FINDGAMEREPLY._serialized_end=378
+  _LISTOPENROOMSREQUEST._serialized_start=380
+  _LISTOPENROOMSREQUEST._serialized_end=441
+  _LISTOPENROOMSREPLY._serialized_start=444
+  _LISTOPENROOMSREPLY._serialized_end=596
+  _LISTOPENROOMSREPLY_ROOM._serialized_start=538
+  _LISTOPENROOMSREPLY_ROOM._serialized_end=596
+  _READYTOSTARTREQUEST._serialized_start=598
+  _READYTOSTARTREQUEST._serialized_end=653
+  _READYTOSTARTREPLY._serialized_start=655
+  _READYTOSTARTREPLY._serialized_end=688
+  _SUBSCRIBEONNOTIFICATIONSREQUEST._serialized_start=690
+  _SUBSCRIBEONNOTIFICATIONSREQUEST._serialized_end=808
+  _SPECTATEREQUEST._serialized_start=810
+  _SPECTATEREQUEST._serialized_end=880
+  _SUBSCRIBEONNOTIFICATIONSREPLY._serialized_start=883
+  _SUBSCRIBEONNOTIFICATIONSREPLY._serialized_end=1834
+  _SUBSCRIBEONNOTIFICATIONSREPLY_JOIN._serialized_start=1520
+  _SUBSCRIBEONNOTIFICATIONSREPLY_JOIN._serialized_end=1561
+  _SUBSCRIBEONNOTIFICATIONSREPLY_LEAVE._serialized_start=1563
+  _SUBSCRIBEONNOTIFICATIONSREPLY_LEAVE._serialized_end=1605
+  _SUBSCRIBEONNOTIFICATIONSREPLY_STARTTHEGAME._serialized_start=1607
+  _SUBSCRIBEONNOTIFICATIONSREPLY_STARTTHEGAME._serialized_end=1621
+  _SUBSCRIBEONNOTIFICATIONSREPLY_KILL._serialized_start=1623
+  _SUBSCRIBEONNOTIFICATIONSREPLY_KILL._serialized_end=1664
+  _SUBSCRIBEONNOTIFICATIONSREPLY_END._serialized_start=1666
+  _SUBSCRIBEONNOTIFICATIONSREPLY_END._serialized_end=1702
+  _SUBSCRIBEONNOTIFICATIONSREPLY_SNAPSHOT._serialized_start=1704
+  _SUBSCRIBEONNOTIFICATIONSREPLY_SNAPSHOT._serialized_end=1714
+  _SUBSCRIBEONNOTIFICATIONSREPLY_VOTE._serialized_start=1716
+  _SUBSCRIBEONNOTIFICATIONSREPLY_VOTE._serialized_end=1772
+  _SUBSCRIBEONNOTIFICATIONSREPLY_GAP._serialized_start=1774
+  _SUBSCRIBEONNOTIFICATIONSREPLY_GAP._serialized_end=1796
+  _SUBSCRIBEONNOTIFICATIONSREPLY_DEADLINE._serialized_start=1798
+  _SUBSCRIBEONNOTIFICATIONSREPLY_DEADLINE._serialized_end=1823
+  _LEAVEROOMREQUEST._serialized_start=1836
+  _LEAVEROOMREQUEST._serialized_end=1888
+  _LEAVEROOMREPLY._serialized_start=1890
+  _LEAVEROOMREPLY._serialized_end=1906
+  _KILLREQUEST._serialized_start=1908
+  _KILLREQUEST._serialized_end=1980
+  _KILLREPLY._serialized_start=1982
+  _KILLREPLY._serialized_end=1993
+  _ISKILLERREQUEST._serialized_start=1995
+  _ISKILLERREQUEST._serialized_end=2072
+  _ISKILLERREPLY._serialized_start=2074
+  _ISKILLERREPLY._serialized_end=2105
+  _NIGHTREQUEST._serialized_start=2107
+  _NIGHTREQUEST._serialized_end=2155
+  _NIGHTREPLY._serialized_start=2157
+  _NIGHTREPLY._serialized_end=2187
+  _DAYREQUEST._serialized_start=2189
+  _DAYREQUEST._serialized_end=2260
+  _DAYREPLY._serialized_start=2262
+  _DAYREPLY._serialized_end=2306
+  _GAMESESSIONREQUEST._serialized_start=2309
+  _GAMESESSIONREQUEST._serialized_end=2896
+  _GAMESESSIONREQUEST_BIND._serialized_start=2680
+  _GAMESESSIONREQUEST_BIND._serialized_end=2756
+  _GAMESESSIONREQUEST_READY._serialized_start=2758
+  _GAMESESSIONREQUEST_READY._serialized_end=2765
+  _GAMESESSIONREQUEST_KILL._serialized_start=2767
+  _GAMESESSIONREQUEST_KILL._serialized_end=2798
+  _GAMESESSIONREQUEST_ISKILLER._serialized_start=2800
+  _GAMESESSIONREQUEST_ISKILLER._serialized_end=2836
+  _GAMESESSIONREQUEST_NIGHT._serialized_start=2838
+  _GAMESESSIONREQUEST_NIGHT._serialized_end=2845
+  _GAMESESSIONREQUEST_DAY._serialized_start=2847
+  _GAMESESSIONREQUEST_DAY._serialized_end=2877
+  _GAMESESSIONREQUEST_LEAVE._serialized_start=1563
+  _GAMESESSIONREQUEST_LEAVE._serialized_end=1570
+  _GAMESESSIONREPLY._serialized_start=2899
+  _GAMESESSIONREPLY._serialized_end=3304
+  _GAMESESSIONREPLY_ERROR._serialized_start=3257
+  _GAMESESSIONREPLY_ERROR._serialized_end=3295
+  _MAFIA._serialized_start=3363
+  _MAFIA._serialized_end=4237
 # @@protoc_insertion_point(module_scope)
@@ -59,6 +59,26 @@ class MafiaStub(object):
                 request_serializer=service__pb2.DayRequest.SerializeToString,
                 response_deserializer=service__pb2.DayReply.FromString,
                 )
+        self.GameSession = channel.stream_stream(
+                '/mafia.Mafia/GameSession',
+                request_serializer=service__pb2.GameSessionRequest.SerializeToString,
+                response_deserializer=service__pb2.GameSessionReply.FromString,
+                )
+        self.Spectate = channel.unary_stream(
+                '/mafia.Mafia/Spectate',
+                request_serializer=service__pb2.SpectateRequest.SerializeToString,
+                response_deserializer=service__pb2.SubscribeOnNotificationsReply.FromString,
+                )
+        self.FindGame = channel.unary_unary(
+                '/mafia.Mafia/FindGame',
+                request_serializer=service__pb2.FindGameRequest.SerializeToString,
+                response_deserializer=service__pb2.FindGameReply.FromString,
+                )
+        self.ListOpenRooms = channel.unary_unary(
+                '/mafia.Mafia/ListOpenRooms',
+                request_serializer=service__pb2.ListOpenRoomsRequest.SerializeToString,
+                response_deserializer=service__pb2.ListOpenRoomsReply.FromString,
+                )
 
 
 class MafiaServicer(object):
@@ -118,6 +138,30 @@ class MafiaServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GameSession(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Spectate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def FindGame(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListOpenRooms(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MafiaServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -166,6 +210,26 @@ def add_MafiaServicer_to_server(servicer, server):
                     request_deserializer=service__pb2.DayRequest.FromString,
                     response_serializer=service__pb2.DayReply.SerializeToString,
             ),
+            'GameSession': grpc.stream_stream_rpc_method_handler(
+                    servicer.GameSession,
+                    request_deserializer=service__pb2.GameSessionRequest.FromString,
+                    response_serializer=service__pb2.GameSessionReply.SerializeToString,
+            ),
+            'Spectate': grpc.unary_stream_rpc_method_handler(
+                    servicer.Spectate,
+                    request_deserializer=service__pb2.SpectateRequest.FromString,
+                    response_serializer=service__pb2.SubscribeOnNotificationsReply.SerializeToString,
+            ),
+            'FindGame': grpc.unary_unary_rpc_method_handler(
+                    servicer.FindGame,
+                    request_deserializer=service__pb2.FindGameRequest.FromString,
+                    response_serializer=service__pb2.FindGameReply.SerializeToString,
+            ),
+            'ListOpenRooms': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListOpenRooms,
+                    request_deserializer=service__pb2.ListOpenRoomsRequest.FromString,
+                    response_serializer=service__pb2.ListOpenRoomsReply.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'mafia.Mafia', rpc_method_handlers)
@@ -328,3 +392,71 @@ class Mafia(object):
             service__pb2.DayReply.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GameSession(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/mafia.Mafia/GameSession',
+            service__pb2.GameSessionRequest.SerializeToString,
+            service__pb2.GameSessionReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Spectate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/mafia.Mafia/Spectate',
+            service__pb2.SpectateRequest.SerializeToString,
+            service__pb2.SubscribeOnNotificationsReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def FindGame(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/mafia.Mafia/FindGame',
+            service__pb2.FindGameRequest.SerializeToString,
+            service__pb2.FindGameReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListOpenRooms(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/mafia.Mafia/ListOpenRooms',
+            service__pb2.ListOpenRoomsRequest.SerializeToString,
+            service__pb2.ListOpenRoomsReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
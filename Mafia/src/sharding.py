@@ -0,0 +1,140 @@
+import typing as tp
+import zlib
+
+import grpc
+
+import service.service_pb2_grpc as service_pb2_grpc
+import service.service_pb2 as service_pb2
+
+
+_MAFIA_SERVICE = service_pb2.DESCRIPTOR.services_by_name["Mafia"]
+# Calls that do not belong to an existing room are served by the worker
+# that received them: matchmaking only fills the rooms of that worker.
+_LOCAL_METHODS = {"CreateRoom", "FindGame", "ListOpenRooms"}
+
+
+def shard_of(room_id: str, workers: int) -> int:
+    if workers == 1:
+        return 0
+    return zlib.crc32(room_id.encode()) % workers
+
+
+class ShardRouter(service_pb2_grpc.MafiaServicer):
+    def __init__(
+        self,
+        servicer: service_pb2_grpc.MafiaServicer,
+        worker: int,
+        peers: list[str],
+        options: tp.Sequence[tp.Tuple[str, tp.Any]] = (),
+        stream_compression: tp.Optional[grpc.Compression] = None
+    ) -> None:
+        self._servicer = servicer
+        self._worker = worker
+        self._peers = peers
+        self._options = list(options)
+        # The owner compresses its reply to this worker, not the one
+        # this worker sends on to the client.
+        self._stream_compression = stream_compression
+        self._channels: dict[int, grpc.aio.Channel] = {}
+        self._stubs: dict[int, service_pb2_grpc.MafiaStub] = {}
+        for method in _MAFIA_SERVICE.methods:
+            if method.name in _LOCAL_METHODS:
+                handler = getattr(servicer, method.name)
+            elif method.client_streaming:
+                handler = self._route_session(method.name)
+            elif method.server_streaming:
+                handler = self._route_stream(method.name)
+            else:
+                handler = self._route_unary(method.name)
+            setattr(self, method.name, handler)
+
+    async def close(self) -> None:
+        for channel in self._channels.values():
+            await channel.close()
+        self._channels.clear()
+        self._stubs.clear()
+
+    def _route_unary(self, name: str) -> tp.Callable:
+        local = getattr(self._servicer, name)
+
+        async def handler(request, context: grpc.ServicerContext):
+            shard = shard_of(request.room_id, len(self._peers))
+            if shard == self._worker:
+                return await local(request, context)
+            try:
+                return await getattr(self._stub(shard), name)(
+                    request, timeout=context.time_remaining()
+                )
+            except grpc.aio.AioRpcError as e:
+                await context.abort(e.code(), e.details())
+
+        return handler
+
+    def _route_stream(self, name: str) -> tp.Callable:
+        local = getattr(self._servicer, name)
+
+        async def handler(request, context: grpc.ServicerContext):
+            shard = shard_of(request.room_id, len(self._peers))
+            if shard == self._worker:
+                async for reply in local(request, context):
+                    yield reply
+                return
+            self._compress_stream(context)
+            call = getattr(self._stub(shard), name)(request)
+            try:
+                async for reply in call:
+                    yield reply
+            except grpc.aio.AioRpcError as e:
+                await context.abort(e.code(), e.details())
+            finally:
+                call.cancel()
+
+        return handler
+
+    def _route_session(self, name: str) -> tp.Callable:
+        local = getattr(self._servicer, name)
+
+        async def handler(request_iterator, context: grpc.ServicerContext):
+            # A session is bound to its room by the first request.
+            requests = request_iterator.__aiter__()
+            try:
+                first = await requests.__anext__()
+            except StopAsyncIteration:
+                return
+
+            async def replay():
+                yield first
+                async for request in requests:
+                    yield request
+
+            shard = shard_of(first.bind.room_id, len(self._peers))
+            if shard == self._worker:
+                async for reply in local(replay(), context):
+                    yield reply
+                return
+            self._compress_stream(context)
+            call = getattr(self._stub(shard), name)(replay())
+            try:
+                async for reply in call:
+                    yield reply
+            except grpc.aio.AioRpcError as e:
+                await context.abort(e.code(), e.details())
+            finally:
+                call.cancel()
+
+        return handler
+
+    def _compress_stream(self, context: grpc.ServicerContext) -> None:
+        if self._stream_compression is not None:
+            context.set_compression(self._stream_compression)
+
+    def _stub(self, shard: int) -> service_pb2_grpc.MafiaStub:
+        stub = self._stubs.get(shard)
+        if stub is None:
+            channel = grpc.aio.insecure_channel(
+                self._peers[shard], options=self._options
+            )
+            self._channels[shard] = channel
+            stub = service_pb2_grpc.MafiaStub(channel)
+            self._stubs[shard] = stub
+        return stub
@@ -0,0 +1,477 @@
+import math
+import random
+import time
+import typing as tp
+
+import click
+import numpy as np
+
+from mafia_host import PlayerRoles, RoomSettings, Winner
+from mafia_host.mafia_room import MafiaRoom
+from mafia_host.room import Room
+from mafia_host.vote_tally import VoteTally
+
+
+# Players are exchangeable under every strategy below, so instead of
+# dealing the roles at random each game gets the same layout: the first
+# columns are the mafia, then the officers, then the civilians.
+NO_WINNER = 0
+CIVILIANS = 1
+MAFIA = 2
+_WINNERS = {Winner.Civilians: CIVILIANS, Winner.Mafia: MAFIA}
+
+
+class Games:
+    __slots__ = (
+        "settings",
+        "alive",
+        "checked",
+        "exposed",
+        "active",
+        "winner",
+        "rounds",
+        "town",
+        "officers",
+    )
+
+    def __init__(self, games: int, settings: RoomSettings) -> None:
+        players = settings.capacity
+        self.settings = settings
+        self.alive = np.ones((games, players), dtype=bool)
+        # Players checked by the officers, and the mafia they found.
+        self.checked = np.zeros((games, players), dtype=bool)
+        self.exposed = np.zeros((games, players), dtype=bool)
+        self.active = np.ones(games, dtype=bool)
+        self.winner = np.full(games, NO_WINNER, dtype=np.int8)
+        self.rounds = np.zeros(games, dtype=np.int32)
+        self.town = np.arange(players) >= settings.mafia
+        self.officers = range(
+            settings.mafia, settings.mafia + settings.officers
+        )
+
+    def keep(self, rows: np.ndarray) -> None:
+        self.alive = self.alive[rows]
+        self.checked = self.checked[rows]
+        self.exposed = self.exposed[rows]
+        self.active = self.active[rows]
+        self.winner = self.winner[rows]
+        self.rounds = self.rounds[rows]
+
+    def finish(self) -> None:
+        mafia = self.alive[:, :self.settings.mafia].sum(axis=1)
+        town = self.alive[:, self.settings.mafia:].sum(axis=1)
+        civilians = self.active & (mafia == 0)
+        mafia_wins = self.active & ~civilians & (town <= mafia)
+        self.winner[civilians] = CIVILIANS
+        self.winner[mafia_wins] = MAFIA
+        self.active &= ~(civilians | mafia_wins)
+
+    @property
+    def officer_alive(self) -> np.ndarray:
+        return self.alive[:, self.officers.start:self.officers.stop].any(
+            axis=1
+        )
+
+
+def _uniform(rng: np.random.Generator, mask: np.ndarray) -> np.ndarray:
+    # A uniformly chosen column of every row, -1 for an empty row.
+    keys = rng.random(mask.shape)
+    keys[~mask] = 2.0
+    return np.where(mask.any(axis=1), keys.argmin(axis=1), -1)
+
+
+def _uniform_other(
+    rng: np.random.Generator,
+    alive: np.ndarray
+) -> np.ndarray:
+    # For every alive player a uniformly chosen other alive player:
+    # the r-th of the alive players with the player itself skipped.
+    count = alive.sum(axis=1, keepdims=True)
+    order = np.argsort(~alive, axis=1, kind="stable")
+    rank = np.cumsum(alive, axis=1) - 1
+    r = (rng.random(alive.shape) * np.maximum(count - 1, 0)).astype(np.int64)
+    r += r >= rank
+    targets = np.take_along_axis(
+        order, np.minimum(r, alive.shape[1] - 1), axis=1
+    )
+    return np.where(alive & (count > 1), targets, -1)
+
+
+KillStrategy = tp.Callable[[np.random.Generator, Games], np.ndarray]
+CheckStrategy = tp.Callable[[np.random.Generator, Games, int], np.ndarray]
+VoteStrategy = tp.Callable[[np.random.Generator, Games], np.ndarray]
+
+
+def kill_random(rng: np.random.Generator, games: Games) -> np.ndarray:
+    return _uniform(rng, games.alive & games.town)
+
+
+def kill_officers_first(
+    rng: np.random.Generator,
+    games: Games
+) -> np.ndarray:
+    # Mafia that somehow know the officers: a bound for the town.
+    officers = np.zeros_like(games.town)
+    officers[games.officers.start:games.officers.stop] = True
+    hunted = _uniform(rng, games.alive & officers)
+    return np.where(hunted >= 0, hunted, kill_random(rng, games))
+
+
+def check_random(
+    rng: np.random.Generator,
+    games: Games,
+    officer: int
+) -> np.ndarray:
+    candidates = games.alive & ~games.checked
+    candidates[:, officer] = False
+    return _uniform(rng, candidates)
+
+
+def check_none(
+    rng: np.random.Generator,
+    games: Games,
+    officer: int
+) -> np.ndarray:
+    return np.full(len(games.active), -1)
+
+
+def vote_random(rng: np.random.Generator, games: Games) -> np.ndarray:
+    return _uniform_other(rng, games.alive)
+
+
+def vote_follow_officer(
+    rng: np.random.Generator,
+    games: Games
+) -> np.ndarray:
+    # A living officer names the first mafia found, the town follows.
+    exposed = games.exposed & games.alive
+    named = games.officer_alive & exposed.any(axis=1)
+    targets = vote_random(rng, games)
+    return np.where(
+        named[:, None] & games.alive,
+        exposed.argmax(axis=1)[:, None],
+        targets
+    )
+
+
+def vote_bloc(rng: np.random.Generator, games: Games) -> np.ndarray:
+    target = _uniform(rng, games.alive & games.town)
+    return np.where(games.alive, target[:, None], -1)
+
+
+KILL_STRATEGIES: tp.Dict[str, KillStrategy] = {
+    "random": kill_random,
+    "officers-first": kill_officers_first,
+}
+CHECK_STRATEGIES: tp.Dict[str, CheckStrategy] = {
+    "random": check_random,
+    "none": check_none,
+}
+TOWN_VOTE_STRATEGIES: tp.Dict[str, VoteStrategy] = {
+    "random": vote_random,
+    "follow-officer": vote_follow_officer,
+}
+MAFIA_VOTE_STRATEGIES: tp.Dict[str, VoteStrategy] = {
+    "random": vote_random,
+    "bloc": vote_bloc,
+}
+
+
+class Strategies(tp.NamedTuple):
+    kill: str = "random"
+    check: str = "random"
+    town_vote: str = "follow-officer"
+    mafia_vote: str = "bloc"
+
+
+def _night(rng: np.random.Generator, games: Games, s: Strategies) -> None:
+    victims = KILL_STRATEGIES[s.kill](rng, games)
+    rows = np.flatnonzero(games.active & (victims >= 0))
+    games.alive[rows, victims[rows]] = False
+    games.finish()
+    for officer in games.officers:
+        targets = CHECK_STRATEGIES[s.check](rng, games, officer)
+        rows = np.flatnonzero(
+            games.active & games.alive[:, officer] & (targets >= 0)
+        )
+        games.checked[rows, targets[rows]] = True
+        games.exposed[rows, targets[rows]] |= \
+            targets[rows] < games.settings.mafia
+
+
+def _day(rng: np.random.Generator, games: Games, s: Strategies) -> None:
+    targets = np.where(
+        games.town,
+        TOWN_VOTE_STRATEGIES[s.town_vote](rng, games),
+        MAFIA_VOTE_STRATEGIES[s.mafia_vote](rng, games)
+    )
+    voters = games.alive & games.active[:, None] & (targets >= 0)
+    rows, columns = np.nonzero(voters)
+    total, players = games.alive.shape
+    counts = np.bincount(
+        rows * players + targets[rows, columns],
+        minlength=total * players
+    ).reshape(total, players)
+    top = counts.max(axis=1)
+    leaders = counts.argmax(axis=1)
+    # A tie kills nobody, as in VoteTally.
+    unique = (counts == top[:, None]).sum(axis=1) == 1
+    rows = np.flatnonzero(games.active & (top > 0) & unique)
+    games.alive[rows, leaders[rows]] = False
+    games.rounds[games.active] += 1
+    games.finish()
+
+
+def simulate(
+    games: int,
+    settings: RoomSettings,
+    strategies: Strategies,
+    rng: np.random.Generator
+) -> tp.Tuple[np.ndarray, np.ndarray]:
+    # Returns the winner and the number of days of every game.
+    winner = np.full(games, NO_WINNER, dtype=np.int8)
+    rounds = np.zeros(games, dtype=np.int32)
+    ids = np.arange(games)
+    state = Games(games, settings)
+    while len(ids):
+        _night(rng, state, strategies)
+        if state.active.any():
+            _day(rng, state, strategies)
+        # Long games are rare: stop carrying the finished ones along.
+        if state.active.sum() * 2 < len(ids):
+            done = ~state.active
+            winner[ids[done]] = state.winner[done]
+            rounds[ids[done]] = state.rounds[done]
+            ids = ids[state.active]
+            state.keep(state.active)
+    return winner, rounds
+
+
+def reference_game(
+    settings: RoomSettings,
+    strategies: Strategies,
+    rng: random.Random
+) -> tp.Tuple[int, int]:
+    # The same game played on MafiaRoom, one player object at a time.
+    room = Room()
+    players = list(range(settings.capacity))
+    for id in players:
+        room.join(f"player{id}", id)
+    officers = range(settings.mafia, settings.mafia + settings.officers)
+    roles = {
+        id: PlayerRoles.Mafia if id < settings.mafia else
+        PlayerRoles.Officer if id in officers else
+        PlayerRoles.Civilian
+        for id in players
+    }
+    game = MafiaRoom(room, roles)
+    checked: tp.Set[int] = set()
+    exposed: tp.Set[int] = set()
+    rounds = 0
+    while True:
+        alive = [id for id in players if game.is_alive(id)]
+        town = [id for id in alive if not game.is_mafia(id)]
+        victim = None
+        if strategies.kill == "officers-first":
+            victim = next((id for id in town if id in officers), None)
+            if victim is not None:
+                victim = rng.choice([id for id in town if id in officers])
+        if victim is None:
+            victim = rng.choice(town)
+        if (winner := game.kill_player(victim)) is not None:
+            return _WINNERS[winner], rounds
+        for officer in officers:
+            if strategies.check == "none" or not game.is_alive(officer):
+                continue
+            candidates = [
+                id for id in players
+                if game.is_alive(id) and id not in checked and id != officer
+            ]
+            if candidates:
+                target = rng.choice(candidates)
+                checked.add(target)
+                if game.is_mafia(target):
+                    exposed.add(target)
+        alive = [id for id in players if game.is_alive(id)]
+        town = [id for id in alive if not game.is_mafia(id)]
+        named = [id for id in alive if id in exposed]
+        if not any(game.is_alive(id) for id in officers):
+            named = []
+        bloc = rng.choice(town)
+        tally = VoteTally()
+        for voter in alive:
+            others = [id for id in alive if id != voter]
+            if not game.is_mafia(voter):
+                if strategies.town_vote == "follow-officer" and named:
+                    target = named[0]
+                else:
+                    target = rng.choice(others)
+            elif strategies.mafia_vote == "bloc":
+                target = bloc
+            else:
+                target = rng.choice(others)
+            tally.vote(voter, target)
+        rounds += 1
+        leader = tally.leader
+        if leader is not None:
+            if (winner := game.kill_player(leader)) is not None:
+                return _WINNERS[winner], rounds
+
+
+def _settings(size: int, mafia: tp.Optional[int], officers: int) -> tp.Any:
+    try:
+        return RoomSettings(size, mafia, officers)
+    except RuntimeError as e:
+        raise click.BadParameter(f"{size} players: {e}")
+
+
+def _strategy_options(command: tp.Callable) -> tp.Callable:
+    defaults = Strategies()
+    options = [
+        ("--kill", KILL_STRATEGIES, defaults.kill),
+        ("--check", CHECK_STRATEGIES, defaults.check),
+        ("--town-vote", TOWN_VOTE_STRATEGIES, defaults.town_vote),
+        ("--mafia-vote", MAFIA_VOTE_STRATEGIES, defaults.mafia_vote),
+    ]
+    for name, strategies, default in reversed(options):
+        command = click.option(
+            name,
+            default=default,
+            type=click.Choice(list(strategies))
+        )(command)
+    return command
+
+
+def _mixes(mafia: str) -> tp.List[tp.Optional[int]]:
+    # "default" leaves the mafia at a third of the room.
+    return [
+        None if count == "default" else int(count)
+        for count in mafia.split(",")
+    ]
+
+
+@click.group()
+def main() -> None:
+    pass
+
+
+@main.command()
+@click.option("--games", default=1000000, type=int)
+@click.option("--sizes", default="5,7,10,20,50", type=str)
+@click.option("--mafia", default="default", type=str)
+@click.option("--officers", default=1, type=int)
+@click.option("--batch", default=100000, type=int)
+@click.option("--seed", default=0, type=int)
+@_strategy_options
+def run(
+    games: int,
+    sizes: str,
+    mafia: str,
+    officers: int,
+    batch: int,
+    seed: int,
+    kill: str,
+    check: str,
+    town_vote: str,
+    mafia_vote: str
+) -> None:
+    strategies = Strategies(kill, check, town_vote, mafia_vote)
+    seeds = np.random.SeedSequence(seed)
+    print(
+        f"{'players':>8}{'mafia':>6}{'officers':>9}{'civilians win':>15}"
+        f"{'95% ci':>9}{'rounds':>8}{'p10':>5}{'p50':>5}{'p90':>5}"
+        f"{'games/s':>11}"
+    )
+    for size in (int(size) for size in sizes.split(",")):
+        for mix in _mixes(mafia):
+            settings = _settings(size, mix, officers)
+            rng = np.random.default_rng(seeds.spawn(1)[0])
+            wins = 0
+            rounds = []
+            start = time.perf_counter()
+            for first in range(0, games, batch):
+                winner, played = simulate(
+                    min(batch, games - first), settings, strategies, rng
+                )
+                wins += int((winner == CIVILIANS).sum())
+                rounds.append(played)
+            elapsed = time.perf_counter() - start
+            rounds = np.concatenate(rounds)
+            p10, p50, p90 = np.percentile(rounds, [10, 50, 90])
+            share = wins / games
+            ci = 1.96 * math.sqrt(share * (1 - share) / games)
+            print(
+                f"{size:>8}{settings.mafia:>6}{settings.officers:>9}"
+                f"{share:>15.4f}{ci:>9.4f}{rounds.mean():>8.2f}"
+                f"{p10:>5.0f}{p50:>5.0f}{p90:>5.0f}"
+                f"{games / elapsed:>11.0f}"
+            )
+
+
+@main.command()
+@click.option("--games", default=20000, type=int)
+@click.option("--sizes", default="3,5,7,9", type=str)
+@click.option("--mafia", default="default", type=str)
+@click.option("--officers", default=1, type=int)
+@click.option("--seed", default=0, type=int)
+@_strategy_options
+def validate(
+    games: int,
+    sizes: str,
+    mafia: str,
+    officers: int,
+    seed: int,
+    kill: str,
+    check: str,
+    town_vote: str,
+    mafia_vote: str
+) -> None:
+    # Both engines play the same strategies with different random
+    # streams, so they agree in distribution: compare the civilians' win
+    # rate and the mean length with a z-test each.
+    strategies = Strategies(kill, check, town_vote, mafia_vote)
+    rng = np.random.default_rng(seed)
+    reference_rng = random.Random(seed)
+    failed = []
+    print(
+        f"{'players':>8}{'mafia':>6}{'vectorized':>12}{'MafiaRoom':>11}"
+        f"{'z':>7}{'rounds':>8}{'rounds':>8}{'z':>7}"
+    )
+    for size in (int(size) for size in sizes.split(",")):
+        for mix in _mixes(mafia):
+            settings = _settings(size, mix, officers)
+            winner, played = simulate(games, settings, strategies, rng)
+            results = [
+                reference_game(settings, strategies, reference_rng)
+                for _ in range(games)
+            ]
+            share = float((winner == CIVILIANS).mean())
+            expected = sum(w == CIVILIANS for w, _ in results) / games
+            pooled = (share + expected) / 2
+            z_share = (share - expected) / max(
+                math.sqrt(2 * pooled * (1 - pooled) / games), 1e-12
+            )
+            rounds = played.astype(float)
+            expected_rounds = np.array([r for _, r in results], dtype=float)
+            z_rounds = (rounds.mean() - expected_rounds.mean()) / max(
+                math.sqrt(
+                    (rounds.var() + expected_rounds.var()) / games
+                ),
+                1e-12
+            )
+            print(
+                f"{size:>8}{settings.mafia:>6}{share:>12.4f}"
+                f"{expected:>11.4f}{z_share:>7.2f}"
+                f"{rounds.mean():>8.3f}{expected_rounds.mean():>8.3f}"
+                f"{z_rounds:>7.2f}"
+            )
+            if abs(z_share) > 4 or abs(z_rounds) > 4:
+                failed.append(f"{size} players, {settings.mafia} mafia")
+    if failed:
+        raise click.ClickException(
+            "Engines disagree for " + "; ".join(failed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import asyncio
+import math
+import typing as tp
+
+
+# Every level has 2 ** _BITS slots, each a tick of the level above.
+_BITS = 6
+_SLOTS = 1 << _BITS
+_MASK = _SLOTS - 1
+
+
+class TimerWheelError(RuntimeError):
+    pass
+
+
+class Timer:
+    __slots__ = ("_expires", "_callback", "_args", "_slot", "_wheel")
+
+    def __init__(
+        self,
+        wheel: "TimerWheel",
+        expires: int,
+        callback: tp.Callable[..., tp.Any],
+        args: tp.Tuple
+    ) -> None:
+        self._wheel = wheel
+        self._expires = expires
+        self._callback = callback
+        self._args = args
+        self._slot: tp.Optional[dict["Timer", None]] = None
+
+    def cancel(self) -> None:
+        if self._slot is not None:
+            del self._slot[self]
+            self._slot = None
+            self._wheel._pending -= 1
+
+    def cancelled(self) -> bool:
+        return self._slot is None
+
+    def when(self) -> float:
+        return self._wheel._time(self._expires)
+
+
+class TimerWheel:
+    # Deadlines of all rooms share one task, which sleeps until the next
+    # slot with anything in it. A timer is filed by how far away it is:
+    # the first level holds the next 64 ticks one per slot, every next
+    # level 64 times coarser slots, and a coarse slot is spread over the
+    # finer levels when the wheel gets to it. Scheduling and cancelling
+    # cost the same however many timers are pending.
+    def __init__(self, resolution: float = 0.1, levels: int = 4) -> None:
+        if resolution <= 0:
+            raise TimerWheelError("Resolution must be positive")
+        if levels <= 0:
+            raise TimerWheelError("Levels must be positive")
+        self._resolution = resolution
+        self._levels: list[list[dict[Timer, None]]] = [
+            [{} for _ in range(_SLOTS)] for _ in range(levels)
+        ]
+        self._tick = 0
+        self._start: tp.Optional[float] = None
+        self._pending = 0
+        self._task: tp.Optional[asyncio.Task] = None
+        # The tick the task sleeps until and the future that wakes it up
+        # earlier.
+        self._due: tp.Optional[int] = None
+        self._wakeup: tp.Optional[asyncio.Future] = None
+        self._closed = False
+
+    def call_later(
+        self,
+        delay: float,
+        callback: tp.Callable[..., tp.Any],
+        *args: tp.Any
+    ) -> Timer:
+        if self._closed:
+            raise TimerWheelError("Timer wheel is closed")
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = loop.time()
+        if self._pending == 0:
+            # Nothing to fire in between: skip the idle ticks at once.
+            self._tick = max(self._tick, self._now(loop))
+        # Never early: the first tick at or after the deadline.
+        expires = max(
+            math.ceil((loop.time() + delay - self._start) / self._resolution),
+            self._tick + 1
+        )
+        timer = Timer(self, expires, callback, args)
+        self._insert(timer)
+        self._pending += 1
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        elif self._due is None or expires < self._due:
+            _wake(self._wakeup, False)
+        return timer
+
+    async def close(self) -> None:
+        self._closed = True
+        for level in self._levels:
+            for slot in level:
+                for timer in slot:
+                    timer._slot = None
+                slot.clear()
+        self._pending = 0
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def resolution(self) -> float:
+        return self._resolution
+
+    def __len__(self) -> int:
+        return self._pending
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup = loop.create_future()
+            if self._pending == 0:
+                self._due = None
+                await self._wakeup
+                continue
+            self._due = self._next_due()
+            handle = loop.call_at(
+                self._time(self._due), _wake, self._wakeup, True
+            )
+            try:
+                on_time = await self._wakeup
+            finally:
+                handle.cancel()
+            now = self._now(loop)
+            if on_time:
+                now = max(now, self._due)
+            # A busy loop may wake up late: catch up tick by tick so
+            # every timer still fires, in order.
+            while self._tick < now and self._pending:
+                self._advance()
+            if self._pending == 0:
+                self._tick = max(self._tick, now)
+
+    def _next_due(self) -> int:
+        # Nothing happens until the next timer of the first level or the
+        # next coarse slot to spread over it.
+        boundary = (self._tick | _MASK) + 1
+        for tick in range(self._tick + 1, boundary):
+            if self._levels[0][tick & _MASK]:
+                return tick
+        return boundary
+
+    def _advance(self) -> None:
+        self._tick += 1
+        tick = self._tick
+        # The coarse slots that start at this tick go first: some of
+        # their timers land in the finer slots processed right after.
+        for level in range(len(self._levels) - 1, 0, -1):
+            if tick & ((1 << _BITS * level) - 1) == 0:
+                slot = self._levels[level][tick >> _BITS * level & _MASK]
+                timers = list(slot)
+                slot.clear()
+                for timer in timers:
+                    self._insert(timer)
+        slot = self._levels[0][tick & _MASK]
+        while slot:
+            timer = next(iter(slot))
+            timer.cancel()
+            try:
+                timer._callback(*timer._args)
+            except Exception as e:
+                asyncio.get_running_loop().call_exception_handler({
+                    "message": "Exception in a timer wheel callback",
+                    "exception": e,
+                })
+
+    def _insert(self, timer: Timer) -> None:
+        top = len(self._levels) - 1
+        for level in range(top + 1):
+            shift = _BITS * level
+            if (timer._expires >> shift) - (self._tick >> shift) < _SLOTS:
+                index = timer._expires >> shift & _MASK
+                break
+        else:
+            # Further than the wheel reaches: park it in the last slot of
+            # the top level and file it again when that slot comes up.
+            level = top
+            index = (self._tick >> _BITS * top) - 1 & _MASK
+        slot = self._levels[level][index]
+        slot[timer] = None
+        timer._slot = slot
+
+    def _now(self, loop: asyncio.AbstractEventLoop) -> int:
+        return int((loop.time() - self._start) / self._resolution)
+
+    def _time(self, tick: int) -> float:
+        return self._start + tick * self._resolution
+
+
+def _wake(future: tp.Optional[asyncio.Future], on_time: bool) -> None:
+    if future is not None and not future.done():
+        future.set_result(on_time)
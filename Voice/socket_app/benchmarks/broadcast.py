@@ -0,0 +1,191 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import typing as tp
+
+import click
+
+from Voice.socket_app.protocol import (
+    CODECS,
+    JSON,
+    Codec,
+    Packet,
+    async_read_packet,
+    async_write_packet
+)
+
+
+Connection = tp.Tuple[asyncio.StreamReader, asyncio.StreamWriter, Codec]
+
+
+async def connect(host: str, port: int, codec: Codec) -> Connection:
+    reader, writer = await asyncio.open_connection(host, port)
+    if codec is not JSON:
+        await async_write_packet(writer, Packet("hello", codec.name.encode()))
+        reply = await async_read_packet(reader)
+        codec = CODECS[bytes(reply.data).decode()]
+    return reader, writer, codec
+
+
+async def room(
+    host: str, port: int, size: int, codec: Codec
+) -> tp.List[Connection]:
+    members = [await connect(host, port, codec) for _ in range(size)]
+    reader, writer, codec = members[0]
+    await async_write_packet(writer, Packet("create user0", b""), codec)
+    key = (await async_read_packet(reader, codec)).command.split(" ")[1]
+    for number, (reader, writer, codec) in enumerate(members[1:], 1):
+        await async_write_packet(
+            writer, Packet(f"join user{number} {key}", b""), codec
+        )
+        await async_read_packet(reader, codec)
+    # Everyone hears of the members joining after them.
+    for number, (reader, _, codec) in enumerate(members):
+        for _ in range(size - 1 - number):
+            await async_read_packet(reader, codec)
+    return members
+
+
+async def relay(
+    host: str,
+    port: int,
+    size: int,
+    speakers: int,
+    frames: int,
+    payload: int,
+    codec: Codec
+) -> tp.Tuple[float, float]:
+    members = await room(host, port, size, codec)
+    data = os.urandom(payload)
+    heard = 0
+    last = 0.0
+
+    async def speak(number: int) -> None:
+        _, writer, codec = members[number]
+        for seq in range(frames):
+            await async_write_packet(
+                writer, Packet(f"Audio user{number}", data, seq=seq), codec
+            )
+
+    async def listen(number: int) -> None:
+        nonlocal heard, last
+        reader, _, codec = members[number]
+        talking = speakers - (number < speakers)
+        # The server may drop frames for a listener falling behind: a
+        # second of silence ends the listening.
+        for _ in range(frames * talking):
+            try:
+                await asyncio.wait_for(
+                    async_read_packet(reader, codec), 1.0
+                )
+            except asyncio.TimeoutError:
+                return
+            heard += 1
+            last = time.perf_counter()
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(speak(number) for number in range(speakers)),
+        *(listen(number) for number in range(size))
+    )
+    for _, writer, _ in members:
+        writer.close()
+    return heard / (last - start), heard
+
+
+def cpu_time(pid: int) -> float:
+    # The client shares the machine: what the server spends is what
+    # tells the relaying apart.
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def run(
+    server: int,
+    host: str,
+    port: int,
+    sizes: tp.List[int],
+    speakers: tp.Optional[int],
+    frames: int,
+    payload: int,
+    codec: Codec
+) -> None:
+    print(
+        f"{'room':>6}{'speakers':>10}{'frames/s':>11}{'per listener':>14}"
+        f"{'delivered':>11}{'server us/frame':>17}"
+    )
+    for size in sizes:
+        talking = size if speakers is None else min(speakers, size)
+        before = cpu_time(server)
+        rate, heard = await relay(
+            host, port, size, talking, frames, payload, codec
+        )
+        cpu = cpu_time(server) - before
+        relayed = frames * talking * (size - 1)
+        print(
+            f"{size:>6}{talking:>10}{rate:>11.0f}{rate / size:>14.0f}"
+            f"{heard / relayed:>11.1%}{cpu / heard * 1e6:>17.2f}"
+        )
+
+
+@click.command()
+@click.option("--port", default=10090, type=int)
+@click.option("--sizes", default="2,4,8,16", type=str)
+@click.option(
+    "--speakers",
+    default=None,
+    type=int,
+    help="Members talking at once, all of them by default."
+)
+@click.option("--frames", default=1000, type=int)
+@click.option("--payload", default=2048, type=int)
+@click.option(
+    "--codec",
+    default="binary/1",
+    type=click.Choice(list(CODECS))
+)
+@click.option(
+    "--server-args",
+    default="",
+    type=str,
+    help="Extra options of the server, like a --queue-frames deep enough "
+    "to relay a flood without drops."
+)
+def main(
+    port: int,
+    sizes: str,
+    speakers: tp.Optional[int],
+    frames: int,
+    payload: int,
+    codec: str,
+    server_args: str
+) -> None:
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "Voice.socket_app.server",
+            "--host", "127.0.0.1", "--port", str(port)
+        ] + server_args.split(),
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1.0)
+        asyncio.run(run(
+            server.pid,
+            "127.0.0.1",
+            port,
+            [int(size) for size in sizes.split(",")],
+            speakers,
+            frames,
+            payload,
+            CODECS[codec]
+        ))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import socket
+import threading
+import time
+import typing as tp
+
+import click
+
+from Voice.socket_app.protocol import (
+    CODECS,
+    Codec,
+    FrameReader,
+    Packet,
+    read_packet,
+    write_packet
+)
+
+
+def codec_cost(
+    codec: Codec, packet: Packet, frames: int
+) -> tp.Tuple[float, float, int]:
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame = codec.encode(packet)
+    encoded = time.perf_counter() - start
+    header = frame[:codec.header_size]
+    body = frame[codec.header_size:]
+    start = time.perf_counter()
+    for _ in range(frames):
+        codec.decode(header, body)
+    decoded = time.perf_counter() - start
+    return encoded / frames, decoded / frames, len(frame)
+
+
+def relay_rate(
+    codec: Codec, packet: Packet, frames: int, buffered: bool
+) -> float:
+    # Frames per second through a socket pair, read either with
+    # read_packet or with the reader the client uses.
+    sender, receiver = socket.socketpair()
+    if buffered:
+        read = FrameReader(receiver).read
+    else:
+        def read(codec: Codec) -> Packet:
+            return read_packet(receiver, codec)
+
+    def send() -> None:
+        for _ in range(frames):
+            write_packet(sender, packet, codec)
+
+    thread = threading.Thread(target=send)
+    start = time.perf_counter()
+    thread.start()
+    for _ in range(frames):
+        read(codec)
+    elapsed = time.perf_counter() - start
+    thread.join()
+    sender.close()
+    receiver.close()
+    return frames / elapsed
+
+
+def run(sizes: tp.List[int], frames: int) -> None:
+    print(
+        f"{'payload':>8}{'codec':>10}{'bytes':>8}{'us/encode':>11}"
+        f"{'us/decode':>11}{'frames/s':>11}{'buffered':>11}"
+    )
+    for size in sizes:
+        packet = Packet("Audio someone", os.urandom(size), 1, 1)
+        for name, codec in CODECS.items():
+            encode, decode, length = codec_cost(codec, packet, frames)
+            rate = relay_rate(codec, packet, frames, False)
+            buffered = relay_rate(codec, packet, frames, True)
+            print(
+                f"{size:>8}{name:>10}{length:>8}"
+                f"{encode * 1e6:>11.2f}{decode * 1e6:>11.2f}"
+                f"{rate:>11.0f}{buffered:>11.0f}"
+            )
+
+
+@click.command()
+@click.option("--sizes", default="256,2048,16384", type=str)
+@click.option("--frames", default=20000, type=int)
+def main(sizes: str, frames: int) -> None:
+    run([int(size) for size in sizes.split(",")], frames)
+
+
+if __name__ == "__main__":
+    main()
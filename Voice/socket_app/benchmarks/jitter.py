@@ -0,0 +1,121 @@
+import random
+import typing as tp
+
+import click
+
+from Voice.socket_app.jitter_buffer import JitterBuffer
+
+
+def arrivals(
+    frames: int,
+    frame_time: float,
+    delay: float,
+    jitter: float,
+    loss: float,
+    in_order: bool,
+    rto: float,
+    seed: int
+) -> tp.List[tp.Tuple[float, int]]:
+    # When each frame reaches the listener, in ms. Datagrams come as the
+    # network delivers them, lost ones never. In order delivery stands
+    # for a stream: a lost frame comes a retransmission timeout later
+    # and holds back every frame behind it.
+    rng = random.Random(seed)
+    result = []
+    last = 0.0
+    for seq in range(frames):
+        arrival = seq * frame_time + delay + rng.expovariate(1 / jitter)
+        if rng.random() < loss:
+            if not in_order:
+                continue
+            arrival += rto
+        if in_order:
+            arrival = max(arrival, last)
+            last = arrival
+        result.append((arrival, seq))
+    result.sort()
+    return result
+
+
+def play(
+    buffer: JitterBuffer,
+    frames: tp.List[tp.Tuple[float, int]],
+    frame_time: float,
+    total: int
+) -> tp.Tuple[int, float, float]:
+    # Plays the frames a tick at a time: how many were heard and how
+    # long they took from capture to playback, on average and at worst.
+    delays = []
+    index = 0
+    tick = 0
+    while index < len(frames) or len(buffer):
+        now = tick * frame_time
+        while index < len(frames) and frames[index][0] <= now:
+            arrival, seq = frames[index]
+            buffer.push(seq, seq * frame_time, seq.to_bytes(4, "little"),
+                        arrival)
+            index += 1
+        data = buffer.pop()
+        if data is not None:
+            seq = int.from_bytes(data, "little")
+            delays.append(now - seq * frame_time)
+        tick += 1
+        if tick > 2 * total + 1000:
+            break
+    delays.sort()
+    if not delays:
+        return 0, float("nan"), float("nan")
+    return (
+        len(delays),
+        sum(delays) / len(delays),
+        delays[len(delays) * 99 // 100]
+    )
+
+
+@click.command()
+@click.option("--frames", default=5000, type=int)
+@click.option("--frame-time", default=51.2, type=float)
+@click.option("--delay", default=20.0, type=float)
+@click.option("--jitter", default=15.0, type=float)
+@click.option("--loss", default=0.01, type=float)
+@click.option("--rto", default=200.0, type=float)
+@click.option("--depths", default="2,4,8", type=str)
+@click.option("--seed", default=1, type=int)
+def main(
+    frames: int,
+    frame_time: float,
+    delay: float,
+    jitter: float,
+    loss: float,
+    rto: float,
+    depths: str,
+    seed: int
+) -> None:
+    # One speaker heard through an adaptive buffer and through fixed
+    # ones, by datagram and over a stream.
+    buffers: tp.List[tp.Tuple[str, tp.Callable[[], JitterBuffer]]] = [
+        ("adaptive", lambda: JitterBuffer(frame_time))
+    ]
+    for depth in map(int, depths.split(",")):
+        buffers.append((
+            f"fixed {depth}",
+            lambda depth=depth: JitterBuffer(frame_time, depth, depth)
+        ))
+    print(
+        f"{'transport':<10}{'buffer':<10}{'heard':>8}"
+        f"{'mean ms':>9}{'p99 ms':>9}"
+    )
+    for transport, in_order in (("datagram", False), ("stream", True)):
+        path = arrivals(
+            frames, frame_time, delay, jitter, loss, in_order, rto, seed
+        )
+        for name, factory in buffers:
+            heard, mean, p99 = play(factory(), path, frame_time, frames)
+            print(
+                f"{transport:<10}{name:<10}{heard / frames:>8.1%}"
+                f"{mean:>9.1f}{p99:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import socket
+import struct
+import subprocess
+import sys
+import time
+import typing as tp
+
+import click
+
+from Voice.socket_app.benchmarks.broadcast import room
+from Voice.socket_app.protocol import (
+    CODECS,
+    Codec,
+    Packet,
+    async_read_packet,
+    async_write_packet
+)
+
+
+STAMP = struct.Struct("<d")
+
+
+async def run(
+    host: str,
+    port: int,
+    size: int,
+    rate: float,
+    seconds: float,
+    payload: int,
+    codec: Codec
+) -> None:
+    members = await room(host, port, size, codec)
+    # The last member hardly reads: a small receive buffer lets its
+    # connection back up quickly.
+    members[-1][1].transport.get_extra_info("socket").setsockopt(
+        socket.SOL_SOCKET, socket.SO_RCVBUF, 4096
+    )
+    padding = os.urandom(payload - STAMP.size)
+    latencies: tp.List[float] = []
+    sent = 0
+
+    async def speak() -> None:
+        nonlocal sent
+        _, writer, codec = members[0]
+        start = time.perf_counter()
+        while True:
+            await asyncio.sleep(start + sent / rate - time.perf_counter())
+            data = STAMP.pack(time.perf_counter()) + padding
+            await async_write_packet(
+                writer, Packet("Audio user0", data, seq=sent), codec
+            )
+            sent += 1
+
+    async def listen(number: int) -> None:
+        reader, _, codec = members[number]
+        while True:
+            packet = await async_read_packet(reader, codec)
+            (sent,) = STAMP.unpack_from(packet.data)
+            latencies.append(time.perf_counter() - sent)
+
+    async def lag() -> None:
+        reader, _, codec = members[-1]
+        while True:
+            await asyncio.sleep(1.0)
+            await async_read_packet(reader, codec)
+
+    listeners = [
+        asyncio.ensure_future(listen(number))
+        for number in range(1, size - 1)
+    ]
+    slow = asyncio.ensure_future(lag())
+    # The speaker talks for the time given whether or not the server
+    # keeps up; what is not delivered a second later counts as lost.
+    speaker = asyncio.ensure_future(speak())
+    await asyncio.sleep(seconds)
+    speaker.cancel()
+    await asyncio.sleep(1.0)
+    for task in listeners + [slow]:
+        task.cancel()
+    for _, writer, _ in members:
+        writer.close()
+    latencies.sort()
+    expected = sent * len(listeners)
+
+    def percentile(percent: float) -> float:
+        if not latencies:
+            return float("nan")
+        index = min(len(latencies) - 1, len(latencies) * percent // 100)
+        return latencies[int(index)] * 1e3
+
+    print(f"{'delivered':>10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print(
+        f"{len(latencies) / expected:>10.1%}"
+        f"{percentile(50):>9.1f}{percentile(99):>9.1f}"
+        f"{percentile(100):>9.1f}"
+    )
+
+
+@click.command()
+@click.option("--port", default=10090, type=int)
+@click.option("--size", default=4, type=int)
+@click.option("--rate", default=200.0, type=float)
+@click.option("--seconds", default=10.0, type=float)
+@click.option("--payload", default=2048, type=int)
+@click.option(
+    "--codec",
+    default="binary/1",
+    type=click.Choice(list(CODECS))
+)
+@click.option(
+    "--server-args",
+    default="",
+    type=str,
+    help="Extra options of the server started for the run."
+)
+def main(
+    port: int,
+    size: int,
+    rate: float,
+    seconds: float,
+    payload: int,
+    codec: str,
+    server_args: str
+) -> None:
+    # One member talks, one barely reads and the others measure how long
+    # the frames take to reach them.
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "Voice.socket_app.server",
+            "--host", "127.0.0.1", "--port", str(port)
+        ] + server_args.split(),
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1.0)
+        asyncio.run(run(
+            "127.0.0.1", port, size, rate, seconds, payload, CODECS[codec]
+        ))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,15 @@ import pyaudio
 from simple_term_menu import TerminalMenu
 from typing import List
 
-from Voice.socket_app.protocol import Packet, read_packet, write_packet
+from Voice.socket_app.protocol import (
+    CODECS,
+    JSON,
+    Codec,
+    FrameReader,
+    Packet,
+    write_packet
+)
+from Voice.socket_app.udp_audio import UdpAudio, mix
 
 class UserList:
     def __init__(self, lst: List[str]):
@@ -33,26 +41,58 @@ class UserList:
 
 
 class Client:
-    def __init__(self, host: str, port: int, username: int) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: int,
+        codec: str = JSON.name,
+        udp: bool = False,
+        udp_port: tp.Optional[int] = None
+    ) -> None:
         self._host = host
         self._port = port
+        self._udp = udp
+        self._udp_port = port if udp_port is None else udp_port
         self._buffer = 1024
         self._username = username
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._cur_talk = "Nobody"
-        try:
-            self._socket.connect((self._host, self._port))
-        except Exception as ex:
-            print("Couldn't connect to server")
-            raise ex
+        self._names: tp.Dict[int, str] = {}
+        self._seq = 0
+        self._codec: Codec = JSON
+        self._connect()
+        if codec != JSON.name:
+            self._hello(codec)
 
         print(f"Connected to server {self._host}:{self._port}")
 
-        self._socket.settimeout(5)
         self._menu()
         os.close(sys.stderr.fileno())
         self._core()
 
+    def _connect(self) -> None:
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self._socket.connect((self._host, self._port))
+        except Exception as ex:
+            print("Couldn't connect to server")
+            raise ex
+        self._socket.settimeout(5)
+        self._reader = FrameReader(self._socket)
+
+    def _hello(self, codec: str) -> None:
+        # A server that does not know "hello" drops the connection: talk
+        # JSON to it over a new one.
+        try:
+            write_packet(self._socket, Packet("hello", codec.encode()))
+            resp = self._reader.read()
+        except Exception:
+            self._socket.close()
+            self._connect()
+            return
+        if resp.command == "hello":
+            self._codec = CODECS.get(bytes(resp.data).decode(), JSON)
+
     def _menu(self) -> None:
         menu_title = "Menu"
 
@@ -67,9 +107,11 @@ class Client:
             if answer == 0:
                 try:
                     write_packet(
-                        self._socket, Packet(f"create {self._username}", b"")
+                        self._socket,
+                        Packet(f"create {self._username}", b""),
+                        self._codec
                     )
-                    resp = read_packet(self._socket)
+                    resp = self._reader.read(self._codec)
                 except Exception:
                     print("Restart client!", flush=True)
                     self._socket.close()
@@ -90,15 +132,18 @@ class Client:
                 try:
                     write_packet(
                         self._socket,
-                        Packet(f"join {self._username} {room_exp}", b"")
+                        Packet(f"join {self._username} {room_exp}", b""),
+                        self._codec
                     )
-                    resp = read_packet(self._socket)
+                    resp = self._reader.read(self._codec)
                 except Exception:
                     print("Restart client!", flush=True)
                     self._socket.close()
                     exit(1)
                 if resp.command == "OK":
-                    self._list = UserList(resp.data.decode().split(" "))
+                    self._list = UserList(
+                        bytes(resp.data).decode().split(" ")
+                    )
                     self._room_num = room_exp
                     break
                 elif resp.command == "FAIL":
@@ -122,6 +167,9 @@ class Client:
         self._init_receive()
         self._turn_on_receive()
         self._init_send()
+        if self._udp:
+            # Audio goes over the connection until the session is up.
+            write_packet(self._socket, Packet("session", b""), self._codec)
         talk_str: str = "Talk"
         while True:
             terminal_menu = TerminalMenu([
@@ -202,6 +250,8 @@ class Client:
         self._playing_stream: tp.Optional[pyaudio.Stream] = None
         self._receive_thread: tp.Optional[threading.Thread] = None
         self._receive_future: tp.Optional[Future] = None
+        self._udp_audio: tp.Optional[UdpAudio] = None
+        self._playout_thread: tp.Optional[threading.Thread] = None
 
     def _turn_on_receive(self) -> None:
         if self._receive_thread is None:
@@ -222,6 +272,12 @@ class Client:
         if self._receive_thread is not None:
             self._receive_future.set_result(1)
             self._receive_thread.join()
+            if self._playout_thread is not None:
+                self._playout_thread.join()
+                self._playout_thread = None
+            if self._udp_audio is not None:
+                self._udp_audio.close()
+                self._udp_audio = None
             self._playing_stream.close()
             self._receive_future = None
             self._receive_thread = None
@@ -232,15 +288,26 @@ class Client:
         assert self._receive_future is not None
         while not self._receive_future.done():
             try:
-                packet = read_packet(self._socket)
+                packet = self._reader.read(self._codec)
                 command = packet.command
                 if command.startswith("Add "):
-                    self._list.add(packet.data.decode())
+                    username = bytes(packet.data).decode()
+                    self._names[packet.sender] = username
+                    self._list.add(username)
                 elif command.startswith("Delete "):
-                    self._list.delete(packet.data.decode())
+                    self._list.delete(bytes(packet.data).decode())
+                elif command.startswith("session "):
+                    self._start_udp(
+                        int(command[len("session "):]),
+                        bytes(packet.data).decode()
+                    )
                 elif command.startswith("Audio "):
-                    self._playing_stream.write(packet.data)
-                    self._cur_talk = command[len("Audio "):]
+                    # Once the session is up the playout thread owns the
+                    # stream: what still comes this way is dropped.
+                    if self._udp_audio is None:
+                        # PyAudio only takes bytes.
+                        self._playing_stream.write(bytes(packet.data))
+                        self._cur_talk = command[len("Audio "):]
                 else:
                     print("Restart client!", flush=True)
                     self._turn_off_send()
@@ -250,6 +317,41 @@ class Client:
             except Exception:
                 pass
 
+    def _start_udp(self, token: int, members: str) -> None:
+        if self._udp_audio is not None:
+            return
+        for member in members.split():
+            id_, _, username = member.partition(":")
+            self._names[int(id_)] = username
+        self._udp_audio = UdpAudio(
+            self._host,
+            self._udp_port,
+            token,
+            self._buffer / self._rate * 1000
+        )
+        self._playout_thread = threading.Thread(target=self._play_out)
+        self._playout_thread.start()
+
+    def _play_out(self) -> None:
+        # The stream takes a frame of playback at a time: writing paces
+        # the loop, silence included.
+        assert self._receive_future is not None
+        assert self._udp_audio is not None
+        silence = bytes(2 * self._buffer * self._channels)
+        while not self._receive_future.done():
+            try:
+                frames = self._udp_audio.pop()
+                if frames:
+                    self._cur_talk = self._names.get(
+                        frames[-1][0], self._cur_talk
+                    )
+                    data = mix([data for _, data in frames])
+                else:
+                    data = silence
+                self._playing_stream.write(data)
+            except Exception:
+                pass
+
     def _send_data_to_server(self) -> None:
         assert self._send_future is not None
         while not self._send_future.done():
@@ -257,9 +359,17 @@ class Client:
                 data = self._recording_stream.read(
                     self._buffer, exception_on_overflow=False
                 )
-                write_packet(
-                    self._socket, Packet(f"Audio {self._username}", data)
-                )
+                if self._udp_audio is not None:
+                    self._udp_audio.send(self._seq, data)
+                else:
+                    write_packet(
+                        self._socket,
+                        Packet(
+                            f"Audio {self._username}", data, seq=self._seq
+                        ),
+                        self._codec
+                    )
+                self._seq += 1
             except Exception:
                 pass
 
@@ -268,12 +378,32 @@ class Client:
 @click.option("--host", default="0.0.0.0", type=str)
 @click.option("--port", default=10080, type=int)
 @click.option("--username", type=str, prompt=True)
+@click.option(
+    "--codec",
+    default="binary/1",
+    type=click.Choice(list(CODECS))
+)
+@click.option(
+    "--udp",
+    is_flag=True,
+    default=False,
+    help="Send and receive the audio by datagram."
+)
+@click.option(
+    "--udp-port",
+    default=None,
+    type=int,
+    help="Port of the audio datagrams, the one of --port by default."
+)
 def main(
     host: str,
     port: int,
     username: str,
+    codec: str,
+    udp: bool,
+    udp_port: tp.Optional[int],
 ) -> None:
-    Client(host, port, username)
+    Client(host, port, username, codec, udp, udp_port)
 
 
 if __name__ == "__main__":
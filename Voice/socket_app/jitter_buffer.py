@@ -0,0 +1,99 @@
+import math
+import typing as tp
+
+
+class JitterBuffer:
+    # The frames of one speaker on their way to playback. The buffer
+    # holds frames back long enough to put them in order and ride out
+    # the jitter of their arrival. The jitter estimate is the one of RFC
+    # 3550 and the depth follows it. pop is called once per frame of
+    # playback and gives None for a frame that is missing or while the
+    # buffer fills up.
+    def __init__(
+        self,
+        frame_time: float,
+        min_delay: int = 2,
+        max_delay: int = 16
+    ) -> None:
+        self._frame_time = frame_time
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._frames: tp.Dict[int, bytes] = {}
+        # The seq to play next, None while the buffer fills up.
+        self._next: tp.Optional[int] = None
+        self._last: tp.Optional[tp.Tuple[float, float]] = None
+        self._jitter = 0.0
+        self._played = 0
+        self._lost = 0
+        self._late = 0
+        self._skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def jitter(self) -> float:
+        return self._jitter
+
+    @property
+    def delay(self) -> int:
+        # Frames to hold: enough for a few times the jitter on top of
+        # the frame itself.
+        wanted = 1 + math.ceil(4 * self._jitter / self._frame_time)
+        return max(self._min_delay, min(self._max_delay, wanted))
+
+    @property
+    def played(self) -> int:
+        return self._played
+
+    @property
+    def lost(self) -> int:
+        return self._lost
+
+    @property
+    def late(self) -> int:
+        return self._late
+
+    @property
+    def skipped(self) -> int:
+        return self._skipped
+
+    def push(
+        self,
+        seq: int,
+        timestamp: float,
+        data: bytes,
+        arrival: float
+    ) -> None:
+        if self._last is not None:
+            last_arrival, last_timestamp = self._last
+            change = (arrival - last_arrival) - (timestamp - last_timestamp)
+            self._jitter += (abs(change) - self._jitter) / 16
+        self._last = (arrival, timestamp)
+        if self._next is not None and seq < self._next:
+            self._late += 1
+            return
+        self._frames[seq] = data
+
+    def pop(self) -> tp.Optional[bytes]:
+        if self._next is None:
+            if len(self._frames) < self.delay:
+                return None
+            self._next = min(self._frames)
+        # More than wanted is held after a burst or once the jitter
+        # goes down: catch up by one frame per frame played.
+        if len(self._frames) > self.delay + 1:
+            self._frames.pop(min(self._frames))
+            self._skipped += 1
+            self._next = min(self._frames)
+        data = self._frames.pop(self._next, None)
+        self._next += 1
+        if data is not None:
+            self._played += 1
+        elif self._frames:
+            self._lost += 1
+        else:
+            # Nothing left to play: the speaker is quiet or the network
+            # is, fill up again before playing on.
+            self._next = None
+        return data
@@ -0,0 +1,93 @@
+import asyncio
+import typing as tp
+
+
+Sample = tp.Tuple[str, tp.Dict[str, str], float]
+
+
+class Metrics:
+    # Renders what the collectors report at the time of the request in
+    # the Prometheus text format.
+    def __init__(self) -> None:
+        self._help: tp.Dict[str, tp.Tuple[str, str]] = {}
+        self._collectors: tp.List[tp.Callable[[], tp.Iterable[Sample]]] = []
+
+    def describe(self, name: str, type_: str, help_: str) -> None:
+        self._help[name] = (type_, help_)
+
+    def register_collector(
+        self,
+        collector: tp.Callable[[], tp.Iterable[Sample]]
+    ) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families: tp.Dict[str, tp.List[Sample]] = {}
+        for collector in self._collectors:
+            for sample in collector():
+                families.setdefault(sample[0], []).append(sample)
+        lines = []
+        for family, samples in families.items():
+            if family in self._help:
+                type_, help_ = self._help[family]
+                lines.append(f"# HELP {family} {help_}")
+                lines.append(f"# TYPE {family} {type_}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tp.Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        f'{k}="{_escape(str(v))}"' for k, v in labels.items()
+    ) + "}"
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def _value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+async def serve_metrics(
+    metrics: Metrics,
+    host: str,
+    port: int
+) -> asyncio.AbstractServer:
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split(" ")
+            if len(parts) >= 2 and parts[0] == "GET" and \
+                    parts[1].split("?")[0] == "/metrics":
+                status = "200 OK"
+                body = metrics.render().encode()
+            else:
+                status = "404 Not Found"
+                body = b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
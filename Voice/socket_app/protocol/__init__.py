@@ -1,16 +1,53 @@
+from .datagram import (
+    AUDIO,
+    REGISTER,
+    Datagram,
+    decode_datagram,
+    encode_datagram
+)
+from .framing import FrameBuffer, FrameProtocol, FrameReader, start_server
 from .protocol import (
+    BINARY,
+    CODECS,
+    JSON,
+    MAX_FRAME_SIZE,
+    BinaryCodec,
+    Buffer,
+    Codec,
+    JsonCodec,
     Packet,
+    ProtocolError,
     async_read_packet,
     async_write_packet,
+    negotiate,
     read_packet,
     write_packet
 )
 
 
 __all__ = [
+    "AUDIO",
+    "BINARY",
+    "CODECS",
+    "FrameBuffer",
+    "FrameProtocol",
+    "FrameReader",
+    "JSON",
+    "MAX_FRAME_SIZE",
+    "BinaryCodec",
+    "Buffer",
+    "Codec",
+    "Datagram",
+    "JsonCodec",
     "Packet",
+    "ProtocolError",
+    "REGISTER",
     "async_read_packet",
     "async_write_packet",
+    "decode_datagram",
+    "encode_datagram",
+    "negotiate",
     "read_packet",
+    "start_server",
     "write_packet"
 ]
@@ -0,0 +1,55 @@
+import struct
+from dataclasses import dataclass
+
+from .protocol import Buffer, ProtocolError
+
+
+# version, type, sender, seq, timestamp in ms, session token; the
+# payload follows as is.
+HEADER = struct.Struct("<BBIIIQ")
+VERSION = 1
+
+REGISTER = 0
+AUDIO = 1
+
+
+@dataclass
+class Datagram:
+    type_: int
+    data: Buffer = b""
+    # Set by the server on what it relays.
+    sender: int = 0
+    seq: int = 0
+    timestamp: int = 0
+    # The session a client got over its connection, on what it sends.
+    token: int = 0
+
+
+def encode_datagram(datagram: Datagram) -> bytes:
+    return HEADER.pack(
+        VERSION,
+        datagram.type_,
+        datagram.sender,
+        datagram.seq,
+        datagram.timestamp & 0xFFFFFFFF,
+        datagram.token
+    ) + datagram.data
+
+
+def decode_datagram(bytes_: Buffer) -> Datagram:
+    if len(bytes_) < HEADER.size:
+        raise ProtocolError("Datagram is too short")
+    version, type_, sender, seq, timestamp, token = \
+        HEADER.unpack_from(bytes_)
+    if version != VERSION:
+        raise ProtocolError(f"Unsupported version {version}")
+    if type_ not in (REGISTER, AUDIO):
+        raise ProtocolError(f"Unknown type {type_}")
+    return Datagram(
+        type_,
+        memoryview(bytes_)[HEADER.size:],
+        sender,
+        seq,
+        timestamp,
+        token
+    )
@@ -0,0 +1,181 @@
+import asyncio
+import asyncio.streams
+import socket
+import typing as tp
+
+from .protocol import JSON, Codec, Packet
+
+
+Handler = tp.Callable[
+    ["FrameProtocol", asyncio.StreamWriter], tp.Awaitable[None]
+]
+
+
+class FrameBuffer:
+    # Bytes are received into one buffer that is reused: the packets
+    # taken from it point into it. The last packet taken stays in place
+    # until the next one is asked for.
+    def __init__(self, size: int = 64 * 1024) -> None:
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        # The last packet taken is in [start, next), then [next, end)
+        # is what is received but not taken yet.
+        self._start = 0
+        self._next = 0
+        self._end = 0
+        # How many bytes from next the frame being read needs.
+        self._needed = 0
+
+    def __len__(self) -> int:
+        return self._end - self._next
+
+    def take(self, codec: Codec = JSON) -> tp.Optional[Packet]:
+        self._start = self._next
+        available = self._end - self._start
+        if available < codec.header_size:
+            self._needed = codec.header_size
+            return None
+        header = self._view[self._start:self._start + codec.header_size]
+        size = codec.header_size + codec.body_size(header)
+        if available < size:
+            self._needed = size
+            return None
+        self._next = self._start + size
+        self._needed = 0
+        return codec.decode(
+            header,
+            self._view[self._start + codec.header_size:self._next]
+        )
+
+    def space(self) -> memoryview:
+        if self._start == self._end:
+            self._start = self._next = self._end = 0
+        capacity = len(self._buffer)
+        if self._end == capacity or self._next + self._needed > capacity:
+            kept = self._view[self._next:self._end]
+            capacity = max(capacity, self._needed, 2 * len(kept))
+            if self._start == self._next and capacity == len(self._buffer):
+                self._view[:len(kept)] = kept
+            else:
+                # The packet taken last may still be in use: leave it in
+                # the old buffer.
+                buffer = bytearray(capacity)
+                buffer[:len(kept)] = kept
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            self._start = self._next = 0
+            self._end = len(kept)
+        return self._view[self._end:]
+
+    def filled(self, size: int) -> None:
+        self._end += size
+
+
+class FrameReader:
+    # Reads the packets of a blocking socket without a copy per packet;
+    # a timeout leaves what is received in the buffer for the next call.
+    def __init__(
+        self, socket: socket.SocketType, size: int = 64 * 1024
+    ) -> None:
+        self._socket = socket
+        self._frames = FrameBuffer(size)
+
+    def read(self, codec: Codec = JSON) -> Packet:
+        while True:
+            packet = self._frames.take(codec)
+            if packet is not None:
+                return packet
+            received = self._socket.recv_into(self._frames.space())
+            if received == 0:
+                raise ConnectionError("Connection is closed")
+            self._frames.filled(received)
+
+
+class FrameProtocol(
+    asyncio.streams.FlowControlMixin, asyncio.BufferedProtocol
+):
+    # The transport receives right into the frame buffer; the handler of
+    # the connection reads the packets and writes through a StreamWriter.
+    def __init__(
+        self,
+        handler: Handler,
+        size: int = 64 * 1024,
+        limit: int = 256 * 1024
+    ) -> None:
+        super().__init__()
+        self._handler = handler
+        self._frames = FrameBuffer(size)
+        # Above it reading pauses until the handler takes packets.
+        self._limit = limit
+        self._loop = asyncio.get_event_loop()
+        self._transport: tp.Optional[asyncio.Transport] = None
+        self._task: tp.Optional[asyncio.Task] = None
+        self._waiter: tp.Optional[asyncio.Future] = None
+        self._closed = self._loop.create_future()
+        self._eof = False
+        self._reading_paused = False
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = tp.cast(asyncio.Transport, transport)
+        writer = asyncio.StreamWriter(
+            self._transport, self, None, self._loop
+        )
+        self._task = self._loop.create_task(self._handler(self, writer))
+
+    def connection_lost(self, exc: tp.Optional[Exception]) -> None:
+        super().connection_lost(exc)
+        self._eof = True
+        self._wakeup()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def eof_received(self) -> bool:
+        self._eof = True
+        self._wakeup()
+        return False
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        return self._frames.space()
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._frames.filled(nbytes)
+        if self._waiter is not None:
+            self._wakeup()
+        elif len(self._frames) > self._limit and not self._reading_paused:
+            self._reading_paused = True
+            self._transport.pause_reading()
+
+    async def read(self, codec: Codec = JSON) -> Packet:
+        while True:
+            packet = self._frames.take(codec)
+            if packet is not None:
+                return packet
+            if self._eof:
+                raise ConnectionError("Connection is closed")
+            if self._reading_paused:
+                self._reading_paused = False
+                self._transport.resume_reading()
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def _wakeup(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _get_close_waiter(self, stream: tp.Any) -> asyncio.Future:
+        return self._closed
+
+
+async def start_server(
+    handler: Handler,
+    host: str,
+    port: int,
+    **kwargs: tp.Any
+) -> asyncio.AbstractServer:
+    loop = asyncio.get_running_loop()
+    return await loop.create_server(
+        lambda: FrameProtocol(handler), host, port, **kwargs
+    )
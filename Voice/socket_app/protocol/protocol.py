@@ -2,19 +2,39 @@ import asyncio
 import base64
 import json
 import socket
+import struct
+import typing as tp
 from dataclasses import dataclass
 
 
+Buffer = tp.Union[bytes, bytearray, memoryview]
+# The sizes in headers come from the peer: a frame is only read into a
+# buffer of its size once the size is known to be sane.
+MAX_FRAME_SIZE = 4 * 1024 * 1024
+
+
+class ProtocolError(RuntimeError):
+    pass
+
+
 @dataclass
 class Packet:
     command: str
-    data: bytes
+    # A view into the buffer of a reader is only valid until the reader
+    # is asked for the next packet.
+    data: Buffer
+    # The connection the packet comes from and its place in the stream
+    # of that connection, set by the server on what it relays.
+    sender: int = 0
+    seq: int = 0
 
     def serialization(self) -> bytes:
         return json\
             .dumps({
                 "command": self.command,
                 "data": base64.b64encode(self.data).decode("ascii"),
+                "sender": self.sender,
+                "seq": self.seq,
             })\
             .encode()
 
@@ -23,48 +43,168 @@ class Packet:
         js = json.loads(bytes_)
         return Packet(
             command=js["command"],
-            data=base64.b64decode(js["data"].encode("ascii"))
+            data=base64.b64decode(js["data"].encode("ascii")),
+            sender=js.get("sender", 0),
+            seq=js.get("seq", 0)
+        )
+
+
+class Codec:
+    # A frame is a header of a fixed size that tells the size of the
+    # body following it.
+    name: str
+    header_size: int
+    max_frame_size = MAX_FRAME_SIZE
+
+    def encode(self, packet: Packet) -> bytes:
+        return b"".join(self.encode_parts(packet))
+
+    def encode_parts(self, packet: Packet) -> tp.List[Buffer]:
+        raise NotImplementedError
+
+    def body_size(self, header: Buffer) -> int:
+        raise NotImplementedError
+
+    def decode(self, header: Buffer, body: Buffer) -> Packet:
+        raise NotImplementedError
+
+    def _checked(self, body_size: int) -> int:
+        if self.header_size + body_size > self.max_frame_size:
+            raise ProtocolError(
+                f"Frame of {self.header_size + body_size} bytes is over "
+                f"{self.max_frame_size}"
+            )
+        return body_size
+
+
+class JsonCodec(Codec):
+    name = "json"
+    header_size = 8
+
+    def encode_parts(self, packet: Packet) -> tp.List[Buffer]:
+        packet_b = packet.serialization()
+        return [len(packet_b).to_bytes(8, "little", signed=False), packet_b]
+
+    def body_size(self, header: Buffer) -> int:
+        return self._checked(int.from_bytes(header, "little", signed=False))
+
+    def decode(self, header: Buffer, body: Buffer) -> Packet:
+        return Packet.deserialization(bytes(body))
+
+
+class BinaryCodec(Codec):
+    # version, type, arguments size, sender, seq, payload size; the
+    # arguments of the command follow as utf-8, then the payload as is.
+    name = "binary/1"
+    version = 1
+    header = struct.Struct("<BBHIII")
+    header_size = header.size
+    types = [
+        "create", "join", "OK", "FAIL", "Add", "Delete", "Audio", "session"
+    ]
+    type_ids = {command: id for id, command in enumerate(types)}
+
+    def encode_parts(self, packet: Packet) -> tp.List[Buffer]:
+        command, _, arguments = packet.command.partition(" ")
+        if command not in self.type_ids:
+            raise ProtocolError(f"Unknown command {command}")
+        arguments_b = arguments.encode()
+        header = self.header.pack(
+            self.version,
+            self.type_ids[command],
+            len(arguments_b),
+            packet.sender,
+            packet.seq,
+            len(packet.data)
         )
+        # The payload goes out as it is, never copied into the frame.
+        return [header + arguments_b, packet.data]
+
+    def body_size(self, header: Buffer) -> int:
+        version, _, arguments_size, _, _, payload_size = \
+            self.header.unpack(header)
+        if version != self.version:
+            raise ProtocolError(f"Unsupported version {version}")
+        return self._checked(arguments_size + payload_size)
+
+    def decode(self, header: Buffer, body: Buffer) -> Packet:
+        _, type_, arguments_size, sender, seq, _ = self.header.unpack(header)
+        if type_ >= len(self.types):
+            raise ProtocolError(f"Unknown type {type_}")
+        command = self.types[type_]
+        if arguments_size != 0:
+            command += " " + str(body[:arguments_size], "utf-8")
+        return Packet(command, body[arguments_size:], sender, seq)
+
+
+JSON = JsonCodec()
+BINARY = BinaryCodec()
+# The codecs a server speaks, by the name a client asks for in "hello".
+CODECS: tp.Dict[str, Codec] = {codec.name: codec for codec in (BINARY, JSON)}
+
+
+def negotiate(offer: str) -> Codec:
+    # The first codec of the offer that is known, the JSON one the peers
+    # start with otherwise.
+    for name in offer.split(" "):
+        if name in CODECS:
+            return CODECS[name]
+    return JSON
+
+
+def recv_exactly(socket: socket.SocketType, size: int) -> bytearray:
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Cannot receive {size} bytes at once")
+    result = bytearray(size)
+    view = memoryview(result)
+    received = 0
+    while received < size:
+        new_data = socket.recv_into(view[received:])
+        if new_data == 0:
+            raise ConnectionError("Connection is closed")
+        received += new_data
+    return result
 
 
-def recv_exactly(socket: socket.SocketType, size: int) -> bytes:
-    result: bytes = b""
-    while len(result) < size:
-        new_data = socket.recv(size - len(result))
-        result += new_data
-    return new_data
+def send_parts(socket: socket.SocketType, parts: tp.List[Buffer]) -> None:
+    # One sendmsg for the whole frame, more only on a partial send.
+    views = [memoryview(part) for part in parts if len(part) != 0]
+    while views:
+        sent = socket.sendmsg(views)
+        while views and sent >= len(views[0]):
+            sent -= len(views[0])
+            views.pop(0)
+        if views:
+            views[0] = views[0][sent:]
 
 
-def read_packet(socket: socket.SocketType) -> Packet:
-    size_b = recv_exactly(socket, 8)
-    size = int.from_bytes(size_b, "little", signed=False)
-    packet = recv_exactly(socket, size)
-    return Packet.deserialization(packet)
+def read_packet(socket: socket.SocketType, codec: Codec = JSON) -> Packet:
+    header = recv_exactly(socket, codec.header_size)
+    body = recv_exactly(socket, codec.body_size(header))
+    return codec.decode(header, body)
 
 
 def write_packet(
     socket: socket.SocketType,
-    packet: Packet
+    packet: Packet,
+    codec: Codec = JSON
 ) -> None:
-    packet_b = packet.serialization()
-    size = len(packet_b).to_bytes(8, "little", signed=False)
-    socket.sendall(size)
-    socket.sendall(packet_b)
+    send_parts(socket, codec.encode_parts(packet))
 
 
-async def async_read_packet(reader: asyncio.StreamReader) -> Packet:
-    size_b = await reader.readexactly(8)
-    size = int.from_bytes(size_b, "little", signed=False)
-    packet = await reader.readexactly(size)
-    return Packet.deserialization(packet)
+async def async_read_packet(
+    reader: asyncio.StreamReader,
+    codec: Codec = JSON
+) -> Packet:
+    header = await reader.readexactly(codec.header_size)
+    body = await reader.readexactly(codec.body_size(header))
+    return codec.decode(header, body)
 
 
 async def async_write_packet(
     writer: asyncio.StreamWriter,
-    packet: Packet
+    packet: Packet,
+    codec: Codec = JSON
 ) -> None:
-    packet_b = packet.serialization()
-    size = len(packet_b).to_bytes(8, "little", signed=False)
-    writer.write(size)
-    writer.write(packet_b)
+    writer.writelines(codec.encode_parts(packet))
     await writer.drain()
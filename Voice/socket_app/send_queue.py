@@ -0,0 +1,67 @@
+import asyncio
+import typing as tp
+from collections import deque
+
+
+class SendQueueError(RuntimeError):
+    pass
+
+
+class SendQueue:
+    # The frames on their way to one connection. A task of its own
+    # writes them, so a slow listener only holds back itself. Once
+    # `limit` audio frames wait the oldest of them is dropped: late
+    # voice is of no use. Other frames are never dropped.
+    def __init__(self, writer: asyncio.StreamWriter, limit: int) -> None:
+        if limit <= 0:
+            raise SendQueueError("Limit must be positive")
+        self._writer = writer
+        self._limit = limit
+        self._frames: tp.Deque[tp.Tuple[bytes, bool]] = deque()
+        self._audio = 0
+        self._sent = 0
+        self._dropped = 0
+        self._ready = asyncio.Event()
+        # Frames wait here rather than in the transport, where they
+        # could not be dropped any more.
+        writer.transport.set_write_buffer_limits(high=0)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def sent(self) -> int:
+        return self._sent
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def put(self, frame: bytes, droppable: bool = False) -> None:
+        if droppable:
+            if self._audio >= self._limit:
+                self._drop_oldest()
+            self._audio += 1
+        self._frames.append((frame, droppable))
+        self._ready.set()
+
+    async def run(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            # All that waits goes out in one write; new frames queue up
+            # while the connection drains.
+            frames = [frame for frame, _ in self._frames]
+            self._frames.clear()
+            self._audio = 0
+            self._sent += len(frames)
+            self._writer.writelines(frames)
+            await self._writer.drain()
+
+    def _drop_oldest(self) -> None:
+        for index, (_, droppable) in enumerate(self._frames):
+            if droppable:
+                del self._frames[index]
+                self._audio -= 1
+                self._dropped += 1
+                return
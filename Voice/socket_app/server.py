@@ -1,4 +1,5 @@
 import asyncio
+import secrets
 import socket
 import typing as tp
 from uuid import uuid4
@@ -6,34 +7,107 @@ from uuid import uuid4
 import click
 from typing import Dict
 
-from Voice.socket_app.protocol.protocol import Packet, async_read_packet, async_write_packet
+from Voice.socket_app.protocol import (
+    AUDIO,
+    JSON,
+    Codec,
+    Datagram,
+    FrameProtocol,
+    Packet,
+    ProtocolError,
+    async_write_packet,
+    decode_datagram,
+    encode_datagram,
+    negotiate,
+    start_server
+)
+from Voice.socket_app.metrics import Metrics, Sample, serve_metrics
+from Voice.socket_app.send_queue import SendQueue
+
+
+Address = tp.Tuple[str, int]
+
+
+class DatagramRelay(asyncio.DatagramProtocol):
+    def __init__(self, received: tp.Callable[[bytes, Address], None]) -> None:
+        self._received = received
+
+    def datagram_received(self, data: bytes, addr: Address) -> None:
+        self._received(data, addr)
 
 
 class Server:
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        queue_frames: int = 8,
+        metrics_host: str = "127.0.0.1",
+        metrics_port: tp.Optional[int] = None,
+        udp_port: tp.Optional[int] = None
+    ) -> None:
         self._host = host
         self._port = port
+        self._udp_port = port if udp_port is None else udp_port
         self._buffer = 1024
+        self._queue_frames = queue_frames
+        self._metrics_host = metrics_host
+        self._metrics_port = metrics_port
 
         self._connections: \
             Dict[str, Dict[asyncio.StreamWriter, str]] = {}
+        self._codecs: Dict[asyncio.StreamWriter, Codec] = {}
+        self._ids: Dict[asyncio.StreamWriter, int] = {}
+        self._next_id = 1
+        # The connections in a room get their frames through a queue
+        # and a task of their own.
+        self._queues: Dict[asyncio.StreamWriter, SendQueue] = {}
+        self._senders: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._dropped = 0
+        # Audio of the connections with a session may come and go by
+        # datagram; the session is told apart by its token.
+        self._sessions: \
+            Dict[int, tp.Tuple[str, asyncio.StreamWriter]] = {}
+        self._tokens: Dict[asyncio.StreamWriter, int] = {}
+        self._addresses: Dict[asyncio.StreamWriter, Address] = {}
+        self._datagrams: tp.Optional[asyncio.DatagramTransport] = None
+        self._datagrams_received = 0
+        self._datagrams_sent = 0
+        self._datagrams_rejected = 0
         asyncio.run(self._setup_server())
 
     async def _setup_server(self) -> None:
         async def handle_socket(
-            reader: asyncio.StreamReader,
+            reader: FrameProtocol,
             writer: asyncio.StreamWriter
         ) -> None:
             print("New connection!", flush=True)
             username: tp.Optional[str] = None
             cur_room: tp.Optional[str] = None
+            # Every connection starts with JSON frames; a client that
+            # knows other codecs offers them in "hello" first.
+            codec: Codec = JSON
+            self._codecs[writer] = codec
+            self._ids[writer] = self._next_id
+            self._next_id += 1
             while True:
                 try:
-                    packet = await async_read_packet(reader)
+                    packet = await reader.read(codec)
                 except Exception:
                     await self._close_connection(cur_room, writer)
                     return
                 data = packet.command.split(" ")
+                if data[0] == "hello" and codec is JSON:
+                    codec = negotiate(bytes(packet.data).decode())
+                    try:
+                        await async_write_packet(
+                            writer, Packet("hello", codec.name.encode())
+                        )
+                    except Exception:
+                        await self._close_connection(cur_room, writer)
+                        return
+                    self._codecs[writer] = codec
+                    continue
                 if data[0] == "create":
                     if len(data) != 2:
                         await self._close_connection(cur_room, writer)
@@ -45,13 +119,9 @@ class Server:
                     cur_room = key
                     self._connections[cur_room] = {}
                     self._connections[cur_room][writer] = username
-                    try:
-                        await async_write_packet(
-                            writer, Packet(f"OK {cur_room}", b"")
-                        )
-                    except Exception:
-                        await self._close_connection(cur_room, writer)
-                        return
+                    self._enter(cur_room, writer).put(
+                        codec.encode(Packet(f"OK {cur_room}", b""))
+                    )
                     print(
                         f"Created new room {cur_room} by {username}",
                         flush=True
@@ -66,81 +136,172 @@ class Server:
                     key = data[2]
                     if key not in self._connections:
                         await async_write_packet(
-                            writer, Packet("FAIL", b"")
+                            writer, Packet("FAIL", b""), codec
                         )
                         continue
                     cur_room = key
+                    lst = list(self._connections[cur_room].values())
                     self._connections[cur_room][writer] = username
-                    try:
-                        lst = [
-                            v
-                            for k, v in self._connections[cur_room].items()
-                            if k != writer
-                        ]
-                        t = (" ".join(lst)).encode()
-                        await async_write_packet(writer, Packet("OK", t))
-                        await self._broadcast(
-                            writer, "Add", cur_room,
-                            f"{self._connections[cur_room][writer]}".encode()
-                        )
-                        print(f"{username} join to {cur_room}", flush=True)
-                    except Exception:
-                        await self._close_connection(cur_room, writer)
-                        return
+                    # The reply goes through the queue too, so that it
+                    # comes before anything said in the room.
+                    self._enter(cur_room, writer).put(
+                        codec.encode(Packet("OK", " ".join(lst).encode()))
+                    )
+                    self._broadcast(writer, cur_room, Packet(
+                        f"Add {username}",
+                        username.encode(),
+                        self._ids[writer]
+                    ))
+                    print(f"{username} join to {cur_room}", flush=True)
                     break
                 await self._close_connection(cur_room, writer)
                 return
             while True:
                 try:
-                    packet = await async_read_packet(reader)
+                    packet = await reader.read(codec)
+                    if packet.command == "session":
+                        self._open_session(cur_room, writer, codec)
+                        continue
                     if not packet.command.startswith("Audio "):
                         raise Exception()
-                    await self._broadcast(
-                        writer, "Audio", cur_room, packet.data
-                    )
+                    # Encoding the frame copies the payload out of the
+                    # buffer of the reader.
+                    self._broadcast(writer, cur_room, Packet(
+                        f"Audio {username}",
+                        packet.data,
+                        self._ids[writer],
+                        packet.seq
+                    ), self._timestamp())
                 except Exception:
                     await self._close_connection(cur_room, writer)
                     return
 
-        server = await asyncio.start_server(
+        server = await start_server(
             handle_socket, self._host,
             self._port, family=socket.AF_INET,
         )
         print(f"Serving on {self._host}:{self._port}", flush=True)
+        self._datagrams, _ = \
+            await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: DatagramRelay(self._datagram_received),
+                local_addr=(self._host, self._udp_port),
+                family=socket.AF_INET
+            )
+        print(
+            f"Relaying datagrams on {self._host}:{self._udp_port}",
+            flush=True
+        )
+        if self._metrics_port is not None:
+            await serve_metrics(
+                self._metrics(), self._metrics_host, self._metrics_port
+            )
+            print(
+                f"Serving metrics on "
+                f"{self._metrics_host}:{self._metrics_port}",
+                flush=True
+            )
 
         await server.serve_forever()
 
-    async def _broadcast_helper(
+    def _enter(self, key: str, writer: asyncio.StreamWriter) -> SendQueue:
+        queue = SendQueue(writer, self._queue_frames)
+        self._queues[writer] = queue
+        self._senders[writer] = asyncio.ensure_future(
+            self._send(key, writer, queue)
+        )
+        return queue
+
+    async def _send(
         self,
-        writer: asyncio.StreamWriter,
-        type_: str,
         key: str,
-        data: bytes,
-        name: str,
+        writer: asyncio.StreamWriter,
+        queue: SendQueue,
     ) -> None:
         try:
-            await async_write_packet(
-                writer,
-                Packet(f"{type_} {name}", data)
-            )
+            await queue.run()
         except Exception:
             await self._close_connection(key, writer)
+
+    def _open_session(
+        self,
+        key: str,
+        writer: asyncio.StreamWriter,
+        codec: Codec,
+    ) -> None:
+        token = self._tokens.get(writer)
+        if token is None:
+            token = secrets.randbits(64)
+            while token == 0 or token in self._sessions:
+                token = secrets.randbits(64)
+            self._sessions[token] = (key, writer)
+            self._tokens[writer] = token
+        # Datagrams only tell the id of the speaker: the names of the
+        # members come along.
+        members = " ".join(
+            f"{self._ids[writer_c]}:{username}"
+            for writer_c, username in self._connections[key].items()
+        )
+        self._queues[writer].put(codec.encode(
+            Packet(f"session {token}", members.encode())
+        ))
+
+    def _datagram_received(self, data: bytes, addr: Address) -> None:
+        self._datagrams_received += 1
+        try:
+            datagram = decode_datagram(data)
+        except ProtocolError:
+            self._datagrams_rejected += 1
+            return
+        session = self._sessions.get(datagram.token)
+        if session is None:
+            self._datagrams_rejected += 1
             return
+        key, writer = session
+        # The last address a session was heard from is where its audio
+        # goes: registrations keep coming while the session lasts.
+        self._addresses[writer] = addr
+        if datagram.type_ == AUDIO:
+            self._broadcast(writer, key, Packet(
+                f"Audio {self._connections[key][writer]}",
+                datagram.data,
+                self._ids[writer],
+                datagram.seq
+            ), datagram.timestamp)
 
-    async def _broadcast(
+    def _timestamp(self) -> int:
+        return int(asyncio.get_running_loop().time() * 1000)
+
+    def _broadcast(
         self,
         writer: asyncio.StreamWriter,
-        type_: str,
         key: str,
-        data: bytes,
+        packet: Packet,
+        timestamp: tp.Optional[int] = None,
     ) -> None:
-        await asyncio.gather(*(
-            self._broadcast_helper(
-                writer_c, type_, key, data, self._connections[key][writer]
-            )
-            for writer_c in self._connections[key]
-            if writer_c != writer
-        ))
+        # Audio comes with a timestamp: it may be dropped on the way and
+        # goes by datagram to the listeners with a session. The frame is
+        # the same for every listener with the same codec: encode it
+        # once for each codec and share the bytes.
+        audio = timestamp is not None
+        frames: Dict[Codec, bytes] = {}
+        datagram: tp.Optional[bytes] = None
+        for writer_c in self._connections.get(key, {}):
+            if writer_c == writer:
+                continue
+            address = self._addresses.get(writer_c) if audio else None
+            if address is not None:
+                if datagram is None:
+                    datagram = encode_datagram(Datagram(
+                        AUDIO, packet.data, packet.sender, packet.seq,
+                        tp.cast(int, timestamp)
+                    ))
+                self._datagrams.sendto(datagram, address)
+                self._datagrams_sent += 1
+                continue
+            codec = self._codecs[writer_c]
+            if codec not in frames:
+                frames[codec] = codec.encode(packet)
+            self._queues[writer_c].put(frames[codec], audio)
 
     async def _close_connection(
         self, key: tp.Optional[str], writer: asyncio.StreamWriter
@@ -150,34 +311,133 @@ class Server:
             key in self._connections and
             writer in self._connections[key]
         ):
-            await self._broadcast(
-                writer, "Delete", key,
-                f"{self._connections[key][writer]}".encode()
-            )
+            # Out of the room first: the listeners failing on the
+            # broadcast below close as well and must not write to it.
+            username = self._connections[key].pop(writer)
             print(
-                f"Connection is closed in {key} "
-                f"with {self._connections[key][writer]}",
+                f"Connection is closed in {key} with {username}",
                 flush=True
             )
-            del self._connections[key][writer]
             if len(self._connections[key]) == 0:
                 del self._connections[key]
                 print(f"{key} room is deleted", flush=True)
+            self._broadcast(writer, key, Packet(
+                f"Delete {username}",
+                username.encode(),
+                self._ids.get(writer, 0)
+            ))
+        queue = self._queues.pop(writer, None)
+        if queue is not None:
+            self._dropped += queue.dropped
+        sender = self._senders.pop(writer, None)
+        if sender is not None and sender is not asyncio.current_task():
+            sender.cancel()
+        token = self._tokens.pop(writer, None)
+        if token is not None:
+            del self._sessions[token]
+        self._addresses.pop(writer, None)
+        self._codecs.pop(writer, None)
+        self._ids.pop(writer, None)
         writer.close()
         try:
             await writer.wait_closed()
         except Exception:
             pass
 
+    def collect_metrics(self) -> tp.Iterator[Sample]:
+        dropped = self._dropped
+        yield "voice_rooms", {}, len(self._connections)
+        yield "voice_connections", {}, len(self._codecs)
+        for key, room in self._connections.items():
+            for writer, username in room.items():
+                queue = self._queues[writer]
+                labels = {
+                    "room": key,
+                    "user": username,
+                    "connection": str(self._ids[writer])
+                }
+                yield "voice_send_queue_frames", labels, len(queue)
+                yield "voice_send_frames_total", labels, queue.sent
+                yield "voice_send_dropped_frames_total", labels, \
+                    queue.dropped
+                dropped += queue.dropped
+        yield "voice_dropped_frames_total", {}, dropped
+        yield "voice_udp_sessions", {}, len(self._addresses)
+        yield "voice_datagrams_received_total", {}, self._datagrams_received
+        yield "voice_datagrams_sent_total", {}, self._datagrams_sent
+        yield "voice_datagrams_rejected_total", {}, self._datagrams_rejected
+
+    def _metrics(self) -> Metrics:
+        metrics = Metrics()
+        metrics.describe(
+            "voice_rooms", "gauge", "Rooms held by the server."
+        )
+        metrics.describe(
+            "voice_connections", "gauge", "Open client connections."
+        )
+        metrics.describe(
+            "voice_send_queue_frames", "gauge",
+            "Frames waiting to be written, by connection."
+        )
+        metrics.describe(
+            "voice_send_frames_total", "counter",
+            "Frames written, by connection."
+        )
+        metrics.describe(
+            "voice_send_dropped_frames_total", "counter",
+            "Audio frames dropped from a full queue, by connection."
+        )
+        metrics.describe(
+            "voice_dropped_frames_total", "counter",
+            "Audio frames dropped from full queues of all connections."
+        )
+        metrics.describe(
+            "voice_udp_sessions", "gauge",
+            "Connections that get their audio by datagram."
+        )
+        metrics.describe(
+            "voice_datagrams_received_total", "counter",
+            "Datagrams received from the clients."
+        )
+        metrics.describe(
+            "voice_datagrams_sent_total", "counter",
+            "Audio datagrams relayed to the clients."
+        )
+        metrics.describe(
+            "voice_datagrams_rejected_total", "counter",
+            "Datagrams malformed or of no known session."
+        )
+        metrics.register_collector(self.collect_metrics)
+        return metrics
+
 
 @click.command()
 @click.option("--host", default="0.0.0.0", type=str)
 @click.option("--port", default=10080, type=int)
+@click.option(
+    "--queue-frames",
+    default=8,
+    type=int,
+    help="Audio frames a connection may fall behind before the oldest "
+    "are dropped."
+)
+@click.option("--metrics-host", default="127.0.0.1", type=str)
+@click.option("--metrics-port", default=None, type=int)
+@click.option(
+    "--udp-port",
+    default=None,
+    type=int,
+    help="Port of the audio datagrams, the one of --port by default."
+)
 def main(
     host: str,
     port: int,
+    queue_frames: int,
+    metrics_host: str,
+    metrics_port: tp.Optional[int],
+    udp_port: tp.Optional[int],
 ) -> None:
-    Server(host, port)
+    Server(host, port, queue_frames, metrics_host, metrics_port, udp_port)
 
 
 if __name__ == "__main__":
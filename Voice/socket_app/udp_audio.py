@@ -0,0 +1,116 @@
+import socket
+import threading
+import time
+import typing as tp
+from array import array
+
+from Voice.socket_app.jitter_buffer import JitterBuffer
+from Voice.socket_app.protocol import (
+    AUDIO,
+    REGISTER,
+    Datagram,
+    ProtocolError,
+    decode_datagram,
+    encode_datagram
+)
+
+
+class UdpAudio:
+    # The audio of a session by datagram. What is sent goes out as is,
+    # what comes in waits in a jitter buffer for each speaker until it is
+    # played. Registrations keep the server told where to send to.
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        token: int,
+        frame_time: float,
+        register_period: float = 1.0
+    ) -> None:
+        self._token = token
+        self._frame_time = frame_time
+        self._register_period = register_period
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.connect((host, port))
+        self._socket.settimeout(0.5)
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._buffers: tp.Dict[int, JitterBuffer] = {}
+        self._closed = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._register),
+            threading.Thread(target=self._receive)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def send(self, seq: int, data: bytes) -> None:
+        self._send(Datagram(AUDIO, data, seq=seq, timestamp=self._clock()))
+
+    def pop(self) -> tp.List[tp.Tuple[int, bytes]]:
+        # The frames of every speaker for one frame of playback.
+        frames = []
+        with self._lock:
+            for sender, buffer in self._buffers.items():
+                data = buffer.pop()
+                if data is not None:
+                    frames.append((sender, data))
+        return frames
+
+    def close(self) -> None:
+        self._closed.set()
+        for thread in self._threads:
+            thread.join()
+        self._socket.close()
+
+    def _clock(self) -> int:
+        return int((time.monotonic() - self._start) * 1000)
+
+    def _send(self, datagram: Datagram) -> None:
+        datagram.token = self._token
+        try:
+            self._socket.send(encode_datagram(datagram))
+        except OSError:
+            pass
+
+    def _register(self) -> None:
+        while True:
+            self._send(Datagram(REGISTER))
+            if self._closed.wait(self._register_period):
+                return
+
+    def _receive(self) -> None:
+        while not self._closed.is_set():
+            try:
+                data = self._socket.recv(65536)
+                datagram = decode_datagram(data)
+            except (OSError, ProtocolError):
+                # Timeouts, refusals of a server not up yet and garbage.
+                continue
+            if datagram.type_ != AUDIO:
+                continue
+            with self._lock:
+                buffer = self._buffers.get(datagram.sender)
+                if buffer is None:
+                    buffer = JitterBuffer(self._frame_time)
+                    self._buffers[datagram.sender] = buffer
+                buffer.push(
+                    datagram.seq,
+                    datagram.timestamp,
+                    bytes(datagram.data),
+                    self._clock()
+                )
+
+
+def mix(frames: tp.List[bytes]) -> bytes:
+    # Adds up 16 bit samples, clipped to their range.
+    if len(frames) == 1:
+        return frames[0]
+    total = [0] * (max(len(frame) for frame in frames) // 2)
+    for frame in frames:
+        samples = array("h", frame[:len(frame) // 2 * 2])
+        for i, sample in enumerate(samples):
+            total[i] += sample
+    return array(
+        "h", (max(-32768, min(32767, sample)) for sample in total)
+    ).tobytes()